@@ -5,20 +5,16 @@ import sys, json
 from pathlib import Path
 
 from prompts import PromptBuilder, load_prompt
-from libs.frames import Frame, default_traceback_pipeline
+from libs.frames import Frame, SourceIndex, default_traceback_pipeline
+from libs.tracing import json_codec
+from libs.tracing._trace_file import open_traces
 
 def get_ctx_around_line(filename: str, line_nmbr: int, context_size: int) -> str:
     assert context_size > 0, "context_size must be non-negative"
     assert line_nmbr >= 1, "line_nmbr must be >= 1"
 
-    lines = Path(filename).read_text(encoding="utf-8", errors="replace").splitlines()
-    total = len(lines)
-
-    start = max(1, line_nmbr - context_size)
-    end   = min(total, line_nmbr + context_size)
-
-    snippets = lines[start - 1 : end]
-    return "\n".join(f"{line_nmbr-context_size+n} {("->" if context_size==n else "  ")} : {snippet}" for n, snippet in enumerate(snippets))
+    source = Path(filename).read_text(encoding="utf-8", errors="replace")
+    return SourceIndex.for_source(source).render_context(line_nmbr, context_size)
 
 def serialize_trace(obj: dict) -> str:
     return "```trace\n" + json.dumps(obj, indent=2) + "\n```"
@@ -63,12 +59,14 @@ def build_prompt(trace: dict) -> str:
     )
 
 def read_json(source: str | Path | None) -> list[dict]:
-    raw = sys.stdin.read() if source in (None, "-", "") else Path(source).read_text()
-    return json.loads(raw)
+    if source in (None, "-", ""):
+        return json_codec.loads(sys.stdin.read())
+    with open_traces(source) as reader:
+        return list(reader)
 
 def generate_prompt_as_string(project_path: str, test_name: str) -> str | None:
-    all_traces = read_json(project_path)
-    trace =  next((t for t in all_traces if t["nodeid"] == test_name), None)
+    with open_traces(project_path) as reader:
+        trace = reader.get(test_name)
     if trace:
         prompt = build_prompt(trace)
         return prompt
@@ -36,6 +36,7 @@
         pkgs.python313Packages.tqdm
         pkgs.python313Packages.openai
         pkgs.python313Packages.pyyaml
+        pkgs.python313Packages.orjson
 
         pkgs.openssl
         pkgs.vscode
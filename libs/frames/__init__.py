@@ -1,9 +1,29 @@
 from libs.frames.frame import Frame
+from libs.frames.step_frames import (
+    InlineStepFrames,
+    SidecarStepFrames,
+    StepFrames,
+    resolve_step_frames_ref,
+    step_frames_for,
+)
+from libs.frames.trace import ParsedTrace
+from libs.frames.budget import (
+    BudgetSelection,
+    CharRatioTokenEstimator,
+    TokenBudgetSelector,
+    TokenEstimator,
+    is_test_path,
+)
 from libs.frames.serializer import (
     ExecutionPathSerializer,
     FrameSerializer,
     LocalsSerializer,
 )
+from libs.tracing.renderers import (
+    ValueRendererRegistry,
+    default_registry,
+    register_renderer,
+)
 from libs.frames.filters import (
     FrameFilter,
     FrozenOrSyntheticFrameFilter,
@@ -18,14 +38,39 @@ from libs.frames.pipeline import (
     FramesFilteringPipeline,
     default_traceback_pipeline,
     default_exec_path_pipeline,
+    default_step_frames_pipeline,
+)
+from libs.frames.source_index import SourceIndex
+from libs.frames.loops import LoopSummary, StepFrameCompressor, VariedLocal
+from libs.frames.postprocess import TracePostProcessor
+from libs.frames.selection import (
+    ScoredTrace,
+    ScoringWeights,
+    TraceFeatures,
+    TraceScorer,
+    select_most_informative_trace,
+    stack_signature,
 )
-from libs.frames.selection import select_most_informative_trace
 
 __all__ = [
     "Frame",
+    "ParsedTrace",
+    "InlineStepFrames",
+    "SidecarStepFrames",
+    "StepFrames",
+    "resolve_step_frames_ref",
+    "step_frames_for",
+    "BudgetSelection",
+    "CharRatioTokenEstimator",
+    "TokenBudgetSelector",
+    "TokenEstimator",
+    "is_test_path",
     "FrameSerializer",
     "ExecutionPathSerializer",
     "LocalsSerializer",
+    "ValueRendererRegistry",
+    "default_registry",
+    "register_renderer",
     "FrameFilter",
     "FrozenOrSyntheticFrameFilter",
     "SitePackagesFrameFilter",
@@ -37,5 +82,16 @@ __all__ = [
     "FramesFilteringPipeline",
     "default_traceback_pipeline",
     "default_exec_path_pipeline",
+    "default_step_frames_pipeline",
+    "TracePostProcessor",
+    "SourceIndex",
+    "LoopSummary",
+    "StepFrameCompressor",
+    "VariedLocal",
+    "ScoredTrace",
+    "ScoringWeights",
+    "TraceFeatures",
+    "TraceScorer",
     "select_most_informative_trace",
+    "stack_signature",
 ]
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    runtime_checkable,
+)
+
+from libs.frames.frame import Frame
+from libs.frames.source_index import SourceIndex
+
+
+_MISSING = object()
+
+
+def is_test_path(path: str) -> bool:
+    return "/tests/" in path or PurePosixPath(path).name.startswith("test_")
+
+
+@runtime_checkable
+class TokenEstimator(Protocol):
+    def estimate(self, text: str) -> int: ...
+
+
+class CharRatioTokenEstimator:
+    def __init__(self, chars_per_token: float = 4.0):
+        if chars_per_token <= 0:
+            raise ValueError("chars_per_token must be > 0")
+        self._chars_per_token = chars_per_token
+
+    def estimate(self, text: str) -> int:
+        return math.ceil(len(text) / self._chars_per_token)
+
+
+@dataclass(frozen=True)
+class BudgetSelection:
+    frames: Tuple[Frame, ...]
+    context_sizes: Tuple[int, ...]
+    budget: int
+    tokens_used: int
+    dropped_frames: Tuple[Frame, ...] = ()
+    dropped_locals: Mapping[int, Tuple[str, ...]] = field(default_factory=dict)
+    trimmed_context: int = 0
+
+    @property
+    def dropped_locals_count(self) -> int:
+        return sum(len(names) for names in self.dropped_locals.values())
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.frames)} frame(s) in ~{self.tokens_used}/{self.budget} tokens; "
+            f"dropped {len(self.dropped_frames)} frame(s), "
+            f"{self.dropped_locals_count} local(s); "
+            f"trimmed context on {self.trimmed_context} frame(s)"
+        )
+
+
+class TokenBudgetSelector:
+    """Pick frames, locals and context lines for a prompt within a token budget.
+
+    Frames are ranked project-before-test and, within each group, closest to
+    the exception (end of the trace) first. The budget is spent in three
+    linear passes over that ranking: frame skeletons, then locals (changed
+    ones first), then context lines widened one ring at a time.
+    """
+
+    def __init__(
+        self,
+        budget: int,
+        *,
+        estimator: Optional[TokenEstimator] = None,
+        max_context_lines: int = 8,
+        is_test: Callable[[str], bool] = is_test_path,
+    ):
+        if budget < 0:
+            raise ValueError("budget must be >= 0")
+        if max_context_lines < 0:
+            raise ValueError("max_context_lines must be >= 0")
+        self._budget = budget
+        self._estimator = estimator or CharRatioTokenEstimator()
+        self._max_context_lines = max_context_lines
+        self._is_test = is_test
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    def select(
+        self, frames: Sequence[Frame], source_map: Mapping[str, str]
+    ) -> BudgetSelection:
+        estimate = self._estimator.estimate
+        index_by_file: Dict[str, SourceIndex] = {}
+        order = self._priority_order(frames)
+        remaining = self._budget
+
+        included = [False] * len(frames)
+        focus = [1] * len(frames)
+        for i in order:
+            frame = frames[i]
+            lines = index_by_file.get(frame.file)
+            if lines is None:
+                lines = SourceIndex.for_source(source_map.get(frame.file, ""))
+                index_by_file[frame.file] = lines
+            focus[i] = min(max(frame.line, 1), max(len(lines), 1))
+            cost = estimate(self._skeleton(i, frame, lines, focus[i]))
+            if cost <= remaining:
+                included[i] = True
+                remaining -= cost
+
+        changed = self._changed_locals(frames)
+        kept: Dict[int, set] = {}
+        dropped_locals: Dict[int, Tuple[str, ...]] = {}
+        for i in order:
+            if not included[i]:
+                continue
+            frame_locals = frames[i].locals
+            changed_names = changed[i]
+            changed_set = set(changed_names)
+            names = list(changed_names) + [k for k in frame_locals if k not in changed_set]
+            keep: set = set()
+            dropped: List[str] = []
+            for name in names:
+                cost = estimate(self._local_entry(name, frame_locals[name]))
+                if cost <= remaining:
+                    keep.add(name)
+                    remaining -= cost
+                else:
+                    dropped.append(name)
+            kept[i] = keep
+            if dropped:
+                dropped_locals[i] = tuple(dropped)
+
+        radius = [0] * len(frames)
+        for ring in range(1, self._max_context_lines + 1):
+            for i in order:
+                if not included[i] or radius[i] != ring - 1:
+                    continue
+                lines = index_by_file[frames[i].file]
+                cost = 0
+                for line_no in (focus[i] - ring, focus[i] + ring):
+                    if 1 <= line_no <= len(lines):
+                        cost += estimate(f"{line_no}    : {lines.line(line_no)}\n")
+                if cost <= remaining:
+                    radius[i] = ring
+                    remaining -= cost
+
+        selected: List[Frame] = []
+        context_sizes: List[int] = []
+        selected_dropped: Dict[int, Tuple[str, ...]] = {}
+        dropped_frames: List[Frame] = []
+        trimmed = 0
+        for i, frame in enumerate(frames):
+            if not included[i]:
+                dropped_frames.append(frame)
+                continue
+            if i in dropped_locals:
+                selected_dropped[len(selected)] = dropped_locals[i]
+                keep = kept[i]
+                frame = frame.with_locals(
+                    {k: v for k, v in frame.locals.items() if k in keep}
+                )
+            if radius[i] < self._max_context_lines and len(index_by_file[frame.file]):
+                trimmed += 1
+            selected.append(frame)
+            context_sizes.append(radius[i])
+
+        return BudgetSelection(
+            frames=tuple(selected),
+            context_sizes=tuple(context_sizes),
+            budget=self._budget,
+            tokens_used=self._budget - remaining,
+            dropped_frames=tuple(dropped_frames),
+            dropped_locals=selected_dropped,
+            trimmed_context=trimmed,
+        )
+
+    def _priority_order(self, frames: Sequence[Frame]) -> List[int]:
+        project: List[int] = []
+        tests: List[int] = []
+        for i in range(len(frames) - 1, -1, -1):
+            (tests if self._is_test(frames[i].file) else project).append(i)
+        return project + tests
+
+    @staticmethod
+    def _changed_locals(frames: Sequence[Frame]) -> List[Tuple[str, ...]]:
+        previous: Dict[Tuple[str, str], Mapping[str, Any]] = {}
+        out: List[Tuple[str, ...]] = []
+        for frame in frames:
+            key = (frame.file, frame.func)
+            prev = previous.get(key)
+            if prev is None:
+                out.append(tuple(frame.locals))
+            else:
+                out.append(
+                    tuple(
+                        k for k, v in frame.locals.items()
+                        if prev.get(k, _MISSING) != v
+                    )
+                )
+            previous[key] = frame.locals
+        return out
+
+    @staticmethod
+    def _skeleton(index: int, frame: Frame, lines: SourceIndex, focus: int) -> str:
+        focus_text = (
+            f"{focus} -> : {lines.line(focus)}" if len(lines) else "<source unavailable>"
+        )
+        return (
+            f"Block {index}:\nFile: {frame.file}\nFunction name: {frame.func}\n"
+            f"Line: {frame.line}\nContext:\n{focus_text}\nLocals: {{}}\n\n"
+        )
+
+    @staticmethod
+    def _local_entry(name: str, value: Any) -> str:
+        return (
+            "  "
+            + json.dumps(name, ensure_ascii=False)
+            + ": "
+            + json.dumps(value, ensure_ascii=False, default=str)
+            + ",\n"
+        )
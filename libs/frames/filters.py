@@ -1,37 +1,55 @@
 from __future__ import annotations
 
+import itertools
 import sysconfig
-from typing import Protocol, Sequence, Tuple, runtime_checkable
+from functools import lru_cache
+from typing import Any, Iterator, Protocol, Sequence, Tuple, runtime_checkable
 
 from libs.frames.frame import Frame
 
 
 @runtime_checkable
 class FrameFilter(Protocol):
-    def keep(self, frame: Frame) -> bool: ...
+    def new_state(self) -> Any: ...
 
+    def keep(self, frame: Frame, state: Any) -> bool: ...
+
+
+class _StatelessFrameFilter:
+    __slots__ = ()
+
+    def new_state(self) -> None:
+        return None
+
+
+class FrozenOrSyntheticFrameFilter(_StatelessFrameFilter):
+    __slots__ = ()
 
-class FrozenOrSyntheticFrameFilter:
     SKIP_SUBSTRINGS: Tuple[str, ...] = ("<", "frozen")
 
-    def keep(self, frame: Frame) -> bool:
+    def keep(self, frame: Frame, state: Any = None) -> bool:
         return not any(s in frame.file for s in self.SKIP_SUBSTRINGS)
 
 
-class SitePackagesFrameFilter:
+class SitePackagesFrameFilter(_StatelessFrameFilter):
+    __slots__ = ()
+
     MARKER = "site-packages"
 
-    def keep(self, frame: Frame) -> bool:
+    def keep(self, frame: Frame, state: Any = None) -> bool:
         return self.MARKER not in frame.file
 
 
-class StdlibFrameFilter:
+class StdlibFrameFilter(_StatelessFrameFilter):
+    __slots__ = ("_stdlib_paths",)
+
     def __init__(self, stdlib_paths: Sequence[str] | None = None):
         if stdlib_paths is None:
             stdlib_paths = self._default_stdlib_paths()
         self._stdlib_paths = tuple(p for p in stdlib_paths if p)
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def _default_stdlib_paths() -> Tuple[str, ...]:
         paths = []
         for key in ("stdlib", "platstdlib"):
@@ -40,7 +58,7 @@ class StdlibFrameFilter:
                 paths.append(p)
         return tuple(paths)
 
-    def keep(self, frame: Frame) -> bool:
+    def keep(self, frame: Frame, state: Any = None) -> bool:
         path = frame.file
         if not isinstance(path, str):
             return False
@@ -55,43 +73,52 @@ class StdlibFrameFilter:
         return True
 
 
-class TestbedOnlyFrameFilter:
+class TestbedOnlyFrameFilter(_StatelessFrameFilter):
+    __slots__ = ("_marker",)
+
     def __init__(self, marker: str = "/testbed/"):
         self._marker = marker
 
-    def keep(self, frame: Frame) -> bool:
+    def keep(self, frame: Frame, state: Any = None) -> bool:
         return frame.file.startswith(self._marker) and "site-packages" not in frame.file
 
 
-class ConftestFrameFilter:
-    def keep(self, frame: Frame) -> bool:
+class ConftestFrameFilter(_StatelessFrameFilter):
+    __slots__ = ()
+
+    def keep(self, frame: Frame, state: Any = None) -> bool:
         return not frame.file.endswith("/conftest.py")
 
 
 class DedupFrameFilter:
+    __slots__ = ("_by",)
+
     def __init__(self, by: Tuple[str, ...] = ("file", "func")):
         if not by:
             raise ValueError("DedupFrameFilter requires at least one attribute")
-        self._by = by
-        self._seen: set[tuple] = set()
+        self._by = tuple(by)
 
-    def keep(self, frame: Frame) -> bool:
+    def new_state(self) -> set[tuple]:
+        return set()
+
+    def keep(self, frame: Frame, state: set[tuple]) -> bool:
         key = tuple(getattr(frame, attr) for attr in self._by)
-        if key in self._seen:
+        if key in state:
             return False
-        self._seen.add(key)
+        state.add(key)
         return True
 
 
 class MaxEntriesFrameFilter:
+    __slots__ = ("_max",)
+
     def __init__(self, n: int):
         if n < 0:
             raise ValueError("n must be >= 0")
         self._max = n
-        self._count = 0
 
-    def keep(self, frame: Frame) -> bool:
-        if self._count >= self._max:
-            return False
-        self._count += 1
-        return True
+    def new_state(self) -> Iterator[int]:
+        return itertools.count()
+
+    def keep(self, frame: Frame, state: Iterator[int]) -> bool:
+        return next(state) < self._max
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from libs.frames.frame import Frame
+
+
+_END = object()
+
+
+def _key(frame: Frame) -> Tuple[str, str, int]:
+    return (frame.file, frame.func, frame.line)
+
+
+def _as_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+@dataclass(frozen=True)
+class VariedLocal:
+    name: str
+    minimum: Optional[float]
+    maximum: Optional[float]
+    samples: Tuple[Any, ...]
+
+    def to_json(self) -> dict:
+        out: dict = {"name": self.name, "samples": list(self.samples)}
+        if self.minimum is not None:
+            out["min"] = self.minimum
+            out["max"] = self.maximum
+        return out
+
+
+@dataclass(frozen=True)
+class LoopSummary:
+    file: str
+    func: str
+    lines: Tuple[int, ...]
+    iterations: int
+    first_iteration: Tuple[Frame, ...]
+    last_iteration: Tuple[Frame, ...]
+    varied_locals: Tuple[VariedLocal, ...]
+
+    def to_json(self) -> dict:
+        return {
+            "file": self.file,
+            "func": self.func,
+            "lines": list(self.lines),
+            "iterations": self.iterations,
+            "first_iteration": [f.to_json() for f in self.first_iteration],
+            "last_iteration": [f.to_json() for f in self.last_iteration],
+            "varied_locals": [v.to_json() for v in self.varied_locals],
+        }
+
+
+class _LocalTracker:
+    __slots__ = ("first", "varied", "samples", "minimum", "maximum", "numeric")
+
+    def __init__(self, value: Any):
+        self.first = value
+        self.varied = False
+        self.samples: List[Any] = [value]
+        number = _as_number(value)
+        self.numeric = number is not None
+        self.minimum = number
+        self.maximum = number
+
+    def observe(self, value: Any, max_samples: int) -> None:
+        if value != self.first:
+            self.varied = True
+        if len(self.samples) < max_samples and value not in self.samples:
+            self.samples.append(value)
+        if self.numeric:
+            number = _as_number(value)
+            if number is None:
+                self.numeric = False
+                self.minimum = self.maximum = None
+            else:
+                self.minimum = min(self.minimum, number)
+                self.maximum = max(self.maximum, number)
+
+
+class _Loop:
+    def __init__(self, body: List[Frame], max_samples: int, min_iterations: int):
+        self.keys = [_key(f) for f in body]
+        self.first = tuple(body)
+        self.last = self.first
+        self.current: List[Frame] = []
+        # Completed iterations after the first, kept until the loop qualifies
+        # for a summary; a loop that never does is passed through whole.
+        self.repeats: List[Frame] = []
+        self.iterations = 1
+        self._max_samples = max_samples
+        self._min_iterations = min_iterations
+        self._locals: Dict[str, _LocalTracker] = {}
+        self._observe(self.first)
+
+    def accepts(self, frame: Frame) -> bool:
+        return _key(frame) == self.keys[len(self.current)]
+
+    def add(self, frame: Frame) -> None:
+        self.current.append(frame)
+        if len(self.current) == len(self.keys):
+            self.iterations += 1
+            if self.iterations < self._min_iterations:
+                self.repeats.extend(self.current)
+            else:
+                self.repeats = []
+            self.last = tuple(self.current)
+            self.current = []
+            self._observe(self.last)
+
+    def _observe(self, iteration: Tuple[Frame, ...]) -> None:
+        snapshot: Dict[str, Any] = {}
+        for frame in iteration:
+            snapshot.update(frame.locals)
+        for name, value in snapshot.items():
+            tracker = self._locals.get(name)
+            if tracker is None:
+                self._locals[name] = _LocalTracker(value)
+            else:
+                tracker.observe(value, self._max_samples)
+
+    def summary(self) -> LoopSummary:
+        head = self.first[0]
+        return LoopSummary(
+            file=head.file,
+            func=head.func,
+            lines=tuple(key[2] for key in self.keys),
+            iterations=self.iterations,
+            first_iteration=self.first,
+            last_iteration=self.last,
+            varied_locals=tuple(
+                VariedLocal(
+                    name=name,
+                    minimum=t.minimum if t.numeric else None,
+                    maximum=t.maximum if t.numeric else None,
+                    samples=tuple(t.samples),
+                )
+                for name, t in self._locals.items()
+                if t.varied
+            ),
+        )
+
+
+class StepFrameCompressor:
+    """Collapse repeated line sequences in a step-frame stream.
+
+    Single streaming pass: a loop is detected when a (file, func, line) key
+    recurs within ``max_period`` frames, and is followed for as long as the
+    stream keeps repeating that period. Loops with at least
+    ``min_iterations`` iterations become a LoopSummary; everything else is
+    passed through unchanged and in order.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_period: int = 64,
+        min_iterations: int = 2,
+        max_samples: int = 5,
+    ):
+        if max_period < 1:
+            raise ValueError("max_period must be >= 1")
+        if min_iterations < 2:
+            raise ValueError("min_iterations must be >= 2")
+        if max_samples < 1:
+            raise ValueError("max_samples must be >= 1")
+        self._max_period = max_period
+        self._min_iterations = min_iterations
+        self._max_samples = max_samples
+
+    def compress(self, frames: Iterable[Frame]) -> Iterator[Union[Frame, LoopSummary]]:
+        source = iter(frames)
+        replay: List[Any] = []
+        window: Deque[Frame] = deque()
+        last_seen: Dict[Tuple[str, str, int], int] = {}
+        position = 0
+        loop: Optional[_Loop] = None
+
+        while True:
+            frame = replay.pop() if replay else next(source, _END)
+
+            if loop is not None:
+                if frame is not _END and loop.accepts(frame):
+                    loop.add(frame)
+                    continue
+                if loop.iterations >= self._min_iterations:
+                    yield loop.summary()
+                else:
+                    yield from loop.first
+                    yield from loop.repeats
+                replay.append(frame)
+                replay.extend(reversed(loop.current))
+                loop = None
+                continue
+
+            if frame is _END:
+                yield from window
+                return
+
+            key = _key(frame)
+            seen_at = last_seen.get(key)
+            if seen_at is not None and position - seen_at <= len(window):
+                period = position - seen_at
+                while len(window) > period:
+                    yield window.popleft()
+                loop = _Loop(list(window), self._max_samples, self._min_iterations)
+                loop.add(frame)
+                window.clear()
+                last_seen.clear()
+                continue
+
+            window.append(frame)
+            last_seen[key] = position
+            position += 1
+            if len(window) > self._max_period:
+                yield window.popleft()
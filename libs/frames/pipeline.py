@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Iterable, Sequence
 
 from libs.frames.frame import Frame
@@ -22,26 +23,28 @@ class FramesFilteringPipeline:
         filters: Sequence[FrameFilter],
         serializer: LocalsSerializer,
     ):
-        self._filters = list(filters)
+        self._filters = tuple(filters)
         self._serializer = serializer
 
     @property
     def filters(self) -> Sequence[FrameFilter]:
-        return tuple(self._filters)
+        return self._filters
 
     @property
     def serializer(self) -> LocalsSerializer:
         return self._serializer
 
     def run(self, frames: Iterable[Frame]) -> list[Frame]:
+        bound = tuple((f, f.new_state()) for f in self._filters)
         out: list[Frame] = []
         for frame in frames:
-            if all(f.keep(frame) for f in self._filters):
+            if all(f.keep(frame, state) for f, state in bound):
                 serialized = self._serializer.serialize(frame.locals)
                 out.append(frame.with_locals(serialized))
         return out
 
 
+@lru_cache(maxsize=None)
 def default_traceback_pipeline() -> FramesFilteringPipeline:
     return FramesFilteringPipeline(
         filters=[
@@ -54,6 +57,7 @@ def default_traceback_pipeline() -> FramesFilteringPipeline:
     )
 
 
+@lru_cache(maxsize=None)
 def default_exec_path_pipeline() -> FramesFilteringPipeline:
     return FramesFilteringPipeline(
         filters=[
@@ -66,13 +70,12 @@ def default_exec_path_pipeline() -> FramesFilteringPipeline:
     )
 
 
+@lru_cache(maxsize=None)
 def default_step_frames_pipeline() -> FramesFilteringPipeline:
     return FramesFilteringPipeline(
         filters=[
             TestbedOnlyFrameFilter(),
             ConftestFrameFilter(),
-            DedupFrameFilter(by=("file", "func", "line")),
-            MaxEntriesFrameFilter(n=2000),
         ],
         serializer=LocalsSerializer(cutoff=LocalsSerializer.DEFAULT_CUTOFF),
     )
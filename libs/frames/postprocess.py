@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from libs.frames.filters import FrameFilter
+from libs.frames.frame import Frame
+from libs.frames.pipeline import FramesFilteringPipeline
+from libs.frames.serializer import LocalsSerializer
+
+
+_SECTION_FRAMES = "frames"
+_SECTION_EXEC_PATH = "exec_path"
+_SECTION_STEP_FRAMES = "step_frames"
+
+
+def _parse(raw: Mapping[str, Any], strip_locals: bool) -> Frame:
+    if strip_locals:
+        return Frame.from_json({**raw, "locals": {}})
+    return Frame.from_json(raw)
+
+
+def _emit(frame: Frame, strip_locals: bool) -> Dict[str, Any]:
+    if strip_locals:
+        return {"file": frame.file, "func": frame.func, "line": frame.line}
+    return frame.to_json()
+
+
+def run_section(
+    pipeline: FramesFilteringPipeline,
+    raw_frames: Sequence[Mapping[str, Any]],
+    strip_locals: bool = False,
+) -> List[Dict[str, Any]]:
+    return [
+        _emit(f, strip_locals)
+        for f in pipeline.run(_parse(d, strip_locals) for d in raw_frames)
+    ]
+
+
+def _run_prefix_chunk(
+    filters: Tuple[FrameFilter, ...],
+    serializer: LocalsSerializer,
+    raw_frames: Sequence[Mapping[str, Any]],
+    strip_locals: bool,
+) -> List[Dict[str, Any]]:
+    return run_section(
+        FramesFilteringPipeline(filters, serializer), raw_frames, strip_locals
+    )
+
+
+def _filter_prefix_chunk(
+    filters: Tuple[FrameFilter, ...],
+    raw_frames: Sequence[Mapping[str, Any]],
+    strip_locals: bool,
+) -> List[int]:
+    """Offsets of the frames in ``raw_frames`` that every filter keeps."""
+    bound = tuple((f, f.new_state()) for f in filters)
+    return [
+        offset
+        for offset, raw in enumerate(raw_frames)
+        if all(f.keep(_parse(raw, strip_locals), state) for f, state in bound)
+    ]
+
+
+def _stateless_prefix_length(filters: Sequence[FrameFilter]) -> int:
+    for index, frame_filter in enumerate(filters):
+        if frame_filter.new_state() is not None:
+            return index
+    return len(filters)
+
+
+class _SectionJob:
+    """One trace section processed in chunks on an executor.
+
+    The stateless filter prefix runs per chunk. Without a stateful suffix the
+    chunks also serialize their frames. With one (dedup, entry caps), the
+    chunks only report which frames the prefix keeps; the suffix then runs
+    in order here, and only its survivors are serialized.
+    """
+
+    def __init__(
+        self,
+        pipeline: FramesFilteringPipeline,
+        raw_frames: Sequence[Mapping[str, Any]],
+        strip_locals: bool,
+    ):
+        filters = tuple(pipeline.filters)
+        split = _stateless_prefix_length(filters)
+        self.prefix = filters[:split]
+        self.suffix = filters[split:]
+        self.serializer = pipeline.serializer
+        self.raw_frames = raw_frames
+        self.strip_locals = strip_locals
+        self.futures: List[Tuple[int, Future]] = []
+
+    def submit(self, executor: Executor, chunk_size: int) -> None:
+        for start in range(0, len(self.raw_frames), chunk_size):
+            chunk = list(self.raw_frames[start : start + chunk_size])
+            if self.suffix:
+                future = executor.submit(
+                    _filter_prefix_chunk, self.prefix, chunk, self.strip_locals
+                )
+            else:
+                future = executor.submit(
+                    _run_prefix_chunk,
+                    self.prefix,
+                    self.serializer,
+                    chunk,
+                    self.strip_locals,
+                )
+            self.futures.append((start, future))
+
+    def collect(self, executor: Executor, chunk_size: int) -> List[Dict[str, Any]]:
+        if not self.suffix:
+            return [payload for _, future in self.futures for payload in future.result()]
+
+        bound = tuple((f, f.new_state()) for f in self.suffix)
+        survivors: List[Mapping[str, Any]] = []
+        for start, future in self.futures:
+            for offset in future.result():
+                raw = self.raw_frames[start + offset]
+                frame = _parse(raw, self.strip_locals)
+                if all(f.keep(frame, state) for f, state in bound):
+                    survivors.append(raw)
+        # Every filter has run; the chunks below only serialize.
+        futures = [
+            executor.submit(
+                _run_prefix_chunk,
+                (),
+                self.serializer,
+                survivors[start : start + chunk_size],
+                self.strip_locals,
+            )
+            for start in range(0, len(survivors), chunk_size)
+        ]
+        return [payload for future in futures for payload in future.result()]
+
+
+class TracePostProcessor:
+    DEFAULT_MIN_PARALLEL_FRAMES = 20_000
+    DEFAULT_CHUNK_SIZE = 5_000
+
+    def __init__(
+        self,
+        traceback_pipeline: FramesFilteringPipeline,
+        exec_path_pipeline: FramesFilteringPipeline,
+        step_frames_pipeline: Optional[FramesFilteringPipeline] = None,
+        *,
+        max_workers: Optional[int] = None,
+        min_parallel_frames: int = DEFAULT_MIN_PARALLEL_FRAMES,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        if min_parallel_frames < 0:
+            raise ValueError("min_parallel_frames must be >= 0")
+        self._sections: Tuple[Tuple[str, FramesFilteringPipeline, bool], ...] = tuple(
+            (name, pipeline, strip_locals)
+            for name, pipeline, strip_locals in (
+                (_SECTION_FRAMES, traceback_pipeline, False),
+                (_SECTION_EXEC_PATH, exec_path_pipeline, True),
+                (_SECTION_STEP_FRAMES, step_frames_pipeline, False),
+            )
+            if pipeline is not None
+        )
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._min_parallel_frames = min_parallel_frames
+        self._chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def process(self, traces: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+        if self._should_parallelize(traces):
+            return self._process_parallel(traces)
+        return [self.process_one(trace) for trace in traces]
+
+    def process_one(self, trace: Mapping[str, Any]) -> Dict[str, Any]:
+        out = dict(trace)
+        for name, pipeline, strip_locals in self._sections:
+            out[name] = run_section(
+                pipeline, trace.get(name, []) or [], strip_locals
+            )
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self) -> TracePostProcessor:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _should_parallelize(self, traces: Sequence[Mapping[str, Any]]) -> bool:
+        if self._max_workers <= 1:
+            return False
+        total = 0
+        for trace in traces:
+            for name, _, _ in self._sections:
+                total += len(trace.get(name, []) or [])
+            if total >= self._min_parallel_frames:
+                return True
+        return False
+
+    def _process_parallel(
+        self, traces: Sequence[Mapping[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        executor = self._get_executor()
+        jobs: List[List[Tuple[str, _SectionJob]]] = []
+        for trace in traces:
+            trace_jobs = []
+            for name, pipeline, strip_locals in self._sections:
+                job = _SectionJob(pipeline, trace.get(name, []) or [], strip_locals)
+                job.submit(executor, self._chunk_size)
+                trace_jobs.append((name, job))
+            jobs.append(trace_jobs)
+
+        out: List[Dict[str, Any]] = []
+        for trace, trace_jobs in zip(traces, jobs):
+            processed = dict(trace)
+            for name, job in trace_jobs:
+                processed[name] = job.collect(executor, self._chunk_size)
+            out.append(processed)
+        return out
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
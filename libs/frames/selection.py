@@ -1,11 +1,163 @@
 from __future__ import annotations
 
-from typing import Any, Mapping, Sequence
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from libs.frames.budget import is_test_path
+
+
+_UNITTEST_NODEID = re.compile(r"^\S+ \(([\w.]+?)(?:\.[A-Z]\w*)*(?:\.\w+)?\)$")
+
+DEFAULT_EXCEPTION_WEIGHTS: Mapping[str, float] = {
+    "AttributeError": 1.0,
+    "TypeError": 1.0,
+    "ValueError": 1.0,
+    "KeyError": 1.0,
+    "IndexError": 1.0,
+    "NotImplementedError": 0.8,
+    "AssertionError": 0.6,
+    "RecursionError": 0.4,
+    "TimeoutError": 0.2,
+    "ImportError": 0.1,
+    "ModuleNotFoundError": 0.1,
+}
+
+
+@dataclass(frozen=True)
+class TraceFeatures:
+    project_frames: int
+    exc_type: str
+    distinct_files: int
+    locals_volume: int
+    touches_test_file: bool
+
+
+@dataclass(frozen=True)
+class ScoringWeights:
+    project_frames: float = 2.0
+    exception: float = 1.5
+    distinct_files: float = 1.0
+    locals_volume: float = 0.5
+    test_file_overlap: float = 1.0
+    exception_weights: Mapping[str, float] = field(
+        default_factory=lambda: dict(DEFAULT_EXCEPTION_WEIGHTS)
+    )
+    default_exception_weight: float = 0.7
+
+
+@dataclass(frozen=True)
+class ScoredTrace:
+    index: int
+    score: float
+    features: TraceFeatures
+    signature: Tuple[Any, ...]
+    trace: Mapping[str, Any]
+
+
+def _test_file_hint(nodeid: str) -> Optional[str]:
+    if "::" in nodeid:
+        return nodeid.split("::", 1)[0]
+    match = _UNITTEST_NODEID.match(nodeid)
+    if match:
+        return match.group(1).replace(".", "/") + ".py"
+    return None
+
+
+def _is_project_file(path: str) -> bool:
+    return (
+        "site-packages" not in path
+        and not path.startswith("<")
+        and not is_test_path(path)
+    )
+
+
+def stack_signature(trace: Mapping[str, Any]) -> Tuple[Any, ...]:
+    frames = trace.get("frames", []) or []
+    return (str(trace.get("exc_type", "")),) + tuple(
+        (f.get("file"), f.get("func"))
+        for f in frames
+        if isinstance(f, Mapping)
+    )
+
+
+class TraceScorer:
+    def __init__(self, weights: Optional[ScoringWeights] = None):
+        self._weights = weights or ScoringWeights()
+
+    def features(self, trace: Mapping[str, Any]) -> TraceFeatures:
+        test_hint = _test_file_hint(str(trace.get("nodeid", "")))
+        files: set = set()
+        project = 0
+        locals_volume = 0
+        touches_test = False
+        for section in ("frames", "exec_path"):
+            for raw in trace.get(section, []) or []:
+                if not isinstance(raw, Mapping):
+                    continue
+                path = str(raw.get("file", ""))
+                files.add(path)
+                if _is_project_file(path):
+                    project += 1
+                if test_hint and not touches_test and path.endswith(test_hint):
+                    touches_test = True
+                if section == "frames":
+                    frame_locals = raw.get("locals")
+                    if isinstance(frame_locals, Mapping):
+                        for value in frame_locals.values():
+                            locals_volume += len(value) if isinstance(value, str) else 1
+        return TraceFeatures(
+            project_frames=project,
+            exc_type=str(trace.get("exc_type", "")),
+            distinct_files=len(files),
+            locals_volume=locals_volume,
+            touches_test_file=touches_test,
+        )
+
+    def score(self, features: TraceFeatures) -> float:
+        w = self._weights
+        exc_weight = w.exception_weights.get(
+            features.exc_type, w.default_exception_weight
+        )
+        return (
+            w.project_frames * math.log1p(features.project_frames)
+            + w.exception * exc_weight
+            + w.distinct_files * math.log1p(features.distinct_files)
+            + w.locals_volume * math.log1p(features.locals_volume) / math.log(10)
+            + w.test_file_overlap * (1.0 if features.touches_test_file else 0.0)
+        )
+
+    def rank(
+        self, traces: Sequence[Mapping[str, Any]], *, dedupe: bool = True
+    ) -> List[ScoredTrace]:
+        best: Dict[Tuple[Any, ...], ScoredTrace] = {}
+        scored: List[ScoredTrace] = []
+        for index, trace in enumerate(traces):
+            features = self.features(trace)
+            item = ScoredTrace(
+                index=index,
+                score=self.score(features),
+                features=features,
+                signature=stack_signature(trace),
+                trace=trace,
+            )
+            if not dedupe:
+                scored.append(item)
+                continue
+            current = best.get(item.signature)
+            if current is None or item.score > current.score:
+                best[item.signature] = item
+        if dedupe:
+            scored = list(best.values())
+        scored.sort(key=lambda s: (-s.score, s.index))
+        return scored
 
 
 def select_most_informative_trace(
     traces: Sequence[Mapping[str, Any]],
+    scorer: Optional[TraceScorer] = None,
 ) -> Mapping[str, Any]:
     if not traces:
         raise ValueError("Cannot select a trace from an empty sequence")
-    return traces[0]
+    return (scorer or TraceScorer()).rank(traces)[0].trace
@@ -1,33 +1,46 @@
 from __future__ import annotations
 
 import json
-import textwrap
-from typing import Any, Iterable, Mapping, Optional
+from typing import Any, Iterable, Mapping, Optional, Sequence, Union
 
+from libs.frames.budget import BudgetSelection
 from libs.frames.frame import Frame
-
-try:
-    import jsonpickle as _jsonpickle
-    _HAS_JSONPICKLE = True
-except ImportError:
-    _jsonpickle = None
-    _HAS_JSONPICKLE = False
+from libs.frames.loops import LoopSummary
+from libs.frames.source_index import SourceIndex
+from libs.tracing.renderers import (
+    UNSERIALIZABLE,
+    ValueRendererRegistry,
+    default_registry,
+)
 
 
 class LocalsSerializer:
     DEFAULT_CUTOFF = 1000
-    UNSERIALIZABLE = "<unserializable>"
+    UNSERIALIZABLE = UNSERIALIZABLE
 
-    def __init__(self, cutoff: int = DEFAULT_CUTOFF, prefer_jsonpickle: bool = True):
+    def __init__(
+        self,
+        cutoff: int = DEFAULT_CUTOFF,
+        prefer_jsonpickle: bool = True,
+        registry: Optional[ValueRendererRegistry] = None,
+    ):
         if cutoff < 0:
             raise ValueError("cutoff must be >= 0")
         self._cutoff = cutoff
-        self._use_jsonpickle = prefer_jsonpickle and _HAS_JSONPICKLE
+        if registry is None:
+            registry = default_registry()
+            if not prefer_jsonpickle:
+                registry = registry.copy(use_jsonpickle=False)
+        self._registry = registry
 
     @property
     def cutoff(self) -> int:
         return self._cutoff
 
+    @property
+    def registry(self) -> ValueRendererRegistry:
+        return self._registry
+
     def serialize(self, locals_mapping: Mapping[str, Any]) -> dict[str, str]:
         out: dict[str, str] = {}
         for key, value in locals_mapping.items():
@@ -35,14 +48,9 @@ class LocalsSerializer:
         return out
 
     def _serialize_value(self, value: Any) -> str:
-        try:
-            if self._use_jsonpickle:
-                serialized = str(_jsonpickle.dumps(value, unpicklable=False))
-            else:
-                serialized = repr(value)
-        except Exception:
-            return self.UNSERIALIZABLE
-        return serialized[: self._cutoff]
+        if type(value) is str:
+            return value[: self._cutoff]
+        return self._registry.render(value, self._cutoff)
 
 
 class FrameSerializer:
@@ -56,30 +64,91 @@ class FrameSerializer:
         self._context_size = context_size
         self._locals_serializer = locals_serializer
 
-    def to_string(self, frame: Frame, index: int = 0) -> str:
-        from libs.harness.io_utils import render_source_context
-
+    def to_string(
+        self,
+        frame: Frame,
+        index: Union[int, str] = 0,
+        context_size: Optional[int] = None,
+    ) -> str:
         filename = frame.file
         function_name = frame.func
         line_number = frame.line if isinstance(frame.line, int) else 1
         source = self._source_map.get(filename, "")
-        context = render_source_context(source, line_number, self._context_size)
+        if context_size is None:
+            context_size = self._context_size
+        context = (
+            SourceIndex.for_source(source).render_context(line_number, context_size)
+            if source
+            else "<source unavailable>"
+        )
         locals_text = self._render_locals(frame.locals)
-        return textwrap.dedent(
-            f"""\
-            Block {index}:
-            File: {filename}
-            Function name: {function_name}
-            Line: {line_number}
-            Context:
-            {context}
-            Locals: {locals_text}
-            """
+        return "\n".join(
+            (
+                f"Block {index}:",
+                f"File: {filename}",
+                f"Function name: {function_name}",
+                f"Line: {line_number}",
+                "Context:",
+                context,
+                f"Locals: {locals_text}",
+            )
         ).strip()
 
-    def to_string_many(self, frames: Iterable[Frame]) -> str:
+    def to_string_many(
+        self,
+        frames: Iterable[Frame],
+        context_sizes: Optional[Sequence[int]] = None,
+    ) -> str:
+        if context_sizes is None:
+            return "\n\n".join(
+                self.to_string(frame, index) for index, frame in enumerate(frames)
+            )
+        return "\n\n".join(
+            self.to_string(frame, index, size)
+            for index, (frame, size) in enumerate(zip(frames, context_sizes))
+        )
+
+    def to_string_selection(self, selection: BudgetSelection) -> str:
+        return self.to_string_many(selection.frames, selection.context_sizes)
+
+    def to_string_compressed(
+        self, items: Iterable[Union[Frame, LoopSummary]]
+    ) -> str:
+        return "\n\n".join(
+            self.loop_to_string(item, index)
+            if isinstance(item, LoopSummary)
+            else self.to_string(item, index)
+            for index, item in enumerate(items)
+        )
+
+    def loop_to_string(self, loop: LoopSummary, index: int = 0) -> str:
+        varied = [
+            f"  {v.name}: "
+            + (f"min={v.minimum:g} max={v.maximum:g} " if v.minimum is not None else "")
+            + "samples="
+            + json.dumps(list(v.samples), ensure_ascii=False, default=str)
+            for v in loop.varied_locals
+        ]
+        parts = [
+            f"Loop {index}:",
+            f"File: {loop.file}",
+            f"Function name: {loop.func}",
+            "Lines: " + " -> ".join(str(line) for line in loop.lines),
+            f"Iterations: {loop.iterations}",
+            "Varying locals:" + ("\n" + "\n".join(varied) if varied else " <none>"),
+            "First iteration:",
+            self._iteration_to_string(loop.first_iteration, index, "first"),
+            "Last iteration:",
+            self._iteration_to_string(loop.last_iteration, index, "last"),
+        ]
+        return "\n".join(parts)
+
+    def _iteration_to_string(
+        self, frames: Sequence[Frame], index: int, label: str
+    ) -> str:
         return "\n\n".join(
-            self.to_string(frame, index) for index, frame in enumerate(frames)
+            self.to_string(frame, f"{index}.{label}.{n}")
+            for n, frame in enumerate(frames)
         )
 
     def _render_locals(self, locals_payload: Any) -> str:
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from typing import List
+
+# Same boundaries as str.splitlines().
+_LINE_BREAK = re.compile("\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+class SourceIndex:
+    DEFAULT_CACHE_SIZE = 256
+
+    _cache: "OrderedDict[tuple, SourceIndex]" = OrderedDict()
+    _cache_size = DEFAULT_CACHE_SIZE
+    _cache_lock = threading.Lock()
+
+    __slots__ = ("_source", "_starts", "_ends")
+
+    def __init__(self, source: str):
+        starts = array("q", [0])
+        ends = array("q")
+        for match in _LINE_BREAK.finditer(source):
+            ends.append(match.start())
+            starts.append(match.end())
+        if starts[-1] == len(source):
+            starts.pop()
+        else:
+            ends.append(len(source))
+        self._source = source
+        self._starts = starts
+        self._ends = ends
+
+    @classmethod
+    def for_source(cls, source: str) -> SourceIndex:
+        key = (len(source), hash(source))
+        with cls._cache_lock:
+            index = cls._cache.get(key)
+            if index is not None and (
+                index._source is source or index._source == source
+            ):
+                cls._cache.move_to_end(key)
+                return index
+        index = cls(source)
+        with cls._cache_lock:
+            cls._cache[key] = index
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > cls._cache_size:
+                cls._cache.popitem(last=False)
+        return index
+
+    @classmethod
+    def set_cache_size(cls, size: int) -> None:
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        with cls._cache_lock:
+            cls._cache_size = size
+            while len(cls._cache) > size:
+                cls._cache.popitem(last=False)
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._cache_lock:
+            cls._cache.clear()
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def line(self, line_number: int) -> str:
+        if not 1 <= line_number <= len(self._starts):
+            raise IndexError(f"line {line_number} out of range")
+        i = line_number - 1
+        return self._source[self._starts[i] : self._ends[i]]
+
+    def lines(self, start_line: int, end_line: int) -> List[str]:
+        start = max(start_line, 1)
+        end = min(end_line, len(self._starts))
+        return [self.line(n) for n in range(start, end + 1)]
+
+    def render_numbered(self, start_line: int, end_line: int) -> str:
+        if start_line < 1:
+            start_line = 1
+        if end_line < start_line:
+            end_line = start_line
+        return "\n".join(
+            f"{line_no}: {text}"
+            for line_no, text in enumerate(
+                self.lines(start_line, end_line), start=start_line
+            )
+        )
+
+    def render_context(self, line_number: int, context_size: int) -> str:
+        total = len(self._starts)
+        if not total:
+            return "<source unavailable>"
+        line_number = min(max(line_number, 1), total)
+        start = max(1, line_number - context_size)
+        end = min(total, line_number + context_size)
+        return "\n".join(
+            f"{current} {'->' if current == line_number else '  '} : {text}"
+            for current, text in enumerate(self.lines(start, end), start=start)
+        )
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    runtime_checkable,
+)
+
+from libs.frames.frame import Frame
+from libs.tracing import json_codec
+from libs.tracing._step_sidecar import STEP_FRAMES_REF
+
+
+def _parse(raw_frames: Any) -> Tuple[Frame, ...]:
+    if not isinstance(raw_frames, list):
+        return ()
+    return tuple(
+        f for f in (Frame.from_raw(d) for d in raw_frames) if f is not None
+    )
+
+
+@runtime_checkable
+class StepFrames(Protocol):
+    def __len__(self) -> int: ...
+
+    def functions(self) -> Tuple[str, ...]: ...
+
+    def for_function(self, func: str) -> Tuple[Frame, ...]: ...
+
+
+class InlineStepFrames:
+    """Step frames that were shipped inside the trace JSON (legacy layout)."""
+
+    def __init__(self, raw_frames: Optional[Sequence[Any]] = None):
+        self._raw = list(raw_frames or ())
+        self._by_func: Optional[Dict[str, Tuple[Frame, ...]]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def functions(self) -> Tuple[str, ...]:
+        return tuple(self._groups())
+
+    def for_function(self, func: str) -> Tuple[Frame, ...]:
+        return self._groups().get(func, ())
+
+    def _groups(self) -> Dict[str, Tuple[Frame, ...]]:
+        with self._lock:
+            if self._by_func is None:
+                groups: Dict[str, List[Frame]] = {}
+                for frame in _parse(self._raw):
+                    groups.setdefault(frame.func, []).append(frame)
+                self._by_func = {k: tuple(v) for k, v in groups.items()}
+            return self._by_func
+
+
+class SidecarStepFrames:
+    """Step frames stored in a per-trace sidecar written by the tracers.
+
+    Only the per-function offset index is held in memory; a function's frames
+    are read (one seek, one JSON array) the first time they are asked for and
+    cached from then on.
+    """
+
+    def __init__(self, path: Path, index: Mapping[str, Sequence[int]], count: int):
+        self._path = Path(path)
+        self._index = {str(k): tuple(v) for k, v in index.items()}
+        self._count = count
+        self._loaded: Dict[str, Tuple[Frame, ...]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def __len__(self) -> int:
+        return self._count
+
+    def functions(self) -> Tuple[str, ...]:
+        return tuple(self._index)
+
+    def for_function(self, func: str) -> Tuple[Frame, ...]:
+        entry = self._index.get(func)
+        if entry is None:
+            return ()
+        with self._lock:
+            frames = self._loaded.get(func)
+            if frames is None:
+                offset, length = entry[0], entry[1]
+                with open(self._path, "rb") as f:
+                    f.seek(offset)
+                    frames = _parse(json_codec.loads(f.read(length)))
+                self._loaded[func] = frames
+            return frames
+
+
+def resolve_step_frames_ref(trace: Dict[str, Any], trace_path: Path) -> None:
+    """Rewrite a trace's sidecar path, relative to its trace JSON, to a host path."""
+    ref = trace.get(STEP_FRAMES_REF)
+    if isinstance(ref, Mapping) and ref.get("path"):
+        trace[STEP_FRAMES_REF] = {
+            **ref,
+            "path": str(Path(trace_path).parent / str(ref["path"])),
+        }
+
+
+def step_frames_for(trace: Mapping[str, Any]) -> StepFrames:
+    ref = trace.get(STEP_FRAMES_REF)
+    if isinstance(ref, Mapping) and ref.get("path"):
+        path = Path(str(ref["path"]))
+        index = ref.get("index")
+        if path.is_file() and isinstance(index, Mapping):
+            return SidecarStepFrames(path, index, int(ref.get("count", 0) or 0))
+    return InlineStepFrames(trace.get("step_frames"))
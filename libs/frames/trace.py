@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from functools import cached_property
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional, Tuple
+
+from libs.frames.frame import Frame
+from libs.frames.step_frames import StepFrames, step_frames_for
+
+
+def _parse(raw_frames: Optional[Iterable[Any]]) -> Tuple[Frame, ...]:
+    return tuple(
+        f for f in (Frame.from_raw(d) for d in raw_frames or ()) if f is not None
+    )
+
+
+class ParsedTrace:
+    """A raw trace dict plus lazily parsed, cached Frame tuples.
+
+    Build one per trace and pass it around instead of the dict: each section
+    is parsed on first access only, so stages that never look at step frames
+    never pay for them. Step frames may live in a sidecar file and are then
+    read per function on demand.
+    """
+
+    def __init__(self, raw: Optional[Mapping[str, Any]] = None):
+        self._raw: Mapping[str, Any] = MappingProxyType(dict(raw or {}))
+
+    @property
+    def raw(self) -> Mapping[str, Any]:
+        return self._raw
+
+    @property
+    def nodeid(self) -> str:
+        return str(self._raw.get("nodeid", ""))
+
+    @property
+    def exc_type(self) -> str:
+        return str(self._raw.get("exc_type", ""))
+
+    @property
+    def message(self) -> str:
+        return str(self._raw.get("message", ""))
+
+    @cached_property
+    def frames(self) -> Tuple[Frame, ...]:
+        return _parse(self._raw.get("frames"))
+
+    @cached_property
+    def exec_path(self) -> Tuple[Frame, ...]:
+        return _parse(self._raw.get("exec_path"))
+
+    @cached_property
+    def step_frames(self) -> StepFrames:
+        return step_frames_for(self._raw)
+
+    def __bool__(self) -> bool:
+        return bool(self._raw)
+
+    def __repr__(self) -> str:
+        return f"ParsedTrace(nodeid={self.nodeid!r}, exc_type={self.exc_type!r})"
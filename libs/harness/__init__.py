@@ -10,35 +10,66 @@ except ModuleNotFoundError:
     sys.path.insert(0, require_env("SWE_BENCH_PATH"))
     import swebench  # noqa: F401
 
+from libs.harness.checkpoint import InstanceCheckpoint
+from libs.harness.concurrency import ConcurrencyLimits
 from libs.harness.framework_detector import Framework, FrameworkDetector
+from libs.harness.image_planner import BuildOutcome, ImageBuildPlanner
+from libs.harness.outcome import Outcome, OutcomeParser, Status, parse_test_output
+from libs.harness.patch_check import PatchChecker, PatchRejectedError
+from libs.harness.project_mirror import ProjectMirrorCache
+from libs.harness.resource_monitor import ResourceSampler, ResourceUsage
+from libs.harness.result_cache import RunResultCache
+from libs.harness.runtime_history import PhaseTimer, RuntimeHistory
+from libs.harness.snapshots import Snapshot, SnapshotPlan, SnapshotStore
+from libs.harness.source_reader import SourceReader
 from libs.harness.trace_output import TraceOutputManager
 from libs.harness.traced_runner import (
     RunResult,
+    TestTimeoutError,
     TraceCollectionError,
     TracedInstanceRunner,
+    trace_post_processor,
 )
 from libs.harness.instance_comparison import (
     ComparisonConfig,
     ComparisonReport,
     InstanceComparison,
-    Outcome,
-    Status,
     Variant,
     VariantResult,
     Verdict,
 )
 
 __all__ = [
+    "ConcurrencyLimits",
+    "InstanceCheckpoint",
     "Framework",
     "FrameworkDetector",
+    "BuildOutcome",
+    "ImageBuildPlanner",
+    "PatchChecker",
+    "PatchRejectedError",
+    "ProjectMirrorCache",
+    "ResourceSampler",
+    "ResourceUsage",
+    "RunResultCache",
+    "PhaseTimer",
+    "RuntimeHistory",
+    "Snapshot",
+    "SnapshotPlan",
+    "SnapshotStore",
+    "SourceReader",
     "TraceOutputManager",
     "RunResult",
+    "TestTimeoutError",
     "TraceCollectionError",
     "TracedInstanceRunner",
+    "trace_post_processor",
     "ComparisonConfig",
     "ComparisonReport",
     "InstanceComparison",
     "Outcome",
+    "OutcomeParser",
+    "parse_test_output",
     "Status",
     "Variant",
     "VariantResult",
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from libs.harness.json_store import read_json_dict, write_json_atomic
+
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+PHASE_BASELINE = "baseline"
+PHASE_REPORT = "report"
+
+
+def patch_phase(variant: str) -> str:
+    return f"{variant}.patch"
+
+
+def run_phase(variant: str) -> str:
+    return f"{variant}.run"
+
+
+class InstanceCheckpoint:
+    """Completion markers for the phases of one instance's comparison.
+
+    Each finished phase stores the payload needed to skip it next time
+    (run results, artifact paths) in ``checkpoint.json`` next to the
+    instance's artifacts. The file is rewritten atomically after every
+    phase, so an interrupted run leaves either the previous or the new
+    state behind, never a torn file. The ``report`` phase marks the
+    instance as complete.
+    """
+
+    def __init__(self, directory: Path, *, pretty: bool = False):
+        self._path = Path(directory) / CHECKPOINT_FILE
+        self._pretty = pretty
+        self._state = read_json_dict(self._path)
+        phases = self._state.get("phases")
+        self._phases: Dict[str, Any] = phases if isinstance(phases, dict) else {}
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def is_complete(self) -> bool:
+        return PHASE_REPORT in self._phases
+
+    def get(self, phase: str) -> Optional[Dict[str, Any]]:
+        entry = self._phases.get(phase)
+        if not isinstance(entry, dict):
+            return None
+        payload = entry.get("payload")
+        return payload if isinstance(payload, dict) else {}
+
+    def mark(self, phase: str, payload: Optional[Dict[str, Any]] = None) -> None:
+        self._phases[phase] = {
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+            "payload": payload or {},
+        }
+        self._save()
+
+    def _save(self) -> None:
+        self._state["phases"] = self._phases
+        write_json_atomic(self._path, self._state, pretty=self._pretty)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class ConcurrencyLimits:
+    """Process-wide caps on the expensive resources a worker can hold.
+
+    One instance is shared by every worker thread of a run. Containers,
+    image builds and LLM calls are limited independently, so e.g. 16
+    workers can interleave LLM round-trips while only 8 containers and 2
+    image builds run at any one time. ``None`` means unlimited.
+    """
+
+    def __init__(
+        self,
+        *,
+        containers: Optional[int] = None,
+        builds: Optional[int] = None,
+        llm: Optional[int] = None,
+    ):
+        for name, value in (("containers", containers), ("builds", builds), ("llm", llm)):
+            if value is not None and value < 1:
+                raise ValueError(f"{name} limit must be >= 1")
+        self._limits = {"containers": containers, "builds": builds, "llm": llm}
+        self._containers = self._semaphore(containers)
+        self._builds = self._semaphore(builds)
+        self._llm = self._semaphore(llm)
+
+    @classmethod
+    def unlimited(cls) -> ConcurrencyLimits:
+        return cls()
+
+    @staticmethod
+    def _semaphore(value: Optional[int]) -> Optional[threading.BoundedSemaphore]:
+        return threading.BoundedSemaphore(value) if value is not None else None
+
+    @staticmethod
+    @contextmanager
+    def _hold(semaphore: Optional[threading.BoundedSemaphore]) -> Iterator[None]:
+        if semaphore is None:
+            yield
+            return
+        with semaphore:
+            yield
+
+    def container(self):
+        return self._hold(self._containers)
+
+    def build(self):
+        return self._hold(self._builds)
+
+    def llm(self):
+        return self._hold(self._llm)
+
+    @property
+    def containers_limit(self) -> Optional[int]:
+        return self._limits["containers"]
+
+    @property
+    def builds_limit(self) -> Optional[int]:
+        return self._limits["builds"]
+
+    @property
+    def llm_limit(self) -> Optional[int]:
+        return self._limits["llm"]
+
+    def __repr__(self) -> str:
+        return (
+            f"ConcurrencyLimits(containers={self.containers_limit}, "
+            f"builds={self.builds_limit}, llm={self.llm_limit})"
+        )
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional
+
+import docker
+
+from swebench.harness.constants import DOCKER_PATCH, DOCKER_USER, DOCKER_WORKDIR
+from swebench.harness.docker_utils import cleanup_container
+from swebench.harness.test_spec.test_spec import TestSpec
+
+
+TRACE_OUTPUT_MOUNT = "/trace_output"
+
+# No -x: ignored files include build artefacts (compiled extensions,
+# *.egg-info, generated version files) that the image's install step left in
+# the work tree, and removing them would break the environment.
+_RESET_SCRIPT = (
+    f"git -C {DOCKER_WORKDIR} reset --hard -q"
+    f" && git -C {DOCKER_WORKDIR} clean -fdq"
+    f" && rm -f /eval.sh {DOCKER_PATCH}"
+    f" && find {TRACE_OUTPUT_MOUNT} -mindepth 1 -delete"
+)
+
+
+class ContainerPoolError(Exception):
+    pass
+
+
+def _move_contents(src: Path, dst: Path) -> None:
+    dst.mkdir(parents=True, exist_ok=True)
+    for entry in src.iterdir():
+        target = dst / entry.name
+        if target.is_dir() and not target.is_symlink():
+            shutil.rmtree(target)
+        elif target.exists() or target.is_symlink():
+            target.unlink()
+        shutil.move(str(entry), str(target))
+
+
+class PooledContainer:
+    def __init__(self, container, image: str, scratch_dir: Path):
+        self.container = container
+        self.image = image
+        self.scratch_dir = scratch_dir
+        self.uses = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def trace_dir(self) -> Path:
+        return self.scratch_dir / "trace_output"
+
+    def collect_outputs(self, instance_dir: Path) -> None:
+        """Move what the run left in the scratch mount into the variant's dir."""
+        _move_contents(self.trace_dir, instance_dir)
+
+
+class ContainerPool:
+    """Warm, per-image containers shared by the runs of one instance.
+
+    ``acquire`` hands out an idle container for the spec's image or starts a
+    new one; on release the work tree is reset with git and the scratch
+    mount is emptied, so the next variant sees a pristine checkout. Each
+    container bind-mounts its own scratch directory for /trace_output;
+    runners move the results into their variant's output dir with
+    ``PooledContainer.collect_outputs``. At most ``max_size``
+    containers exist at once (the least recently used idle one is evicted to
+    make room), and idle containers are removed after ``idle_timeout``
+    seconds.
+    """
+
+    DEFAULT_MAX_SIZE = 4
+    DEFAULT_IDLE_TIMEOUT = 300.0
+
+    def __init__(
+        self,
+        client: docker.DockerClient,
+        *,
+        run_id: str,
+        scratch_root: Path,
+        tracer_dir: Path,
+        environment: Mapping[str, str],
+        logger: logging.Logger,
+        max_size: int = DEFAULT_MAX_SIZE,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        if idle_timeout <= 0:
+            raise ValueError("idle_timeout must be > 0")
+        self._client = client
+        self._run_id = run_id
+        self._scratch_root = Path(scratch_root).resolve()
+        self._tracer_dir = Path(tracer_dir).resolve()
+        self._environment = dict(environment)
+        self._logger = logger
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._idle: Dict[str, List[PooledContainer]] = {}
+        self._size = 0
+        self._closed = False
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def acquire(
+        self, spec: TestSpec, *, image: Optional[str] = None
+    ) -> Iterator[PooledContainer]:
+        """Hold a container of ``image`` (the spec's instance image by default)."""
+        pooled = self._checkout(spec, image or spec.instance_image_key)
+        try:
+            yield pooled
+        finally:
+            self._release(pooled)
+
+    def evict_idle(self) -> None:
+        with self._cond:
+            expired = self._pop_expired_locked(time.monotonic())
+        for pooled in expired:
+            self._destroy(pooled)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle = [p for group in self._idle.values() for p in group]
+            self._idle.clear()
+        for pooled in idle:
+            self._destroy(pooled)
+
+    def __enter__(self) -> ContainerPool:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _checkout(self, spec: TestSpec, image: str) -> PooledContainer:
+        while True:
+            reused: Optional[PooledContainer] = None
+            evicted: Optional[PooledContainer] = None
+            create = False
+            with self._cond:
+                if self._closed:
+                    raise ContainerPoolError("Container pool is closed")
+                stale = self._pop_expired_locked(time.monotonic())
+                group = self._idle.get(image)
+                if group:
+                    reused = group.pop()
+                    if not group:
+                        del self._idle[image]
+                elif self._size < self._max_size:
+                    self._size += 1
+                    create = True
+                else:
+                    # The evicted container's slot goes straight to the new one.
+                    evicted = self._pop_lru_locked()
+                    create = evicted is not None
+                    if not create and not stale:
+                        self._cond.wait()
+            for pooled in stale:
+                self._destroy(pooled)
+            if evicted is not None:
+                self._destroy(evicted, release_slot=False)
+            if reused is not None:
+                return reused
+            if create:
+                try:
+                    return self._create(spec, image)
+                except BaseException:
+                    self._free_slot()
+                    raise
+
+    def _release(self, pooled: PooledContainer) -> None:
+        pooled.uses += 1
+        if not self._closed and self._reset(pooled):
+            pooled.last_used = time.monotonic()
+            with self._cond:
+                if not self._closed:
+                    self._idle.setdefault(pooled.image, []).append(pooled)
+                    self._cond.notify()
+                    return
+        self._destroy(pooled)
+
+    def _create(self, spec: TestSpec, image: str) -> PooledContainer:
+        scratch_dir = self._scratch_root / uuid.uuid4().hex
+        trace_dir = scratch_dir / "trace_output"
+        trace_dir.mkdir(parents=True, exist_ok=True)
+        trace_dir.chmod(0o777)
+        run_args = spec.docker_specs.get("run_args", {})
+        container = self._client.containers.create(
+            image=image,
+            name=spec.get_instance_container_name(
+                f"{self._run_id}_pool{next(self._counter)}"
+            ),
+            user=DOCKER_USER,
+            detach=True,
+            command="tail -f /dev/null",
+            platform=spec.platform,
+            cap_add=run_args.get("cap_add", []),
+            volumes={
+                str(self._tracer_dir): {"bind": "/opt/tracers", "mode": "ro"},
+                str(trace_dir): {"bind": TRACE_OUTPUT_MOUNT, "mode": "rw"},
+            },
+            environment=self._environment,
+        )
+        try:
+            container.start()
+        except BaseException:
+            cleanup_container(self._client, container, self._logger)
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+            raise
+        self._logger.info(
+            "Pooled container started for %s: %s", image, container.id
+        )
+        return PooledContainer(container, image, scratch_dir)
+
+    def _reset(self, pooled: PooledContainer) -> bool:
+        try:
+            result = pooled.container.exec_run(
+                ["/bin/sh", "-c", _RESET_SCRIPT], user="root"
+            )
+        except Exception as exc:
+            self._logger.warning("Resetting pooled container failed: %s", exc)
+            return False
+        if result.exit_code != 0:
+            output = result.output.decode("utf-8", errors="replace") if result.output else ""
+            self._logger.warning(
+                "Resetting pooled container failed (%d): %s", result.exit_code, output
+            )
+            return False
+        return True
+
+    def _destroy(self, pooled: PooledContainer, *, release_slot: bool = True) -> None:
+        self._logger.info("Removing pooled container %s", pooled.container.id)
+        try:
+            cleanup_container(self._client, pooled.container, self._logger)
+        finally:
+            shutil.rmtree(pooled.scratch_dir, ignore_errors=True)
+            if release_slot:
+                self._free_slot()
+
+    def _free_slot(self) -> None:
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _pop_expired_locked(self, now: float) -> List[PooledContainer]:
+        expired: List[PooledContainer] = []
+        for image in list(self._idle):
+            keep = []
+            for pooled in self._idle[image]:
+                if now - pooled.last_used > self._idle_timeout:
+                    expired.append(pooled)
+                else:
+                    keep.append(pooled)
+            if keep:
+                self._idle[image] = keep
+            else:
+                del self._idle[image]
+        return expired
+
+    def _pop_lru_locked(self) -> Optional[PooledContainer]:
+        oldest: Optional[PooledContainer] = None
+        for group in self._idle.values():
+            for pooled in group:
+                if oldest is None or pooled.last_used < oldest.last_used:
+                    oldest = pooled
+        if oldest is not None:
+            group = self._idle[oldest.image]
+            group.remove(oldest)
+            if not group:
+                del self._idle[oldest.image]
+        return oldest
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import codecs
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from swebench.harness.constants import UTF8
+
+
+# How long output may keep draining after a timed-out command is killed.
+_DRAIN_SECONDS = 5.0
+
+
+def stream_exec_with_timeout(
+    container,
+    cmd: str,
+    *,
+    on_output: Callable[[str], None],
+    timeout: Optional[int],
+    environment: Optional[Dict[str, str]] = None,
+    kill: Optional[Callable[[], None]] = None,
+) -> Tuple[bool, float]:
+    """Run ``cmd`` in ``container``, handing decoded output to ``on_output``.
+
+    Streaming counterpart of swebench's ``exec_run_with_timeout``: chunks
+    are decoded incrementally (stray non-UTF-8 bytes are replaced) and
+    passed on as they arrive instead of being joined into one string.
+    ``on_output`` runs on a reader thread and is never called after this
+    function returns. On timeout ``kill`` stops the command (by default
+    the exec's own process is sent SIGTERM). Returns ``(timed_out, runtime)``.
+    """
+    api = container.client.api
+    decoder = codecs.getincrementaldecoder(UTF8)(errors="replace")
+    lock = threading.Lock()
+    closed = False
+    exec_id: Optional[str] = None
+    error: Optional[BaseException] = None
+
+    def emit(text: str) -> None:
+        if not text:
+            return
+        with lock:
+            if not closed:
+                on_output(text)
+
+    def pump() -> None:
+        nonlocal exec_id, error
+        try:
+            exec_id = api.exec_create(container.id, cmd, environment=environment)["Id"]
+            for chunk in api.exec_start(exec_id, stream=True):
+                emit(decoder.decode(chunk))
+            emit(decoder.decode(b"", final=True))
+        except Exception as exc:
+            error = exc
+
+    reader = threading.Thread(target=pump, name="exec-stream", daemon=True)
+    start = time.monotonic()
+    reader.start()
+    reader.join(timeout)
+    timed_out = reader.is_alive()
+    if timed_out:
+        if kill is not None:
+            kill()
+        elif exec_id is not None:
+            pid = api.exec_inspect(exec_id)["Pid"]
+            container.exec_run(f"kill -TERM {pid}", detach=True)
+        reader.join(_DRAIN_SECONDS)
+    runtime = time.monotonic() - start
+    with lock:
+        closed = True
+    if error is not None and not timed_out:
+        raise error
+    return timed_out, runtime
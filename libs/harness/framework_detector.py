@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-import json
+import atexit
+import threading
 from dataclasses import replace
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
+
+from libs.harness.json_store import file_lock, read_json_dict, write_json_atomic
 
 
 class Framework(str, Enum):
@@ -19,40 +22,145 @@ _DJANGO_INDICATORS = ("manage.py test", "runtests.py")
 _UNITTEST_INDICATORS = ("python -m unittest", "unittest")
 
 
-class FrameworkDetector:
-    def __init__(self, *, cache_path: Optional[Path] = None):
-        self._cache_path = Path(cache_path) if cache_path is not None else None
-        self._cache: Dict[str, str] = self._load_cache()
-
-    def _load_cache(self) -> Dict[str, str]:
-        if self._cache_path is None or not self._cache_path.exists():
-            return {}
+class FrameworkCacheStore:
+    """``instance_id -> framework`` map persisted as JSON.
+
+    Updates are buffered in memory and written every ``flush_every`` new
+    entries, on ``flush``/``close`` and at interpreter exit. A flush takes an
+    exclusive ``flock`` on a sibling ``.lock`` file, merges the buffered
+    entries into whatever is on disk (other processes may have flushed in the
+    meantime) and replaces the file atomically, so concurrent writers never
+    lose entries or leave a truncated file behind. Keys starting with ``_``
+    are metadata and are carried through untouched.
+    """
+
+    DEFAULT_FLUSH_EVERY = 50
+
+    def __init__(self, path: Path, *, flush_every: int = DEFAULT_FLUSH_EVERY):
+        if flush_every < 1:
+            raise ValueError("flush_every must be >= 1")
+        self._path = Path(path)
+        self._flush_every = flush_every
+        self._lock = threading.Lock()
+        self._entries: Dict[str, str] = read_json_dict(self._path)
+        self._pending: Dict[str, str] = {}
+        atexit.register(self.flush)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def get(self, instance_id: str) -> Optional[str]:
+        with self._lock:
+            return self._entries.get(instance_id)
+
+    def put(self, instance_id: str, framework: str) -> None:
+        self.update({instance_id: framework})
+
+    def update(self, entries: Dict[str, str]) -> None:
+        with self._lock:
+            for instance_id, framework in entries.items():
+                if self._entries.get(instance_id) != framework:
+                    self._entries[instance_id] = framework
+                    self._pending[instance_id] = framework
+            due = len(self._pending) >= self._flush_every
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            pending = dict(self._pending)
+            self._pending.clear()
         try:
-            return json.loads(self._cache_path.read_text(encoding="utf-8"))
-        except Exception:
-            return {}
+            with file_lock(self._path):
+                merged = read_json_dict(self._path)
+                merged.update(pending)
+                write_json_atomic(self._path, merged, pretty=True)
+        except BaseException:
+            with self._lock:
+                for instance_id, framework in pending.items():
+                    self._pending.setdefault(instance_id, framework)
+            raise
+        with self._lock:
+            for instance_id, framework in merged.items():
+                self._entries.setdefault(instance_id, framework)
+
+    def close(self) -> None:
+        self.flush()
+        atexit.unregister(self.flush)
 
-    def _save_cache(self) -> None:
-        if self._cache_path is None:
-            return
-        self._cache_path.parent.mkdir(parents=True, exist_ok=True)
-        self._cache_path.write_text(
-            json.dumps(self._cache, indent=2), encoding="utf-8"
+
+class FrameworkDetector:
+    def __init__(
+        self,
+        *,
+        cache_path: Optional[Path] = None,
+        flush_every: int = FrameworkCacheStore.DEFAULT_FLUSH_EVERY,
+    ):
+        self._store = (
+            FrameworkCacheStore(cache_path, flush_every=flush_every)
+            if cache_path is not None
+            else None
         )
+        self._cache: Dict[str, str] = {}
+        self._lock = threading.Lock()
 
     def detect(self, test_spec) -> Framework:
         instance_id = getattr(test_spec, "instance_id", None)
-        if instance_id and instance_id in self._cache:
-            return Framework(self._cache[instance_id])
-
-        eval_script = " ".join(test_spec.eval_script_list).lower()
-        framework = self._classify(eval_script)
+        if instance_id:
+            cached = self._cached(instance_id)
+            if cached is not None:
+                return Framework(cached)
 
+        framework = self._classify_spec(test_spec)
         if instance_id:
-            self._cache[instance_id] = framework.value
-            self._save_cache()
+            self._remember({instance_id: framework.value})
         return framework
 
+    def precompute(self, test_specs: Iterable) -> Dict[str, Framework]:
+        """Detect every spec in one pass and persist the new entries at once."""
+        results: Dict[str, Framework] = {}
+        fresh: Dict[str, str] = {}
+        for test_spec in test_specs:
+            instance_id = test_spec.instance_id
+            cached = self._cached(instance_id)
+            if cached is not None:
+                results[instance_id] = Framework(cached)
+                continue
+            framework = self._classify_spec(test_spec)
+            results[instance_id] = framework
+            fresh[instance_id] = framework.value
+        if fresh:
+            self._remember(fresh)
+        self.flush()
+        return results
+
+    def flush(self) -> None:
+        if self._store is not None:
+            self._store.flush()
+
+    def close(self) -> None:
+        if self._store is not None:
+            self._store.close()
+
+    def _cached(self, instance_id: str) -> Optional[str]:
+        if self._store is not None:
+            return self._store.get(instance_id)
+        with self._lock:
+            return self._cache.get(instance_id)
+
+    def _remember(self, entries: Dict[str, str]) -> None:
+        if self._store is not None:
+            self._store.update(entries)
+            return
+        with self._lock:
+            self._cache.update(entries)
+
+    def _classify_spec(self, test_spec) -> Framework:
+        return self._classify(" ".join(test_spec.eval_script_list).lower())
+
     def _classify(self, eval_script: str) -> Framework:
         if any(indicator in eval_script for indicator in _PYTEST_INDICATORS):
             return Framework.PYTEST
@@ -74,6 +182,7 @@ class FrameworkDetector:
         return [
             "export PYTHONPATH=/opt/tracers:/testbed:$PYTHONPATH",
             "export AUTO_DEBUG_JSON=/trace_output/auto_debug.json",
+            "export AUTO_DEBUG_FORMAT=indexed",
             f"export AUTO_DEBUG_FRAMEWORK={framework.value}",
             "chmod 777 /trace_output || true",
             "pip install jsonpickle -q || true",
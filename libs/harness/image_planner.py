@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Dict, Generic, Iterable, Iterator, List, Optional, Set, TypeVar
+
+import docker
+from docker.errors import ImageNotFound
+
+from libs.harness.concurrency import ConcurrencyLimits
+
+from swebench.harness.constants import BASE_IMAGE_BUILD_DIR, ENV_IMAGE_BUILD_DIR
+from swebench.harness.docker_build import build_image, build_instance_image
+from swebench.harness.test_spec.test_spec import TestSpec
+
+
+T = TypeVar("T")
+
+_END = object()
+
+
+class ImageKind(str, Enum):
+    BASE = "base"
+    ENV = "env"
+    INSTANCE = "instance"
+
+
+@dataclass
+class ImageNode:
+    key: str
+    kind: ImageKind
+    spec: TestSpec
+    deps: Set[str] = field(default_factory=set)
+    dependents: Set[str] = field(default_factory=set)
+    # Index of the earliest item that needs this image; lower builds first.
+    priority: int = 0
+
+
+@dataclass(frozen=True)
+class BuildPlan:
+    nodes: Dict[str, ImageNode]
+    # Instance image key of each item, or None when nothing has to be built.
+    item_keys: List[Optional[str]]
+
+    def count(self, kind: ImageKind) -> int:
+        return sum(1 for node in self.nodes.values() if node.kind is kind)
+
+
+@dataclass(frozen=True)
+class BuildOutcome(Generic[T]):
+    item: T
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ImageBuildPlanner:
+    """Build the base, env and instance images of a batch of specs in parallel.
+
+    ``plan`` deduplicates images across specs and links every instance image
+    to its env image and every env image to its base image. ``start`` builds
+    the plan on up to ``max_workers`` threads -- an image starts as soon as
+    its parent exists, images needed by earlier items first -- and yields
+    each item once its instance image is ready, so an ``InstanceScheduler``
+    can consume it while later images are still building. Images that
+    already exist are skipped unless ``force_rebuild``; remote images are
+    never built here. Each build also holds a ``limits.build()`` slot, so
+    the total stays capped alongside builds started elsewhere.
+    """
+
+    def __init__(
+        self,
+        client: docker.DockerClient,
+        *,
+        logger: logging.Logger,
+        max_workers: int = 2,
+        force_rebuild: bool = False,
+        nocache: bool = False,
+        limits: Optional[ConcurrencyLimits] = None,
+    ):
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self._client = client
+        self._logger = logger
+        self._max_workers = max_workers
+        self._force_rebuild = force_rebuild
+        self._nocache = nocache
+        self._limits = limits or ConcurrencyLimits.unlimited()
+
+    def plan(self, specs: Iterable[TestSpec]) -> BuildPlan:
+        nodes: Dict[str, ImageNode] = {}
+        item_keys: List[Optional[str]] = []
+        for index, spec in enumerate(specs):
+            if getattr(spec, "is_remote_image", False):
+                item_keys.append(None)
+                continue
+            chain = (
+                (spec.base_image_key, ImageKind.BASE),
+                (spec.env_image_key, ImageKind.ENV),
+                (spec.instance_image_key, ImageKind.INSTANCE),
+            )
+            parent: Optional[str] = None
+            for key, kind in chain:
+                node = nodes.get(key)
+                if node is None:
+                    node = nodes[key] = ImageNode(key, kind, spec, priority=index)
+                if parent is not None:
+                    node.deps.add(parent)
+                    nodes[parent].dependents.add(key)
+                parent = key
+            item_keys.append(spec.instance_image_key)
+        self._drop_existing(nodes)
+        return BuildPlan(nodes=nodes, item_keys=item_keys)
+
+    def start(
+        self, items: Iterable[T], *, spec_of: Callable[[T], TestSpec] = lambda item: item
+    ) -> Iterator[BuildOutcome[T]]:
+        """Build in the background; yield items as their images become ready."""
+        items = list(items)
+        plan = self.plan(spec_of(item) for item in items)
+        self._logger.info(
+            "Image plan: %d base, %d env, %d instance image(s) to build",
+            plan.count(ImageKind.BASE),
+            plan.count(ImageKind.ENV),
+            plan.count(ImageKind.INSTANCE),
+        )
+        ready: queue.Queue = queue.Queue()
+        waiting: Dict[str, List[T]] = {}
+        for item, key in zip(items, plan.item_keys):
+            if key is None or key not in plan.nodes:
+                ready.put(BuildOutcome(item))
+            else:
+                waiting.setdefault(key, []).append(item)
+
+        def on_done(key: str, error: Optional[BaseException]) -> None:
+            for item in waiting.pop(key, []):
+                ready.put(BuildOutcome(item, error))
+
+        def run() -> None:
+            try:
+                self._execute(plan, on_done)
+            except BaseException as exc:
+                self._logger.exception("Image builds aborted: %s", exc)
+                for key in list(waiting):
+                    on_done(key, exc)
+            finally:
+                ready.put(_END)
+
+        worker = threading.Thread(target=run, name="image-builds", daemon=True)
+        worker.start()
+        while True:
+            outcome = ready.get()
+            if outcome is _END:
+                break
+            yield outcome
+        worker.join()
+
+    def _execute(
+        self,
+        plan: BuildPlan,
+        on_done: Callable[[str, Optional[BaseException]], None],
+    ) -> None:
+        nodes = plan.nodes
+        remaining = {key: len(node.deps) for key, node in nodes.items()}
+        heap = [(node.priority, key) for key, node in nodes.items() if not node.deps]
+        heapq.heapify(heap)
+        running: Dict[Future, str] = {}
+
+        def finish(key: str, error: Optional[BaseException]) -> None:
+            node = nodes[key]
+            if node.kind is ImageKind.INSTANCE:
+                on_done(key, error)
+            for child in node.dependents:
+                if error is not None:
+                    # Nothing below a failed image can be built.
+                    remaining[child] = -1
+                    finish(child, error)
+                elif remaining[child] > 0:
+                    remaining[child] -= 1
+                    if remaining[child] == 0:
+                        heapq.heappush(heap, (nodes[child].priority, child))
+
+        with ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="image-build"
+        ) as executor:
+            while heap or running:
+                while heap and len(running) < self._max_workers:
+                    _, key = heapq.heappop(heap)
+                    running[executor.submit(self._build, nodes[key])] = key
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        self._logger.error("Building %s failed: %s", key, error)
+                    finish(key, error)
+
+    def _drop_existing(self, nodes: Dict[str, ImageNode]) -> None:
+        """Keep only missing instance images and the missing images below them."""
+        needed: Set[str] = set()
+        for key, node in nodes.items():
+            if node.kind is not ImageKind.INSTANCE:
+                continue
+            current: Optional[str] = key
+            while current is not None and current not in needed:
+                if not self._force_rebuild and self._exists(current):
+                    break
+                needed.add(current)
+                current = next(iter(nodes[current].deps), None)
+        for key in list(nodes):
+            if key not in needed:
+                del nodes[key]
+        for node in nodes.values():
+            node.deps &= needed
+            node.dependents &= needed
+
+    def _exists(self, key: str) -> bool:
+        try:
+            self._client.images.get(key)
+        except ImageNotFound:
+            return False
+        return True
+
+    def _build(self, node: ImageNode) -> None:
+        with self._limits.build():
+            self._build_unlimited(node)
+
+    def _build_unlimited(self, node: ImageNode) -> None:
+        spec = node.spec
+        self._logger.info("Building %s image %s", node.kind.value, node.key)
+        if node.kind is ImageKind.INSTANCE:
+            build_instance_image(spec, self._client, self._logger, self._nocache)
+            return
+        if node.kind is ImageKind.BASE:
+            setup_scripts: Dict[str, str] = {}
+            dockerfile = spec.base_dockerfile
+            build_dir = BASE_IMAGE_BUILD_DIR
+        else:
+            setup_scripts = {"setup_env.sh": spec.setup_env_script}
+            dockerfile = spec.env_dockerfile
+            build_dir = ENV_IMAGE_BUILD_DIR
+        build_image(
+            image_name=node.key,
+            setup_scripts=setup_scripts,
+            dockerfile=dockerfile,
+            platform=spec.platform,
+            client=self._client,
+            build_dir=build_dir / node.key.replace(":", "__"),
+            nocache=self._nocache,
+        )
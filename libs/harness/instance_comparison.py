@@ -1,14 +1,13 @@
 from __future__ import annotations
 
-import json
 import logging
 import re
-import shlex
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple, TypeVar
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple, TypeVar
 
 import docker
 
@@ -16,10 +15,29 @@ from libs.frames import (
     ExecutionPathSerializer,
     Frame,
     FrameSerializer,
+    ParsedTrace,
+    TokenBudgetSelector,
+    TracePostProcessor,
     select_most_informative_trace,
 )
+from libs.harness.checkpoint import (
+    PHASE_BASELINE,
+    PHASE_REPORT,
+    InstanceCheckpoint,
+    patch_phase,
+    run_phase,
+)
+from libs.harness.concurrency import ConcurrencyLimits
+from libs.harness.container_pool import ContainerPool
 from libs.harness.framework_detector import FrameworkDetector
 from libs.harness.io_utils import read_text, render_source_context, write_text
+from libs.harness.outcome import Outcome, Status, parse_test_output
+from libs.harness.patch_check import PatchChecker
+from libs.harness.project_mirror import ProjectMirrorCache
+from libs.harness.result_cache import RunResultCache
+from libs.harness.runtime_history import RuntimeHistory
+from libs.harness.snapshots import SnapshotStore
+from libs.harness.source_reader import SourceReader
 from libs.harness.trace_output import TraceOutputManager
 from libs.harness.traced_runner import RunResult, TracedInstanceRunner
 from libs.llm.connector import ToolSessionResult
@@ -34,12 +52,12 @@ from libs.llm.tooling import (
 )
 
 from libs.prompts import PromptBuilder, load_prompt
+from libs.tracing import json_codec
 
 from swebench.harness.constants import (
     DOCKER_WORKDIR,
     KEY_MODEL,
     KEY_PREDICTION,
-    UTF8,
 )
 
 
@@ -49,14 +67,6 @@ class Variant(str, Enum):
     WITH_RUNTIME = "with_runtime"
 
 
-class Status(str, Enum):
-    PASSED = "passed"
-    FAILED = "failed"
-    UNKNOWN = "unknown"
-    APPLY_FAILED = "apply_failed"
-    NOT_RUN = "not_run"
-
-
 class Verdict(str, Enum):
     FIXED = "fixed"
     IMPROVED = "improved"
@@ -69,22 +79,6 @@ class Verdict(str, Enum):
 T = TypeVar("T")
 
 
-@dataclass
-class Outcome:
-    status: Status = Status.UNKNOWN
-    failure_count: Optional[int] = None
-    ran_tests: Optional[int] = None
-    summary_line: str = ""
-
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "status": self.status.value,
-            "failure_count": self.failure_count,
-            "ran_tests": self.ran_tests,
-            "summary_line": self.summary_line,
-        }
-
-
 @dataclass
 class VariantResult:
     variant: Variant
@@ -117,6 +111,21 @@ class VariantResult:
             payload["test_output_path"] = str(self.test_output_path)
         return payload
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> VariantResult:
+        test_output_path = data.get("test_output_path")
+        return cls(
+            variant=Variant(data["variant"]),
+            prompt_path=Path(data["prompt_path"]),
+            response_path=Path(data["response_path"]),
+            patch_path=Path(data["patch_path"]),
+            generated_patch=data.get("generated_patch", ""),
+            outcome=Outcome.from_dict(data.get("outcome") or {}),
+            run_result=RunResult.from_dict(data["run_result"]),
+            run_skipped=bool(data.get("run_skipped", False)),
+            test_output_path=Path(test_output_path) if test_output_path else None,
+        )
+
 
 @dataclass
 class ComparisonConfig:
@@ -131,6 +140,8 @@ class ComparisonConfig:
     enable_tools: bool = True
     max_tool_turns: int = 8
     max_tool_output_chars: int = 20000
+    frames_token_budget: Optional[int] = None
+    pretty_json: bool = False
 
 
 @dataclass
@@ -143,6 +154,8 @@ class ComparisonReport:
     with_runtime: VariantResult
     patches: Dict[str, str]
     comparison: Dict[str, str]
+    # ``RunResult.metrics`` of the baseline and each variant that ran.
+    metrics: Dict[str, Dict[str, Any]] = field(default_factory=dict)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -154,12 +167,14 @@ class ComparisonReport:
             Variant.WITH_RUNTIME.value: self.with_runtime.to_dict(),
             "patches": self.patches,
             "comparison": self.comparison,
+            "metrics": self.metrics,
         }
 
 
 class _Baseline(NamedTuple):
     run_result: RunResult
-    trace: Mapping[str, Any]
+    trace: ParsedTrace
+    project_root: Optional[Path]
     test_output_path: Path
     test_output: str
     outcome: Outcome
@@ -168,24 +183,6 @@ class _Baseline(NamedTuple):
     source_map: Dict[str, str]
 
 
-def _trace_frames(trace: Mapping[str, Any]) -> Tuple[Frame, ...]:
-    return tuple(
-        f for f in (Frame.from_raw(d) for d in trace.get("frames", [])) if f is not None
-    )
-
-
-def _trace_exec_path(trace: Mapping[str, Any]) -> Tuple[Frame, ...]:
-    return tuple(
-        f for f in (Frame.from_raw(d) for d in trace.get("exec_path", [])) if f is not None
-    )
-
-
-def _trace_step_frames(trace: Mapping[str, Any]) -> Tuple[Frame, ...]:
-    return tuple(
-        f for f in (Frame.from_raw(d) for d in trace.get("step_frames", [])) if f is not None
-    )
-
-
 class _Prompts(NamedTuple):
     without: str
     with_: str
@@ -207,6 +204,14 @@ class InstanceComparison:
         config: ComparisonConfig,
         logger: logging.Logger,
         framework_detector: Optional[FrameworkDetector] = None,
+        limits: Optional[ConcurrencyLimits] = None,
+        pool: Optional[ContainerPool] = None,
+        snapshots: Optional[SnapshotStore] = None,
+        mirrors: Optional[ProjectMirrorCache] = None,
+        source_reader: Optional[SourceReader] = None,
+        history: Optional[RuntimeHistory] = None,
+        result_cache: Optional[RunResultCache] = None,
+        post_processor: Optional[TracePostProcessor] = None,
     ):
         self._test_spec = test_spec
         self._reference_pred = reference_pred
@@ -218,6 +223,11 @@ class InstanceComparison:
         self._config = config
         self._logger = logger
         self._framework_detector = framework_detector or FrameworkDetector()
+        self._limits = limits or ConcurrencyLimits.unlimited()
+        self._snapshots = snapshots
+        self._history = history
+        self._result_cache = result_cache
+        self._post_processor = post_processor
 
         self._framework = self._framework_detector.detect(self._test_spec)
         self._framework_value = self._framework.value
@@ -227,17 +237,53 @@ class InstanceComparison:
         self._with_base = self._output_dir / Variant.WITH_RUNTIME.value
         self._artifacts_dir = self._output_dir / "artifacts" / test_spec.instance_id
         self._artifacts_dir.mkdir(parents=True, exist_ok=True)
+        # Finished phases of an interrupted run are reused instead of re-run.
+        self._checkpoint = InstanceCheckpoint(
+            self._artifacts_dir, pretty=config.pretty_json
+        )
 
         self._baseline_output = TraceOutputManager(self._baseline_base)
         self._without_output = TraceOutputManager(self._without_base)
         self._with_output = TraceOutputManager(self._with_base)
 
-        self._baseline_runner = self._make_runner(self._baseline_output, Variant.BASELINE)
+        # One warm container serves the baseline, both variants and the
+        # source reads, unless the caller shares a wider pool.
+        self._owns_pool = pool is None
+        self._pool = pool or ContainerPool(
+            client,
+            run_id=run_id,
+            scratch_root=self._output_dir / ".container_pool",
+            tracer_dir=self._trace_collector_dir,
+            environment=self._baseline_output.environment(),
+            logger=logger,
+            max_size=1,
+        )
+
+        # Only the baseline mirrors the project; the variants reuse it.
+        self._mirrors = mirrors or ProjectMirrorCache(
+            self._output_dir / "mirrors", logger=logger
+        )
+        self._source_reader = source_reader or SourceReader(
+            client, cache_root=self._output_dir / "source_cache", logger=logger
+        )
+        # Variant patches are dry-run against the baseline's mirror first.
+        self._patch_checker = PatchChecker(logger=logger)
+        # No runner stops early: the baseline outcome is the reference for
+        # the verdicts, so it must cover the same tests as the variant runs.
+        self._baseline_runner = self._make_runner(
+            self._baseline_output,
+            Variant.BASELINE,
+            mirrors=self._mirrors,
+        )
         self._without_runner = self._make_runner(self._without_output, Variant.WITHOUT_RUNTIME)
         self._with_runner = self._make_runner(self._with_output, Variant.WITH_RUNTIME)
 
     def _make_runner(
-        self, output_manager: TraceOutputManager, variant: Variant
+        self,
+        output_manager: TraceOutputManager,
+        variant: Variant,
+        *,
+        mirrors: Optional[ProjectMirrorCache] = None,
     ) -> TracedInstanceRunner:
         return TracedInstanceRunner(
             client=self._client,
@@ -250,6 +296,14 @@ class InstanceComparison:
             timeout=self._config.timeout,
             force_rebuild=self._config.force_rebuild,
             nocache=self._config.nocache,
+            limits=self._limits,
+            pool=self._pool,
+            snapshots=self._snapshots,
+            mirrors=mirrors,
+            history=self._history,
+            result_cache=self._result_cache,
+            patch_checker=self._patch_checker,
+            post_processor=self._post_processor,
         )
 
     def run(self) -> Optional[ComparisonReport]:
@@ -266,74 +320,96 @@ class InstanceComparison:
             error_path = self._artifacts_dir / "comparison_error.json"
             write_text(
                 error_path,
-                json.dumps(
+                json_codec.dumps(
                     {
                         "instance_id": instance_id,
                         "error_type": type(exc).__name__,
                         "error_message": str(exc),
                     },
-                    indent=2,
-                    ensure_ascii=False,
+                    pretty=self._config.pretty_json,
                 ),
             )
             return None
+        finally:
+            if self._owns_pool:
+                self._pool.close()
 
     def _run_unsafe(self) -> ComparisonReport:
-        instance_id = self._test_spec.instance_id
         reference_patch = str(self._reference_pred.get(KEY_PREDICTION, ""))
         write_text(self._artifacts_dir / "reference_patch.diff", reference_patch)
 
-        with self._baseline_output.project_scope(instance_id) as project:
-            baseline = self._collect_baseline()
-            prompts = self._build_prompts(baseline)
-
-            without = self._run_variant(
-                Variant.WITHOUT_RUNTIME,
-                prompts.without,
-                self._without_runner,
-                self._without_output,
-                baseline=baseline,
-                project_root=project.path,
-            )
-            with_ = self._run_variant(
-                Variant.WITH_RUNTIME,
-                prompts.with_,
-                self._with_runner,
-                self._with_output,
-                baseline=baseline,
-                project_root=project.path,
-            )
+        baseline = self._collect_baseline()
+        if baseline.project_root is not None:
+            self._mirrors.pin(baseline.project_root)
+        try:
+            return self._compare(baseline, reference_patch)
+        finally:
+            if baseline.project_root is not None:
+                self._mirrors.unpin(baseline.project_root)
+
+    def _compare(self, baseline: _Baseline, reference_patch: str) -> ComparisonReport:
+        prompts = self._build_prompts(baseline)
+
+        without = self._run_variant(
+            Variant.WITHOUT_RUNTIME,
+            prompts.without,
+            self._without_runner,
+            self._without_output,
+            baseline=baseline,
+        )
+        with_ = self._run_variant(
+            Variant.WITH_RUNTIME,
+            prompts.with_,
+            self._with_runner,
+            self._with_output,
+            baseline=baseline,
+        )
 
         report = self._build_report(baseline, without, with_, reference_patch)
 
         report_path = self._artifacts_dir / "comparison_report.json"
         write_text(
-            report_path, json.dumps(report.to_dict(), indent=2, ensure_ascii=False)
+            report_path,
+            json_codec.dumps(report.to_dict(), pretty=self._config.pretty_json),
         )
         self._logger.info("Saved report: %s", report_path)
+        self._checkpoint.mark(PHASE_REPORT, {"report_path": str(report_path)})
         return report
 
     def _collect_baseline(self) -> _Baseline:
         instance_id = self._test_spec.instance_id
-        run_result = self._baseline_runner.run(self._reference_pred, skip_patch=True)
+        run_result = None
+        payload = self._checkpoint.get(PHASE_BASELINE)
+        if payload is not None:
+            run_result = self._baseline_runner.restore(payload)
+        if run_result is not None:
+            self._logger.info("Reusing checkpointed baseline run")
+        else:
+            run_result = self._baseline_runner.run(self._reference_pred, skip_patch=True)
+            if run_result.success:
+                self._checkpoint.mark(PHASE_BASELINE, run_result.to_dict())
 
-        trace = select_most_informative_trace(list(run_result.traces))
+        trace = ParsedTrace(select_most_informative_trace(list(run_result.traces)))
 
         test_output_path = self._resolve_test_output_path(run_result, self._baseline_output, instance_id)
         test_output = read_text(test_output_path)
-        outcome = self._parse_test_output(test_output)
+        outcome = self._run_outcome(run_result, test_output_path, test_output)
 
-        all_frames = _trace_frames(trace) + _trace_exec_path(trace)
+        all_frames = trace.frames + trace.exec_path
         file_line_map = self._collect_file_line_map(all_frames)
         selected_files = self._select_context_files(file_line_map, self._config.max_context_files)
 
         all_trace_files = list(file_line_map.keys())
         files_to_read = list(dict.fromkeys(selected_files + all_trace_files))
-        source_map = self._read_files_from_image(self._test_spec.instance_image_key, files_to_read)
+        project_root = Path(run_result.project_dir) if run_result.project_dir else None
+        source_map = self._read_files_from_image(
+            self._test_spec.instance_image_key, files_to_read, mirror=project_root
+        )
 
         return _Baseline(
             run_result=run_result,
             trace=trace,
+            project_root=project_root,
             test_output_path=test_output_path,
             test_output=test_output,
             outcome=outcome,
@@ -343,7 +419,7 @@ class InstanceComparison:
         )
 
     def _build_prompts(self, baseline: _Baseline) -> _Prompts:
-        failure_summary = self._summarize_failures(baseline.trace, baseline.test_output)
+        failure_summary = self._summarize_failures(baseline.trace.raw, baseline.test_output)
         testcase_source = self._render_testcase_source(
             baseline.file_line_map,
             baseline.selected_files,
@@ -380,24 +456,74 @@ class InstanceComparison:
         output_manager: TraceOutputManager,
         *,
         baseline: Optional[_Baseline] = None,
-        project_root: Optional[Path] = None,
     ) -> VariantResult:
-        variant_name = variant.value
-        prompt_path = self._artifacts_dir / f"prompt_{variant_name}.txt"
-        response_path = self._artifacts_dir / f"response_{variant_name}.txt"
-        patch_path = self._artifacts_dir / f"patch_{variant_name}.diff"
+        phase = run_phase(variant.value)
+        payload = self._checkpoint.get(phase)
+        if payload is not None:
+            self._logger.info("Reusing checkpointed %s run", variant.value)
+            return VariantResult.from_dict(payload)
+
+        result = self._execute_variant(
+            variant, prompt, runner, output_manager, baseline=baseline
+        )
+        # Runs that failed for infrastructure reasons are retried on resume.
+        if (
+            result.run_result.success
+            or result.outcome.status is Status.APPLY_FAILED
+            or not result.generated_patch.strip()
+        ):
+            self._checkpoint.mark(phase, result.to_dict())
+        return result
 
-        write_text(prompt_path, prompt)
+    def _generate_patch(
+        self,
+        variant: Variant,
+        prompt: str,
+        baseline: Optional[_Baseline],
+        response_path: Path,
+        patch_path: Path,
+    ) -> str:
+        phase = patch_phase(variant.value)
+        if self._checkpoint.get(phase) is not None and patch_path.exists():
+            self._logger.info("Reusing checkpointed %s patch", variant.value)
+            return read_text(patch_path)
 
         if self._config.enable_tools and baseline is not None:
-            session = self._run_tool_session(variant, prompt, baseline, project_root=project_root)
+            session = self._run_tool_session(variant, prompt, baseline)
             patch_text = session.patch
             response_text = session.render()
         else:
-            response_text = self._llm.complete_code(prompt, max_tokens=self._config.max_tokens)
+            with self._limits.llm():
+                response_text = self._llm.complete_code(
+                    prompt, max_tokens=self._config.max_tokens
+                )
             patch_text = self._extract_unified_diff(response_text)
         write_text(response_path, response_text)
         write_text(patch_path, patch_text)
+        self._checkpoint.mark(
+            phase,
+            {"response_path": str(response_path), "patch_path": str(patch_path)},
+        )
+        return patch_text
+
+    def _execute_variant(
+        self,
+        variant: Variant,
+        prompt: str,
+        runner: TracedInstanceRunner,
+        output_manager: TraceOutputManager,
+        *,
+        baseline: Optional[_Baseline] = None,
+    ) -> VariantResult:
+        variant_name = variant.value
+        prompt_path = self._artifacts_dir / f"prompt_{variant_name}.txt"
+        response_path = self._artifacts_dir / f"response_{variant_name}.txt"
+        patch_path = self._artifacts_dir / f"patch_{variant_name}.diff"
+
+        write_text(prompt_path, prompt)
+        patch_text = self._generate_patch(
+            variant, prompt, baseline, response_path, patch_path
+        )
 
         if not patch_text.strip():
             return VariantResult(
@@ -423,7 +549,11 @@ class InstanceComparison:
         variant_pred[KEY_PREDICTION] = patch_text
         variant_pred[KEY_MODEL] = f"{self._config.model_name}-{variant_name}"
 
-        run_result = runner.run(variant_pred, skip_patch=False)
+        run_result = runner.run(
+            variant_pred,
+            skip_patch=False,
+            project_dir=baseline.project_root if baseline is not None else None,
+        )
         instance_id = self._test_spec.instance_id
 
         if not run_result.success:
@@ -446,8 +576,7 @@ class InstanceComparison:
         test_output_path = self._resolve_test_output_path(
             run_result, output_manager, instance_id
         )
-        test_output_text = read_text(test_output_path)
-        outcome = self._parse_test_output(test_output_text)
+        outcome = self._run_outcome(run_result, test_output_path)
 
         return VariantResult(
             variant=variant,
@@ -501,6 +630,14 @@ class InstanceComparison:
                 "llm_with_runtime": with_.generated_patch,
             },
             comparison=comparison,
+            metrics={
+                Variant.BASELINE.value: baseline.run_result.metrics(),
+                **{
+                    result.variant.value: result.run_result.metrics()
+                    for result in (without, with_)
+                    if not result.run_skipped or result.run_result.phases
+                },
+            },
         )
 
     @staticmethod
@@ -533,59 +670,54 @@ class InstanceComparison:
         return "\n".join(setup_lines) + "\n"
 
     def _read_files_from_image(
-        self, image_name: str, file_paths: List[str]
+        self,
+        image_name: str,
+        file_paths: List[str],
+        *,
+        mirror: Optional[Path] = None,
     ) -> Dict[str, str]:
-        source_map: Dict[str, str] = {}
         if not file_paths:
-            return source_map
+            return {}
 
-        container = None
-        try:
-            container = self._client.containers.create(
-                image=image_name, command="sleep 300", tty=True
+        setup_script = self._extract_setup_script(self._test_spec)
+        snapshot = None
+        if self._snapshots is not None:
+            snapshot = self._snapshots.ensure(
+                self._framework_detector.inject(self._test_spec)
             )
-            container.start()
+        if snapshot is not None:
+            image_name = snapshot.image
+            setup_script = snapshot.plan.replay_script
 
-            setup_script = self._extract_setup_script(self._test_spec)
-            result = container.exec_run(
-                cmd=["/bin/bash", "-c", setup_script],
-                workdir=DOCKER_WORKDIR,
-            )
-            if result.exit_code != 0:
-                self._logger.debug(
-                    "Setup script returned %d; some files may be unavailable",
-                    result.exit_code,
-                )
+        @contextmanager
+        def acquire() -> Iterator[Any]:
+            with self._limits.container(), self._pool.acquire(
+                self._test_spec, image=image_name
+            ) as pooled:
+                yield pooled.container
 
-            for file_path in file_paths:
-                quoted = shlex.quote(file_path)
-                cmd = ["/bin/sh", "-lc", f"cat {quoted}"]
-                result = container.exec_run(cmd=cmd, workdir=DOCKER_WORKDIR)
-                if result.exit_code == 0:
-                    source_map[file_path] = result.output.decode(UTF8, errors="replace")
-                else:
-                    self._logger.debug(
-                        "Could not read context file from image: %s", file_path
-                    )
+        try:
+            return self._source_reader.read(
+                file_paths,
+                image=image_name,
+                setup_script=setup_script,
+                acquire=acquire,
+                mirror=mirror,
+            )
         except Exception as exc:
             self._logger.warning(
                 "Failed extracting source snippets from image %s: %s", image_name, exc
             )
-        finally:
-            if container is not None:
-                try:
-                    container.remove(force=True)
-                except Exception:
-                    pass
-        return source_map
+            return {}
 
     def _build_tool_session_context(
-        self, baseline: _Baseline, include_runtime: bool, project_root: Path
+        self, baseline: _Baseline, include_runtime: bool
     ) -> ToolSessionContext:
-        if not project_root.exists() or not any(project_root.iterdir()):
+        project_root = baseline.project_root
+        if project_root is None or not project_root.is_dir():
             raise RuntimeError(
-                f"Project mirror at {project_root} is empty; "
-                "baseline run did not populate /project_mirror."
+                f"Project mirror at {project_root} is missing; "
+                "baseline run did not mirror the project."
             )
         resolver = ProjectPathResolver(
             project_root, container_project_root=DOCKER_WORKDIR
@@ -598,10 +730,10 @@ class InstanceComparison:
         runtime_ctx: Optional[RuntimeToolContext] = None
         if include_runtime:
             runtime_ctx = RuntimeToolContext(
-                frames=_trace_frames(baseline.trace),
-                execution_path=_trace_exec_path(baseline.trace),
-                step_frames=_trace_step_frames(baseline.trace),
-                trace=dict(baseline.trace) if baseline.trace else {},
+                frames=baseline.trace.frames,
+                execution_path=baseline.trace.exec_path,
+                step_frames=baseline.trace.step_frames,
+                trace=baseline.trace.raw,
                 test_output_path=baseline.test_output_path,
             )
         return ToolSessionContext(project=project_ctx, runtime=runtime_ctx)
@@ -611,30 +743,25 @@ class InstanceComparison:
         variant: Variant,
         prompt: str,
         baseline: _Baseline,
-        *,
-        project_root: Optional[Path] = None,
     ) -> ToolSessionResult:
         include_runtime = variant is Variant.WITH_RUNTIME
-        if project_root is None:
-            project_root = self._baseline_output.project_dir(
-                self._test_spec.instance_id
-            )
         context = self._build_tool_session_context(
-            baseline, include_runtime=include_runtime, project_root=project_root
+            baseline, include_runtime=include_runtime
         )
         catalog: ToolCatalog = (
             create_with_runtime_catalog()
             if include_runtime
             else create_without_runtime_catalog()
         )
-        return self._llm.complete_with_tools(
-            prompt,
-            catalog=catalog,
-            context=context,
-            max_tool_turns=self._config.max_tool_turns,
-            max_tokens=self._config.max_tokens,
-            max_tool_output_chars=self._config.max_tool_output_chars,
-        )
+        with self._limits.llm():
+            return self._llm.complete_with_tools(
+                prompt,
+                catalog=catalog,
+                context=context,
+                max_tool_turns=self._config.max_tool_turns,
+                max_tokens=self._config.max_tokens,
+                max_tool_output_chars=self._config.max_tool_output_chars,
+            )
 
     @staticmethod
     def _summarize_failures(
@@ -687,23 +814,18 @@ class InstanceComparison:
 
     def _build_prompt(
         self,
-        trace: Mapping[str, Any],
+        trace: ParsedTrace,
         failure_summary: str,
         testcase_source: str,
         include_runtime: bool,
         source_map: Dict[str, str],
     ) -> str:
-        exception_type = str(trace.get("exc_type", "TestFailure"))
-        exception_msg = str(trace.get("message", "See failure summary"))
-
-        frames = _trace_frames(trace)
-        exec_path_frames = _trace_exec_path(trace)
+        exception_type = str(trace.raw.get("exc_type", "TestFailure"))
+        exception_msg = str(trace.raw.get("message", "See failure summary"))
 
         if include_runtime:
-            execution_path = ExecutionPathSerializer().to_string(exec_path_frames)
-            runtime_frames = FrameSerializer(
-                source_map, self._config.context_lines
-            ).to_string_many(frames)
+            execution_path = ExecutionPathSerializer().to_string(trace.exec_path)
+            runtime_frames = self._render_runtime_frames(trace.frames, source_map)
             runtime_specific = load_prompt("debugger/runtime_specific.txt").rstrip("\n")
         else:
             execution_path = "intentionally omitted"
@@ -720,9 +842,36 @@ class InstanceComparison:
             .add_section("exception_type", exception_type)
             .add_section("exception_body", exception_msg)
             .add_section("execution_path", execution_path)
+            .add_section("runtime_frames", runtime_frames)
             .build()
         )
 
+    def _render_runtime_frames(
+        self, frames: Tuple[Frame, ...], source_map: Dict[str, str]
+    ) -> str:
+        serializer = FrameSerializer(source_map, self._config.context_lines)
+        full = serializer.to_string_many(frames)
+        if self._config.frames_token_budget is None:
+            return full
+        selection = TokenBudgetSelector(
+            self._config.frames_token_budget,
+            max_context_lines=self._config.context_lines,
+        ).select(frames, source_map)
+        budgeted = serializer.to_string_selection(selection)
+        self._logger.info(
+            "Runtime frames budget: %s (%d -> %d chars)",
+            selection.summary(),
+            len(full),
+            len(budgeted),
+        )
+        if len(budgeted) > len(full):
+            # The budget must never make the prompt longer than no budget at all.
+            self._logger.warning(
+                "Budgeted runtime frames exceed the full rendering; using the full one"
+            )
+            return full
+        return budgeted
+
     @staticmethod
     def _find_diff_start(text: str) -> Optional[int]:
         indexes: List[int] = []
@@ -751,49 +900,17 @@ class InstanceComparison:
         return ""
 
     @staticmethod
-    def _parse_test_output(text: str) -> Outcome:
-        status = Status.UNKNOWN
-        if re.search(r"^FAILED\b", text, flags=re.MULTILINE) or re.search(
-            r"\b\d+\s+failed\b", text
-        ):
-            status = Status.FAILED
-        elif re.search(r"^OK\b", text, flags=re.MULTILINE) or re.search(
-            r"\b0\s+failed\b", text
-        ):
-            status = Status.PASSED
-
-        failure_count: Optional[int] = None
-        for match in re.finditer(r"(?:failures|errors)=(\d+)", text):
-            if failure_count is None:
-                failure_count = 0
-            failure_count += int(match.group(1))
-        failed_match = re.search(r"(\d+)\s+failed\b", text)
-        if failed_match:
-            failed_count = int(failed_match.group(1))
-            failure_count = (
-                failed_count
-                if failure_count is None
-                else max(failure_count, failed_count)
-            )
-        if status is Status.PASSED:
-            failure_count = 0
-
-        ran_match = re.search(r"Ran\s+(\d+)\s+tests", text)
-        ran_tests = int(ran_match.group(1)) if ran_match else None
-
-        summary_line = ""
-        for pattern in (r"^FAILED.*$", r"^OK.*$", r"^=+.*(?:failed|passed).*$"):
-            summary_match = re.search(pattern, text, flags=re.MULTILINE)
-            if summary_match:
-                summary_line = summary_match.group(0).strip()
-                break
-
-        return Outcome(
-            status=status,
-            failure_count=failure_count,
-            ran_tests=ran_tests,
-            summary_line=summary_line,
-        )
+    def _run_outcome(
+        run_result: RunResult,
+        test_output_path: Path,
+        test_output: Optional[str] = None,
+    ) -> Outcome:
+        """The outcome parsed while the run streamed, else parsed from disk."""
+        if run_result.outcome:
+            return Outcome.from_dict(run_result.outcome)
+        if test_output is None:
+            test_output = read_text(test_output_path)
+        return parse_test_output(test_output)
 
     def _resolve_test_output_path(self, run_result: RunResult, output_manager: TraceOutputManager, instance_id: str) -> Path:
         if run_result.trace_path:
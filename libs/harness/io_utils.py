@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from libs.frames.source_index import SourceIndex
+
 
 def read_text(path: Path) -> str:
     return (
@@ -15,39 +17,10 @@ def write_text(path: Path, content: str) -> None:
 
 
 def render_numbered_range(source: str, start_line: int, end_line: int) -> str:
-    if start_line < 1:
-        start_line = 1
-    if end_line < start_line:
-        end_line = start_line
-
-    lines = source.splitlines()
-    if not lines:
-        return ""
-
-    start_idx = start_line - 1
-    end_idx = min(len(lines), end_line)
-    selected = lines[start_idx:end_idx]
-
-    return "\n".join(
-        f"{line_no}: {line}"
-        for line_no, line in zip(range(start_line, start_line + len(selected)), selected)
-    )
+    return SourceIndex.for_source(source).render_numbered(start_line, end_line)
 
 
 def render_source_context(source: str, line_number: int, context_size: int) -> str:
     if not source:
         return "<source unavailable>"
-    lines = source.splitlines()
-    if not lines:
-        return "<source unavailable>"
-    if line_number < 1:
-        line_number = 1
-    if line_number > len(lines):
-        line_number = len(lines)
-    start = max(1, line_number - context_size)
-    end = min(len(lines), line_number + context_size)
-    rendered = []
-    for current in range(start, end + 1):
-        marker = "->" if current == line_number else "  "
-        rendered.append(f"{current} {marker} : {lines[current - 1]}")
-    return "\n".join(rendered)
+    return SourceIndex.for_source(source).render_context(line_number, context_size)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from libs.tracing import json_codec
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts
+    fcntl = None
+
+
+def read_json_dict(path: Path) -> Dict[str, Any]:
+    """Load a JSON object, treating a missing or unreadable file as empty."""
+    if not path.exists():
+        return {}
+    try:
+        data = json_codec.load_path(path)
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def write_json_atomic(path: Path, data: Any, *, pretty: bool = False) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    json_codec.dump_path(tmp_path, data, pretty=pretty)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive ``flock`` on ``<path>.lock`` (a no-op without fcntl)."""
+    if fcntl is None:
+        yield
+        return
+    lock_path = path.with_name(f"{path.name}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+
+
+class Status(str, Enum):
+    PASSED = "passed"
+    FAILED = "failed"
+    UNKNOWN = "unknown"
+    APPLY_FAILED = "apply_failed"
+    NOT_RUN = "not_run"
+
+
+@dataclass
+class Outcome:
+    status: Status = Status.UNKNOWN
+    failure_count: Optional[int] = None
+    ran_tests: Optional[int] = None
+    summary_line: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status.value,
+            "failure_count": self.failure_count,
+            "ran_tests": self.ran_tests,
+            "summary_line": self.summary_line,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Outcome:
+        return cls(
+            status=Status(data.get("status", Status.UNKNOWN.value)),
+            failure_count=data.get("failure_count"),
+            ran_tests=data.get("ran_tests"),
+            summary_line=data.get("summary_line", ""),
+        )
+
+
+_FAILED_COUNT = re.compile(r"\b(\d+)\s+failed\b")
+_ERROR_COUNT = re.compile(r"(?:failures|errors)=(\d+)")
+_RAN_TESTS = re.compile(r"Ran\s+(\d+)\s+tests")
+_SUMMARY_RULE = re.compile(r"^=+.*(?:failed|passed)")
+_FAILED_STATUS = re.compile(r"^FAILED\b")
+_OK_STATUS = re.compile(r"^OK\b")
+# A failing test as pytest (-v and -rA summary) or unittest/django report it.
+_FAILING_TEST = re.compile(
+    r"^(?:"
+    r"(?:FAIL|ERROR): (?P<unittest>\S+ \(\S+\))"
+    r"|(?P<verbose>\S+ \(\S+\)) \.\.\. (?:FAIL|ERROR)\b"
+    r"|(?P<pytest>\S+::\S+) (?:FAILED|ERROR)\b"
+    r"|(?:FAILED|ERROR) (?P<summary>\S+::\S+)"
+    r")"
+)
+
+
+class OutcomeParser:
+    """Single-pass, incremental parser of pytest/unittest/django test output.
+
+    ``feed`` takes output chunks as they arrive and scans each complete line
+    once; cheap substring checks keep most lines away from the regexes.
+    ``outcome`` reflects everything seen so far, and ``on_failure`` is called
+    with the id of the first failing test as soon as its line is complete.
+    """
+
+    def __init__(self, on_failure: Optional[Callable[[str], None]] = None):
+        self._on_failure = on_failure
+        self._pending = ""
+        self._failed = False
+        self._ok = False
+        self._failed_line: Optional[str] = None
+        self._ok_line: Optional[str] = None
+        self._rule_line: Optional[str] = None
+        self._failed_count: Optional[int] = None
+        self._error_total: Optional[int] = None
+        self._ran_tests: Optional[int] = None
+        self.first_failure: Optional[str] = None
+
+    def feed(self, text: str) -> None:
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._feed_line(line)
+
+    def close(self) -> Outcome:
+        if self._pending:
+            self._feed_line(self._pending)
+            self._pending = ""
+        return self.outcome
+
+    @property
+    def outcome(self) -> Outcome:
+        status = Status.UNKNOWN
+        if self._failed:
+            status = Status.FAILED
+        elif self._ok:
+            status = Status.PASSED
+
+        failure_count = self._error_total
+        if self._failed_count is not None:
+            failure_count = (
+                self._failed_count
+                if failure_count is None
+                else max(failure_count, self._failed_count)
+            )
+        if status is Status.PASSED:
+            failure_count = 0
+
+        summary_line = self._failed_line or self._ok_line or self._rule_line or ""
+        return Outcome(
+            status=status,
+            failure_count=failure_count,
+            ran_tests=self._ran_tests,
+            summary_line=summary_line,
+        )
+
+    def _feed_line(self, line: str) -> None:
+        if line.startswith("FAILED"):
+            if self._failed_line is None:
+                self._failed_line = line.strip()
+            if _FAILED_STATUS.match(line):
+                self._failed = True
+        elif line.startswith("OK"):
+            if self._ok_line is None:
+                self._ok_line = line.strip()
+            if _OK_STATUS.match(line):
+                self._ok = True
+        elif line.startswith("=") and self._rule_line is None:
+            if _SUMMARY_RULE.match(line):
+                self._rule_line = line.strip()
+
+        if "failed" in line:
+            match = _FAILED_COUNT.search(line)
+            if match:
+                self._failed = True
+                if self._failed_count is None:
+                    self._failed_count = int(match.group(1))
+        if "s=" in line:
+            for match in _ERROR_COUNT.finditer(line):
+                self._error_total = (self._error_total or 0) + int(match.group(1))
+        if self._ran_tests is None and "Ran" in line:
+            match = _RAN_TESTS.search(line)
+            if match:
+                self._ran_tests = int(match.group(1))
+
+        if self.first_failure is None and ("FAIL" in line or "ERROR" in line):
+            match = _FAILING_TEST.match(line)
+            if match:
+                self.first_failure = next(group for group in match.groups() if group)
+                if self._on_failure is not None:
+                    self._on_failure(self.first_failure)
+
+
+def parse_test_output(text: str) -> Outcome:
+    parser = OutcomeParser()
+    parser.feed(text)
+    return parser.close()
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from swebench.harness.constants import UTF8
+
+
+# Patch application strategies, in the order the container tries them.
+GIT_APPLY_CMDS = [
+    "git apply --verbose",
+    "git apply --verbose --reject",
+    "patch --batch --fuzz=5 -p1 -i",
+]
+
+# Host dry runs of the strategies. ``git apply --reject`` exits non-zero
+# whenever a hunk is rejected, so it succeeds exactly where plain
+# ``git apply`` does and needs no check of its own (``--check --reject``
+# would report success for partially applicable patches).
+_HOST_CHECKS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    (GIT_APPLY_CMDS[0], ("git", "apply", "--check")),
+    (GIT_APPLY_CMDS[2], ("patch", "--batch", "--fuzz=5", "-p1", "--dry-run", "-i")),
+)
+
+_CHECK_TIMEOUT = 60
+
+
+class PatchRejectedError(Exception):
+    pass
+
+
+def _excerpt(output: bytes, limit: int = 500) -> str:
+    text = output.decode(UTF8, errors="replace").strip()
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+class PatchChecker:
+    """Dry-run patches against a host project mirror before any container starts.
+
+    ``check`` returns the first strategy of ``GIT_APPLY_CMDS`` whose host dry
+    run succeeds, raises ``PatchRejectedError`` when none does, and returns
+    ``None`` when the host cannot decide (a tool is missing or hangs), in
+    which case the container tries every strategy as before. Verdicts are
+    remembered per mirror and patch, so a retried run skips the dry runs.
+    Mirrors are never written to.
+    """
+
+    def __init__(self, *, logger: logging.Logger):
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._verdicts: Dict[Tuple[str, str], Tuple[Optional[str], str]] = {}
+
+    def check(self, project_dir: Path, patch: str) -> Optional[str]:
+        project_dir = Path(project_dir).resolve()
+        key = (str(project_dir), hashlib.sha256(patch.encode(UTF8)).hexdigest())
+        with self._lock:
+            verdict = self._verdicts.get(key)
+        if verdict is None:
+            verdict = self._dry_run(project_dir, patch)
+            if verdict is None:
+                return None
+            with self._lock:
+                self._verdicts[key] = verdict
+        strategy, error = verdict
+        if strategy is None:
+            raise PatchRejectedError(error)
+        return strategy
+
+    def _dry_run(
+        self, project_dir: Path, patch: str
+    ) -> Optional[Tuple[Optional[str], str]]:
+        env = dict(os.environ)
+        # Ignore host git configuration and any repository above the mirror.
+        env.update(
+            GIT_CEILING_DIRECTORIES=str(project_dir.parent),
+            GIT_CONFIG_NOSYSTEM="1",
+            GIT_CONFIG_GLOBAL=os.devnull,
+        )
+        with tempfile.NamedTemporaryFile("w", suffix=".diff", encoding=UTF8) as handle:
+            handle.write(patch)
+            handle.flush()
+            error = ""
+            for strategy, argv in _HOST_CHECKS:
+                try:
+                    result = subprocess.run(
+                        [*argv, handle.name],
+                        cwd=project_dir,
+                        env=env,
+                        stdin=subprocess.DEVNULL,
+                        capture_output=True,
+                        timeout=_CHECK_TIMEOUT,
+                    )
+                except (OSError, subprocess.TimeoutExpired) as exc:
+                    self._logger.debug("Host patch check unavailable: %s", exc)
+                    return None
+                if result.returncode == 0:
+                    return strategy, ""
+                error = _excerpt(result.stderr or result.stdout)
+                self._logger.debug("Host dry run failed: %s", " ".join(argv))
+        return None, f"No apply strategy succeeded on the host: {error}"
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tarfile
+import threading
+import uuid
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, Iterator, Optional
+
+from swebench.harness.constants import DOCKER_WORKDIR, UTF8
+
+
+class ProjectMirrorError(Exception):
+    pass
+
+
+class _ChunkReader(io.RawIOBase):
+    """File-like view over the byte chunks of a docker archive stream."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = chunk
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def extract_archive(chunks: Iterable[bytes], destination: Path) -> None:
+    """Unpack a ``get_archive`` stream into ``destination`` without buffering it."""
+    reader = io.BufferedReader(_ChunkReader(chunks), buffer_size=1 << 20)
+    with tarfile.open(fileobj=reader, mode="r|") as archive:
+        archive.extractall(destination, filter="tar")
+
+
+class ProjectMirrorCache:
+    """Host copies of a container's work tree, shared by key.
+
+    Mirrors are keyed by the image name and the ``HEAD`` commit of the work
+    tree, so every variant of an instance -- and every later run against the
+    same image -- resolves to the same directory. A missing mirror is pulled
+    with a single ``get_archive`` stream, unpacked into a temporary
+    directory and renamed into place, which keeps concurrent writers (other
+    threads or processes) from ever exposing a partial tree. Each use bumps
+    the entry's mtime; beyond ``max_entries`` the least recently used
+    entries are removed, except those ``pin``-ned by a caller still using
+    them.
+
+    Mirrors are shared; callers must treat them as read-only.
+    """
+
+    DEFAULT_MAX_ENTRIES = 32
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        logger: logging.Logger,
+        max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+    ):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self._root = Path(root).resolve()
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._logger = logger
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._pins: Dict[str, int] = {}
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    @staticmethod
+    def key(image: str, commit: str) -> str:
+        digest = hashlib.sha256(f"{image}\0{commit}".encode(UTF8))
+        return digest.hexdigest()[:32]
+
+    def ensure(self, container, image: str) -> Path:
+        """Return the mirror of ``container``'s work tree, extracting it once."""
+        key = self.key(image, self._head_commit(container))
+        target = self._root / key
+        with self._key_lock(key):
+            if target.is_dir():
+                os.utime(target)
+                self._logger.info("Reusing project mirror %s", target)
+                return target
+            self._extract(container, target)
+        self.prune()
+        return target
+
+    def pin(self, path: Path) -> None:
+        """Protect a mirror from eviction until the matching ``unpin``."""
+        name = Path(path).name
+        with self._lock:
+            self._pins[name] = self._pins.get(name, 0) + 1
+
+    def unpin(self, path: Path) -> None:
+        name = Path(path).name
+        with self._lock:
+            count = self._pins.get(name, 0) - 1
+            if count > 0:
+                self._pins[name] = count
+            else:
+                self._pins.pop(name, None)
+
+    def prune(self) -> None:
+        if self._max_entries is None:
+            return
+        with self._lock:
+            in_use = set(self._pins)
+        entries = [
+            entry
+            for entry in self._root.iterdir()
+            if entry.is_dir() and not entry.name.startswith(".")
+        ]
+        excess = len(entries) - self._max_entries
+        if excess <= 0:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if excess <= 0:
+                break
+            if entry.name in in_use:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            self._logger.info("Evicted project mirror %s", entry)
+            excess -= 1
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _head_commit(container) -> str:
+        result = container.exec_run(["git", "-C", DOCKER_WORKDIR, "rev-parse", "HEAD"])
+        if result.exit_code != 0:
+            raise ProjectMirrorError(
+                f"Could not resolve HEAD of {DOCKER_WORKDIR}: "
+                f"{result.output.decode(UTF8, errors='replace') if result.output else ''}"
+            )
+        return result.output.decode(UTF8).strip()
+
+    def _extract(self, container, target: Path) -> None:
+        staging = self._root / f".tmp-{uuid.uuid4().hex}"
+        staging.mkdir()
+        try:
+            chunks, _ = container.get_archive(DOCKER_WORKDIR)
+            extract_archive(chunks, staging)
+            extracted = staging / PurePosixPath(DOCKER_WORKDIR).name
+            if not extracted.is_dir():
+                raise ProjectMirrorError(
+                    f"Archive of {DOCKER_WORKDIR} did not contain the work tree"
+                )
+            try:
+                extracted.rename(target)
+            except OSError:
+                # Another process renamed its copy into place first.
+                if not target.is_dir():
+                    raise
+            self._logger.info("Mirrored %s to %s", DOCKER_WORKDIR, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
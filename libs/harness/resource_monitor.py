@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Optional
+
+
+@dataclass
+class ResourceUsage:
+    """Container resource use over a sampling window, from docker stats."""
+
+    samples: int = 0
+    cpu_seconds: Optional[float] = None
+    cpu_percent_mean: Optional[float] = None
+    cpu_percent_max: Optional[float] = None
+    memory_peak_bytes: Optional[int] = None
+    memory_limit_bytes: Optional[int] = None
+    block_read_bytes: Optional[int] = None
+    block_write_bytes: Optional[int] = None
+    net_rx_bytes: Optional[int] = None
+    net_tx_bytes: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _cpu_total(stats: Dict[str, Any], key: str) -> int:
+    return int((stats.get(key) or {}).get("cpu_usage", {}).get("total_usage") or 0)
+
+
+def _system_total(stats: Dict[str, Any], key: str) -> int:
+    return int((stats.get(key) or {}).get("system_cpu_usage") or 0)
+
+
+def _cpu_percent(stats: Dict[str, Any]) -> Optional[float]:
+    cpu_delta = _cpu_total(stats, "cpu_stats") - _cpu_total(stats, "precpu_stats")
+    system_delta = _system_total(stats, "cpu_stats") - _system_total(stats, "precpu_stats")
+    if not _system_total(stats, "precpu_stats") or system_delta <= 0 or cpu_delta < 0:
+        return None
+    cpu_stats = stats.get("cpu_stats") or {}
+    online = cpu_stats.get("online_cpus") or len(
+        cpu_stats.get("cpu_usage", {}).get("percpu_usage") or [None]
+    )
+    return cpu_delta / system_delta * online * 100.0
+
+
+def _block_bytes(stats: Dict[str, Any]) -> Dict[str, int]:
+    totals = {"read": 0, "write": 0}
+    entries = (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []
+    for entry in entries:
+        op = str(entry.get("op", "")).lower()
+        if op in totals:
+            totals[op] += int(entry.get("value") or 0)
+    return totals
+
+
+def _net_bytes(stats: Dict[str, Any]) -> Dict[str, int]:
+    totals = {"rx": 0, "tx": 0}
+    for interface in (stats.get("networks") or {}).values():
+        totals["rx"] += int(interface.get("rx_bytes") or 0)
+        totals["tx"] += int(interface.get("tx_bytes") or 0)
+    return totals
+
+
+def summarize_stats(samples: Iterable[Dict[str, Any]]) -> ResourceUsage:
+    """Fold docker stats samples into a ``ResourceUsage``.
+
+    Counters are cumulative since the container started (a pooled container
+    may have run earlier work), so CPU time and IO are reported as deltas
+    between the first and the last sample.
+    """
+    samples = [sample for sample in samples if isinstance(sample, dict)]
+    usage = ResourceUsage(samples=len(samples))
+    if not samples:
+        return usage
+    first, last = samples[0], samples[-1]
+
+    # The first sample's previous reading extends the window back one interval.
+    cpu_start = _cpu_total(first, "precpu_stats") or _cpu_total(first, "cpu_stats")
+    usage.cpu_seconds = round(max(0, _cpu_total(last, "cpu_stats") - cpu_start) / 1e9, 3)
+    percents = [p for p in (_cpu_percent(sample) for sample in samples) if p is not None]
+    if percents:
+        usage.cpu_percent_mean = round(sum(percents) / len(percents), 1)
+        usage.cpu_percent_max = round(max(percents), 1)
+
+    memory = [sample.get("memory_stats") or {} for sample in samples]
+    peaks = [int(m.get("max_usage") or m.get("usage") or 0) for m in memory]
+    if any(peaks):
+        usage.memory_peak_bytes = max(peaks)
+    limit = memory[-1].get("limit")
+    usage.memory_limit_bytes = int(limit) if limit else None
+
+    block_first, block_last = _block_bytes(first), _block_bytes(last)
+    usage.block_read_bytes = max(0, block_last["read"] - block_first["read"])
+    usage.block_write_bytes = max(0, block_last["write"] - block_first["write"])
+    net_first, net_last = _net_bytes(first), _net_bytes(last)
+    usage.net_rx_bytes = max(0, net_last["rx"] - net_first["rx"])
+    usage.net_tx_bytes = max(0, net_last["tx"] - net_first["tx"])
+    return usage
+
+
+class ResourceSampler:
+    """Collect docker stats for a container on a background thread.
+
+    Used as a context manager around the work to measure; the docker stats
+    stream delivers about one sample per second. Stats are best effort: if
+    the stream fails the run goes on and ``usage`` covers what arrived.
+    """
+
+    _STOP_TIMEOUT = 3.0
+
+    def __init__(self, container, *, logger: logging.Logger):
+        self._container = container
+        self._logger = logger
+        self._samples: list = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> ResourceSampler:
+        self._thread = threading.Thread(
+            target=self._run, name="docker-stats", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self._STOP_TIMEOUT)
+
+    @property
+    def usage(self) -> ResourceUsage:
+        with self._lock:
+            samples = list(self._samples)
+        return summarize_stats(samples)
+
+    def _run(self) -> None:
+        try:
+            for sample in self._container.stats(stream=True, decode=True):
+                with self._lock:
+                    self._samples.append(sample)
+                if self._stop.is_set():
+                    return
+        except Exception as exc:
+            self._logger.debug("Docker stats unavailable: %s", exc)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+from libs.harness.json_store import read_json_dict, write_json_atomic
+from libs.harness.snapshots import tracer_version
+
+from swebench.harness.constants import UTF8
+
+
+_ENTRY_FILE = "entry.json"
+_OUTPUTS_DIR = "outputs"
+
+
+def _directory_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+class RunResultCache:
+    """Content-addressed cache of finished test runs on the local disk.
+
+    An entry holds a run's ``RunResult`` payload and a copy of everything
+    the run left in its output directory (test output, traces). Entries are
+    keyed by the instance image digest, the patch, the eval script and the
+    tracer sources, so any change that could alter the outcome misses.
+    Entries are written to a temporary directory and renamed into place;
+    each hit bumps the entry's mtime, and beyond ``max_bytes`` the least
+    recently used entries are removed.
+    """
+
+    DEFAULT_MAX_BYTES = 20 * 1024**3
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        tracer_dir: Path,
+        logger: logging.Logger,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+    ):
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be >= 1")
+        self._root = Path(root).resolve()
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._logger = logger
+        self._max_bytes = max_bytes
+        self._tracer_version = tracer_version(tracer_dir)
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def key(
+        self,
+        image_digest: str,
+        patch: Optional[str],
+        eval_script: str,
+        environment: Optional[Mapping[str, str]] = None,
+    ) -> str:
+        """``patch`` is ``None`` for runs that skip patch application;
+        ``environment`` is any extra environment the eval script runs with."""
+        patch_hash = (
+            "<no patch>"
+            if patch is None
+            else hashlib.sha256(patch.encode(UTF8)).hexdigest()
+        )
+        extra_env = "".join(
+            f"{name}={value}\n" for name, value in sorted((environment or {}).items())
+        )
+        digest = hashlib.sha256()
+        for part in (
+            image_digest,
+            patch_hash,
+            hashlib.sha256(eval_script.encode(UTF8)).hexdigest(),
+            extra_env,
+            self._tracer_version,
+        ):
+            digest.update(part.encode(UTF8))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached ``RunResult`` payload for ``key``, if any."""
+        payload = read_json_dict(self._root / key / _ENTRY_FILE).get("result")
+        return payload if isinstance(payload, dict) else None
+
+    def restore_outputs(self, key: str, output_dir: Path) -> bool:
+        """Copy a cached run's outputs into ``output_dir``."""
+        entry = self._root / key
+        try:
+            shutil.copytree(entry / _OUTPUTS_DIR, output_dir, dirs_exist_ok=True)
+            os.utime(entry)
+        except OSError as exc:
+            # Evicted while we were reading it.
+            self._logger.debug("Result cache entry %s unreadable: %s", key, exc)
+            return False
+        return True
+
+    def put(self, key: str, output_dir: Path, payload: Dict[str, Any]) -> None:
+        target = self._root / key
+        if target.is_dir():
+            os.utime(target)
+            return
+        staging = self._root / f".tmp-{uuid.uuid4().hex}"
+        try:
+            shutil.copytree(output_dir, staging / _OUTPUTS_DIR)
+            size = _directory_size(staging)
+            write_json_atomic(
+                staging / _ENTRY_FILE, {"size": size, "result": payload}
+            )
+            try:
+                staging.rename(target)
+            except OSError:
+                # Another worker stored the same run first.
+                if not target.is_dir():
+                    raise
+        except OSError as exc:
+            self._logger.warning("Could not cache run result: %s", exc)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        self.prune()
+
+    def prune(self) -> None:
+        if self._max_bytes is None:
+            return
+        entries = []
+        total = 0
+        for entry in self._root.iterdir():
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            size = read_json_dict(entry / _ENTRY_FILE).get("size")
+            if not isinstance(size, int):
+                size = _directory_size(entry)
+            entries.append((mtime, size, entry))
+            total += size
+        if total <= self._max_bytes:
+            return
+        entries.sort(key=lambda item: item[0])
+        evicted = 0
+        for _, size, entry in entries:
+            if total <= self._max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            evicted += 1
+        self._logger.info("Evicted %d cached run result(s)", evicted)
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from libs.harness.json_store import file_lock, read_json_dict, write_json_atomic
+
+
+T = TypeVar("T")
+
+
+class PhaseTimer:
+    """Accumulates wall-clock seconds per named phase of a run."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = round(self.phases.get(name, 0.0) + elapsed, 3)
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+
+# Kinds of run kept apart in the history: a hanging LLM patch must not
+# inflate the timeout of the instance's unpatched baseline.
+RUN_BASELINE = "baseline"
+RUN_PATCHED = "patched"
+_RUN_KINDS = (RUN_BASELINE, RUN_PATCHED)
+
+
+def _history_key(instance_id: str, kind: str) -> str:
+    if kind not in _RUN_KINDS:
+        raise ValueError(f"Unknown run kind: {kind!r}")
+    # Baseline records keep the bare instance id of older history files.
+    return instance_id if kind == RUN_BASELINE else f"{instance_id}::{kind}"
+
+
+@dataclass
+class RuntimeRecord:
+    runs: int = 0
+    # Exponentially weighted means, in seconds.
+    wall: float = 0.0
+    eval: float = 0.0
+    max_eval: float = 0.0
+    timeouts: int = 0
+    phases: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> RuntimeRecord:
+        known = {name: data[name] for name in cls.__dataclass_fields__ if name in data}
+        return cls(**known)
+
+
+class RuntimeHistory:
+    """Per-instance runtimes persisted across runs, for scheduling and timeouts.
+
+    Baseline (unpatched) and patched runs of an instance are kept as
+    separate records. Every recorded run updates an exponentially weighted mean of the wall
+    time, the eval (test) time and each phase, plus the slowest eval seen.
+    Records are merged into the JSON file under a file lock right away, so
+    parallel workers and concurrent sweeps share one history.
+    """
+
+    DEFAULT_ALPHA = 0.5
+    DEFAULT_TIMEOUT_FACTOR = 3.0
+    DEFAULT_MIN_TIMEOUT = 120
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        alpha: float = DEFAULT_ALPHA,
+        timeout_factor: float = DEFAULT_TIMEOUT_FACTOR,
+        min_timeout: int = DEFAULT_MIN_TIMEOUT,
+    ):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        if timeout_factor < 1:
+            raise ValueError("timeout_factor must be >= 1")
+        self._path = Path(path)
+        self._alpha = alpha
+        self._timeout_factor = timeout_factor
+        self._min_timeout = min_timeout
+        self._lock = threading.Lock()
+        self._records: Dict[str, RuntimeRecord] = self._load()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def get(self, instance_id: str, kind: str = RUN_BASELINE) -> Optional[RuntimeRecord]:
+        with self._lock:
+            return self._records.get(_history_key(instance_id, kind))
+
+    def expected(self, instance_id: str) -> Optional[float]:
+        """Expected wall time of an instance, summed over its kinds of run."""
+        walls = [
+            record.wall
+            for record in (self.get(instance_id, kind) for kind in _RUN_KINDS)
+            if record is not None and record.runs
+        ]
+        return sum(walls) if walls else None
+
+    def timeout_for(
+        self,
+        instance_id: str,
+        default: Optional[int] = None,
+        *,
+        kind: str = RUN_BASELINE,
+    ) -> Optional[int]:
+        """``timeout_factor`` x the slowest eval seen, or ``default`` without history.
+
+        A run that hit its timeout is recorded with the timeout as its eval
+        time, so the next derived timeout grows instead of repeating it --
+        but never beyond ``default`` when one is given.
+        """
+        record = self.get(instance_id, kind)
+        if record is None or not record.runs or record.max_eval <= 0:
+            return default
+        derived = max(self._min_timeout, math.ceil(record.max_eval * self._timeout_factor))
+        return derived if default is None else min(derived, default)
+
+    def longest_first(
+        self, items: Iterable[T], *, key: Callable[[T], str] = lambda item: item
+    ) -> List[T]:
+        """Order items by expected runtime, slowest first.
+
+        Instances without history go first: they may well be slow, and
+        running them early also fills in their history.
+
+        Fed to an ``ImageBuildPlanner``, this order is a build priority:
+        items come out as their images are ready, cached ones first. Pass
+        each item's position as the ``InstanceScheduler.run`` priority so
+        that items waiting for a worker also start longest-first.
+        """
+        def sort_key(item: T) -> float:
+            expected = self.expected(key(item))
+            return -math.inf if expected is None else -expected
+
+        return sorted(items, key=sort_key)
+
+    def record(
+        self,
+        instance_id: str,
+        phases: Dict[str, float],
+        *,
+        kind: str = RUN_BASELINE,
+        eval_time: Optional[float] = None,
+        timed_out: bool = False,
+    ) -> RuntimeRecord:
+        key = _history_key(instance_id, kind)
+        wall = sum(phases.values())
+        with self._lock, file_lock(self._path):
+            # Start from the file: another process may have recorded since.
+            on_disk = read_json_dict(self._path)
+            previous = on_disk.get(key)
+            if isinstance(previous, dict):
+                record = RuntimeRecord.from_dict(previous)
+            else:
+                record = self._records.get(key) or RuntimeRecord()
+            record = self._updated(record, phases, wall, eval_time, timed_out)
+            on_disk[key] = asdict(record)
+            write_json_atomic(self._path, on_disk)
+            self._records[key] = record
+        return record
+
+    def _updated(
+        self,
+        record: RuntimeRecord,
+        phases: Dict[str, float],
+        wall: float,
+        eval_time: Optional[float],
+        timed_out: bool,
+    ) -> RuntimeRecord:
+        def mean(old: float, new: float) -> float:
+            if not record.runs:
+                return round(new, 3)
+            return round(old + self._alpha * (new - old), 3)
+
+        merged_phases = dict(record.phases)
+        for name, seconds in phases.items():
+            merged_phases[name] = mean(merged_phases.get(name, seconds), seconds)
+        eval_seconds = eval_time if eval_time is not None else record.eval
+        return RuntimeRecord(
+            runs=record.runs + 1,
+            wall=mean(record.wall, wall),
+            eval=mean(record.eval, eval_seconds),
+            max_eval=round(max(record.max_eval, eval_seconds), 3),
+            timeouts=record.timeouts + int(timed_out),
+            phases=merged_phases,
+        )
+
+    def _load(self) -> Dict[str, RuntimeRecord]:
+        records: Dict[str, RuntimeRecord] = {}
+        for instance_id, data in read_json_dict(self._path).items():
+            if isinstance(data, dict):
+                try:
+                    records[instance_id] = RuntimeRecord.from_dict(data)
+                except TypeError:
+                    continue
+        return records
@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import docker
+from docker.errors import ImageNotFound
+
+from libs.harness.concurrency import ConcurrencyLimits
+
+from swebench.harness.constants import DOCKER_USER, DOCKER_WORKDIR, UTF8
+from swebench.harness.docker_utils import cleanup_container
+from swebench.harness.test_spec.test_spec import TestSpec
+
+
+SNAPSHOT_REPOSITORY_PREFIX = "sweb.snapshot"
+
+LABEL_SNAPSHOT = "auto_debug.snapshot"
+LABEL_INSTANCE = "auto_debug.instance_id"
+LABEL_SPEC_HASH = "auto_debug.spec_hash"
+LABEL_TRACER_VERSION = "auto_debug.tracer_version"
+LABEL_CREATED = "auto_debug.created"
+
+_SCRIPT_HEADER = ("#!/bin/bash", "set -uxo pipefail")
+_TEST_OUTPUT_MARKER = "Start Test Output"
+
+# Setup commands whose effect lives in the image (installed packages, global
+# git config) or that only print diagnostics. Everything else before the test
+# marker -- shell state such as ``conda activate``/``cd``/``export`` and the
+# work-tree edits that reset and re-apply the test files -- is replayed on
+# every run started from a snapshot.
+_SETUP_ONLY_PREFIXES = (
+    "conda install",
+    "conda env update",
+    "apt-get",
+    "locale-gen",
+    "git status",
+    "git show",
+    "git diff",
+    "git -c core.fileMode=false diff",
+    "git config --global",
+)
+# The spec's install step builds the work tree (C extensions, entry points,
+# version metadata). It only carries over from the snapshot while the tree is
+# unchanged, so runs that apply a patch replay it.
+_INSTALL_PREFIXES = (
+    "pip install",
+    "pip3 install",
+    "python -m pip install",
+    "python3 -m pip install",
+    "python setup.py",
+)
+_BLOCK_OPENERS = ("if", "for", "while", "until", "case")
+_BLOCK_CLOSERS = ("fi", "done", "esac")
+
+
+def _render_script(lines: Sequence[str]) -> str:
+    return "\n".join([*_SCRIPT_HEADER, *lines]) + "\n"
+
+
+def _first_word(line: str) -> str:
+    stripped = line.strip()
+    return stripped.split(None, 1)[0].rstrip(";") if stripped else ""
+
+
+def split_eval_script(
+    eval_script_list: Sequence[str],
+) -> Tuple[List[str], List[str], List[str], List[str]]:
+    """Split an eval script into ``(setup, replay, patched_replay, tests)``.
+
+    ``setup`` is everything before the test-output marker; ``replay`` is the
+    part of it that a container started from a snapshot still has to run;
+    ``patched_replay`` adds the install commands, which a patched work tree
+    needs again; ``tests`` is the marker and everything after it. Commands
+    are only dropped at the top level, so ``if``/``fi`` blocks stay intact.
+    """
+    setup: List[str] = []
+    replay: List[str] = []
+    patched_replay: List[str] = []
+    tests: List[str] = []
+    depth = 0
+    for index, line in enumerate(eval_script_list):
+        if _TEST_OUTPUT_MARKER in line:
+            tests = list(eval_script_list[index:])
+            break
+        setup.append(line)
+        word = _first_word(line)
+        if word in _BLOCK_CLOSERS:
+            depth = max(0, depth - 1)
+        top_level = depth == 0
+        if word in _BLOCK_OPENERS:
+            depth += 1
+        if top_level and line.strip().startswith(_SETUP_ONLY_PREFIXES):
+            continue
+        patched_replay.append(line)
+        if not (top_level and line.strip().startswith(_INSTALL_PREFIXES)):
+            replay.append(line)
+    return setup, replay, patched_replay, tests
+
+
+def tracer_version(tracer_dir: Path) -> str:
+    """Content hash of the tracer sources mounted into containers."""
+    root = Path(tracer_dir).resolve()
+    digest = hashlib.sha256()
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or "__pycache__" in path.parts:
+            continue
+        digest.update(path.relative_to(root).as_posix().encode(UTF8))
+        digest.update(b"\0")
+        digest.update(path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class SnapshotPlan:
+    instance_id: str
+    base_image: str
+    spec_hash: str
+    setup_lines: Tuple[str, ...]
+    replay_lines: Tuple[str, ...]
+    patched_replay_lines: Tuple[str, ...]
+    test_lines: Tuple[str, ...]
+
+    @classmethod
+    def from_spec(cls, spec: TestSpec) -> SnapshotPlan:
+        setup, replay, patched_replay, tests = split_eval_script(spec.eval_script_list)
+        digest = hashlib.sha256()
+        digest.update(spec.instance_image_key.encode(UTF8))
+        digest.update(b"\0")
+        digest.update(_render_script(setup).encode(UTF8))
+        return cls(
+            instance_id=spec.instance_id,
+            base_image=spec.instance_image_key,
+            spec_hash=digest.hexdigest(),
+            setup_lines=tuple(setup),
+            replay_lines=tuple(replay),
+            patched_replay_lines=tuple(patched_replay),
+            test_lines=tuple(tests),
+        )
+
+    @property
+    def setup_script(self) -> str:
+        return _render_script(self.setup_lines)
+
+    @property
+    def replay_script(self) -> str:
+        """The setup a snapshot container needs before its work tree is usable."""
+        return _render_script(self.replay_lines)
+
+    @property
+    def test_script(self) -> str:
+        """Eval script for an unpatched container started from the snapshot."""
+        return _render_script(self.replay_lines + self.test_lines)
+
+    @property
+    def patched_test_script(self) -> str:
+        """Eval script for a snapshot container whose work tree was patched."""
+        return _render_script(self.patched_replay_lines + self.test_lines)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    image: str
+    plan: SnapshotPlan
+
+
+class SnapshotStore:
+    """Images of instance containers committed after the eval setup has run.
+
+    The first run of an instance executes the setup part of its eval script
+    in a throwaway container, resets the work tree and commits the result as
+    ``sweb.snapshot.<instance>:<spec hash>-<tracer version>``. Later runs
+    start from that image with ``SnapshotPlan.test_script``, which skips the
+    installs and diagnostics, or ``patched_test_script``, which reinstalls
+    the patched work tree. Snapshots built by older tracer sources are
+    pruned, as are the oldest ones beyond ``max_images`` or older than
+    ``max_age``; snapshots used by this store are never pruned while it
+    lives. A failed setup is remembered and the caller falls back to the full
+    eval script.
+    """
+
+    DEFAULT_MAX_IMAGES = 50
+    DEFAULT_MAX_AGE = timedelta(days=7)
+
+    def __init__(
+        self,
+        client: docker.DockerClient,
+        *,
+        tracer_dir: Path,
+        logger: logging.Logger,
+        limits: Optional[ConcurrencyLimits] = None,
+        max_images: Optional[int] = DEFAULT_MAX_IMAGES,
+        max_age: Optional[timedelta] = DEFAULT_MAX_AGE,
+    ):
+        if max_images is not None and max_images < 1:
+            raise ValueError("max_images must be >= 1")
+        self._client = client
+        self._tracer_dir = Path(tracer_dir).resolve()
+        self._logger = logger
+        self._limits = limits or ConcurrencyLimits.unlimited()
+        self._max_images = max_images
+        self._max_age = max_age
+        self._tracer_version = tracer_version(self._tracer_dir)
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._failed: Set[str] = set()
+        self._in_use: Set[str] = set()
+
+    @property
+    def tracer_version(self) -> str:
+        return self._tracer_version
+
+    def image_name(self, plan: SnapshotPlan) -> str:
+        repository = f"{SNAPSHOT_REPOSITORY_PREFIX}.{plan.instance_id.lower()}"
+        return f"{repository}:{plan.spec_hash[:16]}-{self._tracer_version[:12]}"
+
+    def ensure(self, spec: TestSpec) -> Optional[Snapshot]:
+        """Return the snapshot for ``spec``, building it on first use."""
+        plan = SnapshotPlan.from_spec(spec)
+        if not plan.test_lines:
+            return None
+        image = self.image_name(plan)
+        with self._key_lock(image):
+            if image in self._failed:
+                return None
+            built = False
+            if not self._exists(image):
+                try:
+                    with self._limits.build():
+                        self._build(spec, plan, image)
+                except Exception as exc:
+                    self._failed.add(image)
+                    self._logger.warning(
+                        "Snapshot build failed for %s, running full setup: %s",
+                        plan.instance_id,
+                        exc,
+                    )
+                    return None
+                built = True
+            with self._lock:
+                self._in_use.add(image)
+        if built:
+            self.prune()
+        return Snapshot(image=image, plan=plan)
+
+    def prune(self) -> List[str]:
+        """Remove stale snapshots; returns the image names removed."""
+        try:
+            images = self._client.images.list(filters={"label": LABEL_SNAPSHOT})
+        except Exception as exc:
+            self._logger.warning("Listing snapshot images failed: %s", exc)
+            return []
+
+        now = datetime.now(timezone.utc)
+        candidates = []
+        for image in images:
+            labels = image.labels or {}
+            names = [tag for tag in image.tags if tag.startswith(SNAPSHOT_REPOSITORY_PREFIX)]
+            with self._lock:
+                if any(name in self._in_use for name in names):
+                    continue
+            created = _parse_created(labels.get(LABEL_CREATED))
+            candidates.append((created, labels.get(LABEL_TRACER_VERSION), image, names))
+        candidates.sort(key=lambda item: item[0], reverse=True)
+
+        removed: List[str] = []
+        kept = 0
+        with self._lock:
+            kept_in_use = len(self._in_use)
+        for created, version, image, names in candidates:
+            stale = version != self._tracer_version
+            expired = self._max_age is not None and now - created > self._max_age
+            over = self._max_images is not None and kept + kept_in_use >= self._max_images
+            if not (stale or expired or over):
+                kept += 1
+                continue
+            try:
+                self._client.images.remove(image.id, noprune=False)
+            except Exception as exc:
+                # Usually a container still runs from it; try again next time.
+                self._logger.debug("Could not remove snapshot %s: %s", names, exc)
+                kept += 1
+                continue
+            removed.extend(names or [image.id])
+        if removed:
+            self._logger.info("Pruned %d snapshot image(s)", len(removed))
+        return removed
+
+    def _key_lock(self, image: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(image, threading.Lock())
+
+    def _exists(self, image: str) -> bool:
+        try:
+            self._client.images.get(image)
+        except ImageNotFound:
+            return False
+        return True
+
+    def _build(self, spec: TestSpec, plan: SnapshotPlan, image: str) -> None:
+        self._logger.info("Building snapshot %s", image)
+        start = time.monotonic()
+        container = self._client.containers.create(
+            image=plan.base_image,
+            name=f"{SNAPSHOT_REPOSITORY_PREFIX}.build.{uuid.uuid4().hex[:12]}",
+            user=DOCKER_USER,
+            detach=True,
+            command="tail -f /dev/null",
+            platform=spec.platform,
+            volumes={str(self._tracer_dir): {"bind": "/opt/tracers", "mode": "ro"}},
+        )
+        try:
+            container.start()
+            self._exec(container, plan.setup_script, "setup")
+            # Only the environment goes into the snapshot; the test-file edits
+            # are replayed by the test script on top of the model patch.
+            self._exec(container, f"git -C {DOCKER_WORKDIR} reset --hard -q", "reset")
+            repository, tag = image.rsplit(":", 1)
+            labels = {
+                LABEL_SNAPSHOT: "1",
+                LABEL_INSTANCE: plan.instance_id,
+                LABEL_SPEC_HASH: plan.spec_hash,
+                LABEL_TRACER_VERSION: self._tracer_version,
+                LABEL_CREATED: datetime.now(timezone.utc).isoformat(),
+            }
+            container.commit(
+                repository=repository,
+                tag=tag,
+                changes=[f'LABEL {key}="{value}"' for key, value in labels.items()],
+            )
+        finally:
+            cleanup_container(self._client, container, self._logger)
+        self._logger.info(
+            "Snapshot %s built in %.1fs", image, time.monotonic() - start
+        )
+
+    @staticmethod
+    def _exec(container, script: str, what: str) -> None:
+        result = container.exec_run(
+            ["/bin/bash", "-c", script], workdir=DOCKER_WORKDIR, user=DOCKER_USER
+        )
+        if result.exit_code != 0:
+            output = result.output.decode(UTF8, errors="replace") if result.output else ""
+            raise RuntimeError(
+                f"Snapshot {what} exited with {result.exit_code}: {output[-2000:]}"
+            )
+
+
+def _parse_created(value: Optional[str]) -> datetime:
+    if value:
+        try:
+            created = datetime.fromisoformat(value)
+        except ValueError:
+            pass
+        else:
+            return created if created.tzinfo else created.replace(tzinfo=timezone.utc)
+    return datetime.fromtimestamp(0, timezone.utc)
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import os
+import re
+import tarfile
+import uuid
+from contextlib import AbstractContextManager
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import docker
+
+from swebench.harness.constants import DOCKER_WORKDIR, UTF8
+
+
+_DIFF_HEADER = re.compile(r"^diff --git a/(\S+) b/(\S+)$", re.MULTILINE)
+_CHECKOUT = re.compile(r"^git checkout \S+ (.+)$", re.MULTILINE)
+
+
+def _container_path(path: str) -> str:
+    posix = PurePosixPath(path)
+    if not posix.is_absolute():
+        posix = PurePosixPath(DOCKER_WORKDIR) / posix
+    return str(posix)
+
+
+def setup_touched_paths(setup_script: str) -> Set[str]:
+    """Work-tree paths the setup rewrites (test files reset and re-patched)."""
+    touched: Set[str] = set()
+    for match in _DIFF_HEADER.finditer(setup_script):
+        touched.update(match.groups())
+    for match in _CHECKOUT.finditer(setup_script):
+        touched.update(match.group(1).split())
+    return {_container_path(path) for path in touched}
+
+
+class SourceReader:
+    """Read source files out of an instance container in one round trip.
+
+    Paths are served, in order, from the host project mirror (work-tree
+    files the setup script does not touch), from the host cache, and finally
+    from a single ``tar`` stream of everything still missing, taken in a
+    container after the setup script has run. Container reads are cached on
+    the host per image digest, setup script and path, so repeated reads for
+    the same instance never start a container.
+    """
+
+    def __init__(
+        self,
+        client: docker.DockerClient,
+        *,
+        cache_root: Path,
+        logger: logging.Logger,
+    ):
+        self._client = client
+        self._cache_root = Path(cache_root).resolve()
+        self._logger = logger
+
+    def read(
+        self,
+        paths: Iterable[str],
+        *,
+        image: str,
+        setup_script: str,
+        acquire: Callable[[], AbstractContextManager],
+        mirror: Optional[Path] = None,
+    ) -> Dict[str, str]:
+        """Return ``{path: text}`` for every path that could be read.
+
+        ``acquire`` is only called when something has to come from a
+        container; it must yield a running container of ``image``.
+        """
+        wanted = {path: _container_path(path) for path in dict.fromkeys(paths)}
+        found: Dict[str, str] = {}
+        touched = setup_touched_paths(setup_script)
+
+        if mirror is not None:
+            for path, resolved in wanted.items():
+                text = self._read_mirror(mirror, resolved, touched)
+                if text is not None:
+                    found[path] = text
+
+        cache_dir = self._cache_root / self._namespace(image, setup_script)
+        for path, resolved in wanted.items():
+            if path not in found:
+                text = self._read_cache(cache_dir, resolved)
+                if text is not None:
+                    found[path] = text
+
+        missing = {
+            resolved for path, resolved in wanted.items() if path not in found
+        }
+        if missing:
+            with acquire() as container:
+                fetched = self._read_container(container, setup_script, sorted(missing))
+            for resolved, text in fetched.items():
+                self._write_cache(cache_dir, resolved, text)
+            for path, resolved in wanted.items():
+                if path not in found and resolved in fetched:
+                    found[path] = fetched[resolved]
+
+        for path in wanted:
+            if path not in found:
+                self._logger.debug("Could not read context file from image: %s", path)
+        return found
+
+    def _namespace(self, image: str, setup_script: str) -> str:
+        try:
+            digest = self._client.images.get(image).id
+        except Exception:
+            digest = image
+        return hashlib.sha256(
+            f"{digest}\0{setup_script}".encode(UTF8)
+        ).hexdigest()[:32]
+
+    @staticmethod
+    def _read_mirror(mirror: Path, resolved: str, touched: Set[str]) -> Optional[str]:
+        workdir = PurePosixPath(DOCKER_WORKDIR)
+        posix = PurePosixPath(resolved)
+        if resolved in touched or workdir not in posix.parents:
+            return None
+        candidate = mirror / posix.relative_to(workdir)
+        if not candidate.is_file():
+            return None
+        return candidate.read_text(encoding=UTF8, errors="replace")
+
+    @staticmethod
+    def _cache_file(cache_dir: Path, resolved: str) -> Path:
+        return cache_dir / hashlib.sha256(resolved.encode(UTF8)).hexdigest()
+
+    def _read_cache(self, cache_dir: Path, resolved: str) -> Optional[str]:
+        try:
+            return self._cache_file(cache_dir, resolved).read_text(encoding=UTF8)
+        except OSError:
+            return None
+
+    def _write_cache(self, cache_dir: Path, resolved: str, text: str) -> None:
+        target = self._cache_file(cache_dir, resolved)
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(text, encoding=UTF8)
+            os.replace(tmp, target)
+        except OSError as exc:
+            self._logger.debug("Could not cache %s: %s", resolved, exc)
+            tmp.unlink(missing_ok=True)
+
+    def _read_container(
+        self, container, setup_script: str, paths: List[str]
+    ) -> Dict[str, str]:
+        result = container.exec_run(
+            cmd=["/bin/bash", "-c", setup_script],
+            workdir=DOCKER_WORKDIR,
+        )
+        if result.exit_code != 0:
+            self._logger.debug(
+                "Setup script returned %d; some files may be unavailable",
+                result.exit_code,
+            )
+
+        members = [path.lstrip("/") for path in paths]
+        result = container.exec_run(
+            cmd=["tar", "-chf", "-", "--ignore-failed-read", "-C", "/", "--", *members],
+            demux=True,
+        )
+        stdout, stderr = result.output or (None, None)
+        if stderr:
+            self._logger.debug(
+                "tar reported: %s", stderr.decode(UTF8, errors="replace").strip()
+            )
+        if not stdout:
+            return {}
+
+        fetched: Dict[str, str] = {}
+        with tarfile.open(fileobj=io.BytesIO(stdout), mode="r:") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                handle = archive.extractfile(member)
+                if handle is None:
+                    continue
+                fetched["/" + member.name] = handle.read().decode(UTF8, errors="replace")
+        return fetched
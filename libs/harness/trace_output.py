@@ -1,43 +1,11 @@
 from __future__ import annotations
 
-import json
-import logging
 import shutil
 from pathlib import Path
 from typing import Any, Dict, List
 
-logger = logging.getLogger(__name__)
-
-
-class ProjectScope:
-    def __init__(self, path: Path):
-        self._path = path
-        self._closed = False
-
-    @property
-    def path(self) -> Path:
-        return self._path
-
-    def close(self) -> None:
-        if self._closed:
-            return
-        self._closed = True
-        if self._path.exists():
-            try:
-                shutil.rmtree(self._path)
-                logger.info("Cleaned up project mirror: %s", self._path)
-            except OSError:
-                logger.warning(
-                    "Failed to clean up project mirror: %s",
-                    self._path,
-                    exc_info=True,
-                )
-
-    def __enter__(self) -> ProjectScope:
-        return self
-
-    def __exit__(self, *exc_info: object) -> None:
-        self.close()
+from libs.frames import resolve_step_frames_ref
+from libs.tracing._trace_file import load_traces
 
 
 class TraceOutputManager:
@@ -64,18 +32,6 @@ class TraceOutputManager:
     def test_output_file(self, instance_id: str) -> Path:
         return self._base_dir / instance_id / "test_output.txt"
 
-    def project_dir(self, instance_id: str) -> Path:
-        target = self._base_dir / instance_id / "project"
-        target.mkdir(parents=True, exist_ok=True)
-        return target
-
-    def project_scope(self, instance_id: str) -> ProjectScope:
-        target = self.project_dir(instance_id)
-        if any(target.iterdir()):
-            shutil.rmtree(target)
-            target.mkdir(parents=True, exist_ok=True)
-        return ProjectScope(target)
-
     def trace_exists(self, instance_id: str) -> bool:
         return self.trace_file(instance_id).exists()
 
@@ -84,27 +40,29 @@ class TraceOutputManager:
         if not path.exists():
             return []
         try:
-            data = json.loads(path.read_text(encoding="utf-8", errors="replace"))
-        except json.JSONDecodeError:
+            data = load_traces(path)
+        except ValueError:
             return []
-        return data if isinstance(data, list) else []
+        for trace in data:
+            if isinstance(trace, dict):
+                resolve_step_frames_ref(trace, path)
+        return data
 
     def volume_spec(
         self, instance_id: str, tracer_dir: Path
     ) -> Dict[str, Dict[str, str]]:
         instance_dir = self.prepare_instance_dir(instance_id)
-        project_dir = self.project_dir(instance_id)
         tracer_path = Path(tracer_dir).resolve()
         return {
             str(tracer_path): {"bind": "/opt/tracers", "mode": "ro"},
             str(instance_dir): {"bind": "/trace_output", "mode": "rw"},
-            str(project_dir): {"bind": "/project_mirror", "mode": "rw"},
         }
 
     def environment(self) -> Dict[str, str]:
         return {
             "PYTHONPATH": "/opt/tracers:/testbed",
             "AUTO_DEBUG_JSON": "/trace_output/auto_debug.json",
+            "AUTO_DEBUG_FORMAT": "indexed",
         }
 
     def cleanup(self, instance_id: str) -> None:
@@ -1,20 +1,42 @@
 from __future__ import annotations
 
 import logging
+import threading
+import time
 import traceback
+from contextlib import ExitStack
 from dataclasses import dataclass, field
 from pathlib import Path, PurePosixPath
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 import docker
 
+from libs.harness.concurrency import ConcurrencyLimits
+from libs.harness.exec_stream import stream_exec_with_timeout
+from libs.harness.outcome import Outcome, OutcomeParser
+from libs.harness.container_pool import ContainerPool
 from libs.harness.framework_detector import Framework, FrameworkDetector
+from libs.harness.patch_check import GIT_APPLY_CMDS, PatchChecker, PatchRejectedError
+from libs.harness.project_mirror import ProjectMirrorCache
+from libs.harness.resource_monitor import ResourceSampler
+from libs.harness.result_cache import RunResultCache
+from libs.harness.runtime_history import (
+    RUN_BASELINE,
+    RUN_PATCHED,
+    PhaseTimer,
+    RuntimeHistory,
+)
+from libs.harness.snapshots import SnapshotStore
 from libs.harness.trace_output import TraceOutputManager
 from libs.frames import (
-    Frame,
+    TracePostProcessor,
     default_exec_path_pipeline,
     default_traceback_pipeline,
+    resolve_step_frames_ref,
 )
+from libs.tracing import json_codec
+from libs.tracing._targets import DONE_MARKER, TARGETS_ENV
+from libs.tracing._trace_file import load_traces
 
 from swebench.harness.constants import (
     APPLY_PATCH_FAIL,
@@ -28,22 +50,28 @@ from swebench.harness.docker_build import build_instance_image
 from swebench.harness.docker_utils import (
     cleanup_container,
     copy_to_container,
-    exec_run_with_timeout,
 )
 from swebench.harness.test_spec.test_spec import TestSpec
 
 
-_GIT_APPLY_CMDS = [
-    "git apply --verbose",
-    "git apply --verbose --reject",
-    "patch --batch --fuzz=5 -p1 -i",
-]
+# The eval script runs in its own session, so stopping it (early or on
+# timeout) takes down every test process it started.
+_EVAL_PID_FILE = "/tmp/auto_debug_eval.pid"
+_EVAL_CMD = f"setsid -w /bin/bash -c 'echo $$ > {_EVAL_PID_FILE}; exec /bin/bash /eval.sh'"
+_STOP_EVAL_CMD = f"kill -TERM -- -$(cat {_EVAL_PID_FILE}) 2>/dev/null || true"
 
 
 class TraceCollectionError(Exception):
     pass
 
 
+class TestTimeoutError(TraceCollectionError):
+    def __init__(self, timeout: Optional[int], runtime: float):
+        super().__init__(f"Test execution timed out after {timeout}s")
+        self.timeout = timeout
+        self.runtime = runtime
+
+
 @dataclass
 class RunResult:
     success: bool
@@ -55,6 +83,17 @@ class RunResult:
     error: Optional[str] = None
     traceback: Optional[str] = None
     test_output_path: Optional[str] = None
+    project_dir: Optional[str] = None
+    # Wall-clock seconds per phase: patch_check, image, cache, snapshot,
+    # container, verify, mirror, patch, eval, collect, trace_load, trace_process.
+    phases: Dict[str, float] = field(default_factory=dict)
+    # Container CPU/memory/IO use during eval, as ``ResourceUsage.to_dict``.
+    resources: Optional[Dict[str, Any]] = None
+    cached: bool = False
+    # Outcome parsed while the test output streamed in, as ``Outcome.to_dict``.
+    outcome: Optional[Dict[str, Any]] = None
+    # The tests were stopped once all target tests had been traced.
+    stopped_early: bool = False
     traces: List[Dict[str, Any]] = field(default_factory=list)
 
     def to_dict(self) -> Dict[str, Any]:
@@ -64,6 +103,46 @@ class RunResult:
             if v is not None and k != "traces"
         }
 
+    def metrics(self) -> Dict[str, Any]:
+        """Timing and resource figures of the run, for reports and indexes."""
+        return {
+            "runtime": self.runtime,
+            "cached": self.cached,
+            "stopped_early": self.stopped_early,
+            "phases": dict(self.phases),
+            "resources": self.resources,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> RunResult:
+        known = {
+            name: data[name]
+            for name in cls.__dataclass_fields__
+            if name in data and name != "traces"
+        }
+        return cls(**known)
+
+
+class _Evaluation(NamedTuple):
+    test_output_path: Path
+    runtime: float
+    outcome: Outcome
+    stopped_early: bool
+
+
+def trace_post_processor(*, max_workers: Optional[int] = None) -> TracePostProcessor:
+    """Post-processor for ``TracedInstanceRunner`` results.
+
+    Large traces are processed on a process pool that lives until ``close``;
+    create one per script run, share it across runners and close it (or use
+    it as a context manager) when the run ends.
+    """
+    return TracePostProcessor(
+        default_traceback_pipeline(),
+        default_exec_path_pipeline(),
+        max_workers=max_workers,
+    )
+
 
 class TracedInstanceRunner:
     def __init__(
@@ -79,6 +158,15 @@ class TracedInstanceRunner:
         timeout: Optional[int] = None,
         force_rebuild: bool = False,
         nocache: bool = False,
+        limits: Optional[ConcurrencyLimits] = None,
+        pool: Optional[ContainerPool] = None,
+        snapshots: Optional[SnapshotStore] = None,
+        mirrors: Optional[ProjectMirrorCache] = None,
+        history: Optional[RuntimeHistory] = None,
+        result_cache: Optional[RunResultCache] = None,
+        stop_after_targets: bool = False,
+        patch_checker: Optional[PatchChecker] = None,
+        post_processor: Optional[TracePostProcessor] = None,
     ):
         self._client = client
         self._test_spec = test_spec
@@ -90,6 +178,17 @@ class TracedInstanceRunner:
         self._timeout = timeout
         self._force_rebuild = force_rebuild
         self._nocache = nocache
+        self._limits = limits or ConcurrencyLimits.unlimited()
+        self._pool = pool
+        self._snapshots = snapshots
+        self._mirrors = mirrors
+        self._history = history
+        self._result_cache = result_cache
+        self._stop_after_targets = stop_after_targets
+        self._patch_checker = patch_checker
+        # Without a shared post-processor, stay in-process: nothing would
+        # ever shut a private process pool down.
+        self._post_processor = post_processor or trace_post_processor(max_workers=1)
 
         self._prepared_spec: Optional[TestSpec] = None
         self._framework: Optional[Framework] = None
@@ -101,7 +200,16 @@ class TracedInstanceRunner:
             self._prepare_test_spec()
         return self._framework  # type: ignore[return-value]
 
-    def run(self, pred: Dict[str, Any], *, skip_patch: bool = False) -> RunResult:
+    def run(
+        self,
+        pred: Dict[str, Any],
+        *,
+        skip_patch: bool = False,
+        project_dir: Optional[Path] = None,
+    ) -> RunResult:
+        """``project_dir`` is a host mirror of the unpatched work tree; with a
+        patch checker the patch is dry-run against it before any container
+        is started."""
         instance_id = self._test_spec.instance_id
         self._logger.info("=" * 60)
         self._logger.info("Processing: %s", instance_id)
@@ -110,52 +218,131 @@ class TracedInstanceRunner:
         spec = self._prepare_test_spec()
         framework_value = self._framework.value if self._framework else "unknown"
 
+        # A resumed run may find an interrupted attempt's outputs here.
+        self._output_manager.cleanup(instance_id)
         instance_dir = self._output_manager.prepare_instance_dir(instance_id)
         trace_path = self._output_manager.trace_file(instance_id)
         self._logger.info("Trace output: %s", trace_path)
 
+        timer = PhaseTimer()
+        timeout = self._timeout
+        history_kind = RUN_BASELINE if skip_patch else RUN_PATCHED
+        if self._history is not None:
+            timeout = self._history.timeout_for(
+                instance_id, self._timeout, kind=history_kind
+            )
+        eval_time: Optional[float] = None
+        timed_out = False
+        cache_key: Optional[str] = None
+        evaluation: Optional[_Evaluation] = None
+        sampler: Optional[ResourceSampler] = None
+
         container = None
+        container_slot = ExitStack()
         try:
-            self._ensure_image(spec)
-
-            container = self._start_container(spec, instance_dir)
-
+            apply_cmds = GIT_APPLY_CMDS
             if not skip_patch:
-                self._apply_patch(container, pred, instance_dir)
-            else:
-                self._logger.info("Skipping patch application (skip_patch=True)")
-
-            test_output_path, runtime = self._execute_eval(
-                container, spec, instance_dir
-            )
-
-            traces = self._load_traces(trace_path)
+                with timer.phase("patch_check"):
+                    apply_cmds = self._check_patch(pred, project_dir)
+
+            with timer.phase("image"):
+                self._ensure_image(spec)
+            with timer.phase("cache"):
+                environment = self._eval_environment(spec)
+                cache_key = self._result_cache_key(spec, pred, skip_patch, environment)
+                cached = None
+                if cache_key is not None:
+                    cached = self._restore_cached(cache_key, instance_dir, trace_path)
+            if cached is not None:
+                cached.phases = timer.phases
+                return cached
+            with timer.phase("snapshot"):
+                image, eval_script = self._select_image(spec, patched=not skip_patch)
+
+            with timer.phase("container"):
+                container_slot.enter_context(self._limits.container())
+                pooled = None
+                if self._pool is not None:
+                    pooled = container_slot.enter_context(
+                        self._pool.acquire(spec, image=image)
+                    )
+                    container_slot.callback(pooled.collect_outputs, instance_dir)
+                    container = pooled.container
+                else:
+                    container = self._start_container(spec, instance_dir, image)
+
+            with timer.phase("verify"):
+                self._prepare_container(container)
+
+            with timer.phase("mirror"):
+                project_dir = None
+                if self._mirrors is not None:
+                    project_dir = self._mirrors.ensure(container, spec.instance_image_key)
+
+            with timer.phase("patch"):
+                if not skip_patch:
+                    self._apply_patch(container, pred, instance_dir, apply_cmds)
+                else:
+                    self._logger.info("Skipping patch application (skip_patch=True)")
+
+            try:
+                with timer.phase("eval"), ResourceSampler(
+                    container, logger=self._logger
+                ) as sampler:
+                    evaluation = self._execute_eval(
+                        container, spec, instance_dir, eval_script, timeout, environment
+                    )
+            except TestTimeoutError as exc:
+                eval_time, timed_out = exc.runtime, True
+                raise
+            eval_time = evaluation.runtime
+
+            with timer.phase("collect"):
+                if pooled is not None:
+                    # Runs the collect_outputs callback, then hands the
+                    # container back to the pool.
+                    container_slot.close()
+            with timer.phase("trace_load"):
+                traces = self._read_traces(trace_path)
+            with timer.phase("trace_process"):
+                traces = self._post_processor.process(traces)
 
             self._logger.info(
                 "Successfully collected %d trace(s) for %s",
                 len(traces),
                 instance_id,
             )
-            return RunResult(
+            result = RunResult(
                 success=True,
                 instance_id=instance_id,
                 framework=framework_value,
                 trace_path=str(trace_path),
                 num_failures=len(traces),
-                runtime=runtime,
-                test_output_path=str(test_output_path),
+                runtime=evaluation.runtime,
+                test_output_path=str(evaluation.test_output_path),
+                project_dir=str(project_dir) if project_dir is not None else None,
+                phases=timer.phases,
+                resources=sampler.usage.to_dict(),
+                outcome=evaluation.outcome.to_dict(),
+                stopped_early=evaluation.stopped_early,
                 traces=traces,
             )
+            if cache_key is not None:
+                self._result_cache.put(cache_key, instance_dir, result.to_dict())
+            return result
 
         except Exception as exc:
             tb_text = traceback.format_exc()
+            if self._pool is not None:
+                # Collect whatever the run left behind before reporting it.
+                container_slot.close()
             self._logger.error(
                 "Failed to collect traces for %s: %s\n%s",
                 instance_id,
                 exc,
                 tb_text,
             )
-            return RunResult(
+            result = RunResult(
                 success=False,
                 instance_id=instance_id,
                 framework=framework_value,
@@ -165,12 +352,125 @@ class TracedInstanceRunner:
                 test_output_path=str(self._output_manager.test_output_file(instance_id))
                 if self._output_manager.test_output_file(instance_id).exists()
                 else None,
+                phases=timer.phases,
+                resources=sampler.usage.to_dict() if sampler is not None else None,
+                outcome=evaluation.outcome.to_dict() if evaluation is not None else None,
+                stopped_early=evaluation is not None and evaluation.stopped_early,
             )
+            # Tests that ran to completion but left no usable trace fail the
+            # same way every time; anything else may be transient.
+            if (
+                cache_key is not None
+                and eval_time is not None
+                and not timed_out
+                and isinstance(exc, TraceCollectionError)
+            ):
+                self._result_cache.put(cache_key, instance_dir, result.to_dict())
+            return result
 
         finally:
-            if container is not None:
+            if container is not None and self._pool is None:
                 self._logger.info("Cleaning up container for %s", instance_id)
                 cleanup_container(self._client, container, self._logger)
+            container_slot.close()
+            # Early-stopped runs say little about how long the full tests take.
+            stopped_early = evaluation is not None and evaluation.stopped_early
+            if self._history is not None and eval_time is not None and not stopped_early:
+                self._record_history(
+                    instance_id, history_kind, timer, eval_time, timed_out
+                )
+
+    def _eval_environment(self, spec: TestSpec) -> Dict[str, str]:
+        """Extra environment for the eval script: the target tests, if enabled."""
+        targets = list(getattr(spec, "FAIL_TO_PASS", None) or [])
+        if not self._stop_after_targets or not targets:
+            return {}
+        return {TARGETS_ENV: json_codec.dumps(targets)}
+
+    def _result_cache_key(
+        self,
+        spec: TestSpec,
+        pred: Dict[str, Any],
+        skip_patch: bool,
+        environment: Dict[str, str],
+    ) -> Optional[str]:
+        if self._result_cache is None:
+            return None
+        try:
+            digest = self._client.images.get(spec.instance_image_key).id
+        except Exception as exc:
+            self._logger.debug("No image digest for the result cache: %s", exc)
+            return None
+        patch = None if skip_patch else pred.get(KEY_PREDICTION, "") or ""
+        return self._result_cache.key(digest, patch, spec.eval_script, environment)
+
+    def _restore_cached(
+        self, key: str, instance_dir: Path, trace_path: Path
+    ) -> Optional[RunResult]:
+        payload = self._result_cache.get(key)
+        if payload is None:
+            return None
+        result = RunResult.from_dict(payload)
+        if self._mirrors is None:
+            result.project_dir = None
+        elif not result.project_dir or not Path(result.project_dir).is_dir():
+            # Run again so the project mirror gets recreated.
+            return None
+        if not self._result_cache.restore_outputs(key, instance_dir):
+            return None
+        test_output_path = self._output_manager.test_output_file(result.instance_id)
+        result.trace_path = str(trace_path) if trace_path.exists() else None
+        result.test_output_path = (
+            str(test_output_path) if test_output_path.exists() else None
+        )
+        if result.success:
+            try:
+                result.traces = self._load_traces(trace_path)
+            except TraceCollectionError:
+                return None
+        result.cached = True
+        self._logger.info("Reusing cached run result %s", key[:16])
+        return result
+
+    def restore(self, payload: Dict[str, Any]) -> Optional[RunResult]:
+        """Rebuild a successful run from ``RunResult.to_dict`` output.
+
+        Returns ``None`` when the run's trace or project mirror is gone, in
+        which case the caller has to run again.
+        """
+        result = RunResult.from_dict(payload)
+        if not result.success or not result.trace_path:
+            return None
+        trace_path = Path(result.trace_path)
+        if not trace_path.exists():
+            return None
+        if result.project_dir and not Path(result.project_dir).is_dir():
+            return None
+        self._prepare_test_spec()
+        try:
+            result.traces = self._load_traces(trace_path)
+        except TraceCollectionError:
+            return None
+        return result
+
+    def _record_history(
+        self,
+        instance_id: str,
+        kind: str,
+        timer: PhaseTimer,
+        eval_time: float,
+        timed_out: bool,
+    ) -> None:
+        try:
+            self._history.record(
+                instance_id,
+                timer.phases,
+                kind=kind,
+                eval_time=eval_time,
+                timed_out=timed_out,
+            )
+        except OSError as exc:
+            self._logger.warning("Could not record runtime history: %s", exc)
 
     def _prepare_test_spec(self) -> TestSpec:
         if self._prepared_spec is None:
@@ -186,10 +486,23 @@ class TracedInstanceRunner:
             self._logger.info(
                 "Building instance image: %s", spec.instance_image_key
             )
-            build_instance_image(spec, self._client, self._logger, self._nocache)
+            with self._limits.build():
+                build_instance_image(spec, self._client, self._logger, self._nocache)
         self._image_built = True
 
-    def _start_container(self, spec: TestSpec, instance_dir: Path):
+    def _select_image(self, spec: TestSpec, *, patched: bool) -> Tuple[str, str]:
+        """Image to start from and the eval script to run in it."""
+        if self._snapshots is not None:
+            snapshot = self._snapshots.ensure(spec)
+            if snapshot is not None:
+                self._logger.info("Starting from snapshot %s", snapshot.image)
+                plan = snapshot.plan
+                return snapshot.image, (
+                    plan.patched_test_script if patched else plan.test_script
+                )
+        return spec.instance_image_key, spec.eval_script
+
+    def _start_container(self, spec: TestSpec, instance_dir: Path, image: str):
         instance_id = spec.instance_id
         volumes = self._output_manager.volume_spec(
             instance_id, self._trace_collector_dir
@@ -202,7 +515,7 @@ class TracedInstanceRunner:
         self._logger.info("Environment: %s", environment)
 
         container = self._client.containers.create(
-            image=spec.instance_image_key,
+            image=image,
             name=spec.get_instance_container_name(self._run_id),
             user=DOCKER_USER,
             detach=True,
@@ -214,23 +527,11 @@ class TracedInstanceRunner:
         )
         container.start()
         self._logger.info("Traced container started: %s", container.id)
+        return container
 
+    def _prepare_container(self, container) -> None:
         if not self._verify_setup(container):
             raise TraceCollectionError("Trace setup verification failed")
-        self._mirror_project(container)
-        return container
-
-    def _mirror_project(self, container) -> None:
-        result = container.exec_run(
-            ["/bin/sh", "-lc",
-             f"cp -a {DOCKER_WORKDIR}/. /project_mirror/ && chmod -R a+rwX /project_mirror/"],
-            user="root",
-        )
-        if result.exit_code != 0:
-            raise TraceCollectionError(
-                f"Failed to mirror project to /project_mirror: "
-                f"{result.output.decode('utf-8', errors='replace') if result.output else ''}"
-            )
 
     def _verify_setup(self, container) -> bool:
         ok = True
@@ -246,7 +547,34 @@ class TracedInstanceRunner:
             container.exec_run("rm -f /trace_output/test_write")
         return ok
 
-    def _apply_patch(self, container, pred: Dict[str, Any], instance_dir: Path) -> None:
+    def _check_patch(
+        self, pred: Dict[str, Any], project_dir: Optional[Path]
+    ) -> List[str]:
+        """Apply strategies for the container, narrowed by a host dry run."""
+        if (
+            self._patch_checker is None
+            or project_dir is None
+            or not Path(project_dir).is_dir()
+        ):
+            return GIT_APPLY_CMDS
+        patch_content = pred.get(KEY_PREDICTION, "") or ""
+        try:
+            strategy = self._patch_checker.check(Path(project_dir), patch_content)
+        except PatchRejectedError as exc:
+            raise TraceCollectionError(f"{APPLY_PATCH_FAIL}: {exc}") from exc
+        if strategy is None:
+            return GIT_APPLY_CMDS
+        self._logger.info("Patch dry run passed on the host: %s", strategy)
+        # The other strategies only matter if the host and container disagree.
+        return [strategy] + [cmd for cmd in GIT_APPLY_CMDS if cmd != strategy]
+
+    def _apply_patch(
+        self,
+        container,
+        pred: Dict[str, Any],
+        instance_dir: Path,
+        apply_cmds: List[str],
+    ) -> None:
         patch_content = pred.get(KEY_PREDICTION, "") or ""
         if not patch_content.strip():
             self._logger.warning("Empty patch content")
@@ -255,7 +583,7 @@ class TracedInstanceRunner:
         temp_patch_file.write_text(patch_content)
         copy_to_container(container, temp_patch_file, PurePosixPath(DOCKER_PATCH))
 
-        for git_apply_cmd in _GIT_APPLY_CMDS:
+        for git_apply_cmd in apply_cmds:
             result = container.exec_run(
                 f"{git_apply_cmd} {DOCKER_PATCH}",
                 workdir=DOCKER_WORKDIR,
@@ -270,66 +598,105 @@ class TracedInstanceRunner:
             f"{APPLY_PATCH_FAIL}: All git apply strategies failed"
         )
 
-    def _execute_eval(self, container, spec: TestSpec, instance_dir: Path):
+    def _execute_eval(
+        self,
+        container,
+        spec: TestSpec,
+        instance_dir: Path,
+        eval_script: str,
+        timeout: Optional[int],
+        environment: Dict[str, str],
+    ) -> _Evaluation:
         temp_eval_file = instance_dir / "eval.sh"
-        temp_eval_file.write_text(spec.eval_script)
+        temp_eval_file.write_text(eval_script)
         copy_to_container(container, temp_eval_file, PurePosixPath("/eval.sh"))
 
         self._logger.info("Running tests with trace collection...")
-        test_output, timed_out, runtime = exec_run_with_timeout(
-            container, "/bin/bash /eval.sh", self._timeout
-        )
-        self._logger.info("Test runtime: %.2f seconds", runtime)
-
         test_output_path = self._output_manager.test_output_file(spec.instance_id)
-        test_output_path.write_text(test_output)
+        start = time.monotonic()
+
+        def on_failure(test_id: str) -> None:
+            self._logger.info(
+                "First failing test after %.1fs: %s", time.monotonic() - start, test_id
+            )
+
+        def stop() -> None:
+            container.exec_run(["/bin/bash", "-c", _STOP_EVAL_CMD], user=DOCKER_USER)
+
+        parser = OutcomeParser(on_failure=on_failure)
+        watch_targets = TARGETS_ENV in environment
+        stopped_early = False
+        tail = ""
+        # The kill is a blocking exec, so it runs on its own thread rather
+        # than on the output callback, which holds the stream lock.
+        stop_requested = threading.Event()
+        finished = threading.Event()
+
+        def stop_when_requested() -> None:
+            stop_requested.wait()
+            if not finished.is_set():
+                stop()
+
+        stopper: Optional[threading.Thread] = None
+        if watch_targets:
+            stopper = threading.Thread(
+                target=stop_when_requested, name="eval-stop", daemon=True
+            )
+            stopper.start()
+        try:
+            with test_output_path.open("w", encoding="utf-8") as handle:
+
+                def on_output(text: str) -> None:
+                    nonlocal stopped_early, tail
+                    handle.write(text)
+                    parser.feed(text)
+                    if not watch_targets or stopped_early:
+                        return
+                    # The tracer prints the marker once the targets' traces are on disk.
+                    window = tail + text
+                    if DONE_MARKER in window:
+                        stopped_early = True
+                        self._logger.info(
+                            "Target tests traced after %.1fs; stopping the tests",
+                            time.monotonic() - start,
+                        )
+                        stop_requested.set()
+                    tail = window[-len(DONE_MARKER):]
+
+                timed_out, runtime = stream_exec_with_timeout(
+                    container,
+                    _EVAL_CMD,
+                    on_output=on_output,
+                    timeout=timeout,
+                    environment=environment or None,
+                    kill=stop,
+                )
+        finally:
+            if stopper is not None:
+                finished.set()
+                stop_requested.set()
+                stopper.join()
+        self._logger.info("Test runtime: %.2f seconds", runtime)
         self._logger.info("Test output saved to: %s", test_output_path)
 
         if timed_out:
-            raise TraceCollectionError(
-                f"Test execution timed out after {self._timeout}s"
-            )
-        return test_output_path, runtime
+            raise TestTimeoutError(timeout, runtime)
+        return _Evaluation(test_output_path, runtime, parser.close(), stopped_early)
 
     def _load_traces(self, trace_path: Path) -> List[Dict[str, Any]]:
+        return self._post_processor.process(self._read_traces(trace_path))
+
+    def _read_traces(self, trace_path: Path) -> List[Dict[str, Any]]:
         if not trace_path.exists():
             raise TraceCollectionError(
                 f"Trace file not created: {trace_path}. "
                 "Tests may not have failed, or trace collection did not activate."
             )
         try:
-            import json as _json
-
-            with open(trace_path, "r") as f:
-                traces = _json.load(f)
+            traces = load_traces(trace_path)
         except Exception as exc:
-            raise TraceCollectionError(f"Invalid JSON in trace file: {exc}") from exc
-        if not isinstance(traces, list):
-            raise TraceCollectionError(
-                f"Invalid trace format: expected list, got {type(traces)}"
-            )
-        return [self._apply_pipelines(t) for t in traces if isinstance(t, dict)]
-
-    @staticmethod
-    def _apply_pipelines(trace: Dict[str, Any]) -> Dict[str, Any]:
-        raw_frames = trace.get("frames", []) or []
-        raw_exec_path = trace.get("exec_path", []) or []
-
-        tb_pipeline = default_traceback_pipeline()
-        ep_pipeline = default_exec_path_pipeline()
-
-        filtered_frames = [
-            f.to_json()
-            for f in tb_pipeline.run(Frame.from_json(d) for d in raw_frames)
-        ]
-        filtered_exec_path = [
-            {"file": f.file, "func": f.func, "line": f.line}
-            for f in ep_pipeline.run(
-                Frame.from_json({**d, "locals": {}}) for d in raw_exec_path
-            )
-        ]
-
-        out = dict(trace)
-        out["frames"] = filtered_frames
-        out["exec_path"] = filtered_exec_path
-        return out
+            raise TraceCollectionError(f"Invalid trace file: {exc}") from exc
+        traces = [t for t in traces if isinstance(t, dict)]
+        for trace in traces:
+            resolve_step_frames_ref(trace, trace_path)
+        return traces
@@ -7,7 +7,13 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Mapping, Optional, Sequence
 
-from libs.frames import ExecutionPathSerializer, Frame, FrameSerializer
+from libs.frames import (
+    ExecutionPathSerializer,
+    Frame,
+    FrameSerializer,
+    StepFrameCompressor,
+    StepFrames,
+)
 from libs.harness.io_utils import render_numbered_range
 from libs.prompts.resources import load_prompt
 
@@ -114,7 +120,7 @@ class ProjectToolContext:
 class RuntimeToolContext:
     frames: Sequence[Frame]
     execution_path: Sequence[Frame]
-    step_frames: Sequence[Frame]
+    step_frames: StepFrames
     trace: Mapping[str, Any]
     test_output_path: Path
 
@@ -407,7 +413,11 @@ class GetGranularFramesTool(BaseTool):
                     "line highlighted\n"
                     "    - Locals: JSON snapshot of local variables at that "
                     "point in execution\n"
-                    "  Frames are returned in execution order. If no frames "
+                    "  Frames are returned in execution order. Repeated line "
+                    "sequences are collapsed into Loop blocks listing the "
+                    "iteration count, the locals that varied (with min/max "
+                    "for numbers and sample values), and the first and last "
+                    "iterations. If no frames "
                     "match the given function name, returns 'No step frames "
                     "found for function: <name>'."
                 ),
@@ -434,7 +444,7 @@ class GetGranularFramesTool(BaseTool):
         if not function_name:
             return ToolResult(self.spec.name, "error", "Missing argument: function_name")
 
-        matched = [f for f in runtime.step_frames if f.func == function_name]
+        matched = runtime.step_frames.for_function(function_name)
         if not matched:
             return ToolResult(
                 self.spec.name, "ok", f"No step frames found for function: {function_name}"
@@ -444,7 +454,10 @@ class GetGranularFramesTool(BaseTool):
             source_map=context.project.source_map,
             context_size=context.project.context_size,
         )
-        return ToolResult(self.spec.name, "ok", serializer.to_string_many(matched))
+        compressed = StepFrameCompressor().compress(matched)
+        return ToolResult(
+            self.spec.name, "ok", serializer.to_string_compressed(compressed)
+        )
 
 
 class ApplyPatchTool(BaseTool):
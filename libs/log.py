@@ -38,3 +38,14 @@ def create_logger(
 
     logger.propagate = False
     return logger
+
+
+class PrefixLoggerAdapter(logging.LoggerAdapter):
+    """Prepend ``[prefix]`` to every message, e.g. the instance a worker is on."""
+
+    def process(self, msg, kwargs):
+        return f"[{self.extra['prefix']}] {msg}", kwargs
+
+
+def with_prefix(logger: logging.Logger, prefix: str) -> logging.LoggerAdapter:
+    return PrefixLoggerAdapter(logger, {"prefix": prefix.replace("%", "%%")})
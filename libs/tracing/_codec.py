@@ -0,0 +1,137 @@
+"""JSON codec used for traces, reports and indices.
+
+Picks the fastest importable backend (orjson, then ujson, then stdlib json);
+DEBUGGER_JSON_CODEC forces one by name. Output is compact unless
+``pretty=True`` is requested. Values a fast backend rejects (lone surrogates,
+integers beyond 64 bits) are written by the stdlib backend instead, which
+escapes non-ASCII text. Imported flat inside containers as ``_codec``; host
+code uses the public ``libs.tracing.json_codec``. Must stay stdlib-only.
+"""
+
+import json
+import os
+
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+try:
+    import ujson as _ujson
+except ImportError:
+    _ujson = None
+
+
+class _StdlibBackend(object):
+    name = "json"
+
+    def dumpb(self, obj, pretty=False):
+        return self.dumps(obj, pretty).encode("ascii")
+
+    def dumps(self, obj, pretty=False):
+        # ensure_ascii keeps lone surrogates (common in repr()s of locals)
+        # encodable.
+        if pretty:
+            return json.dumps(obj, indent=2, default=str)
+        return json.dumps(obj, separators=(",", ":"), default=str)
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class _OrjsonBackend(object):
+    name = "orjson"
+
+    def dumpb(self, obj, pretty=False):
+        option = _orjson.OPT_NON_STR_KEYS | _orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= _orjson.OPT_INDENT_2
+        return _orjson.dumps(obj, default=str, option=option)
+
+    def dumps(self, obj, pretty=False):
+        return self.dumpb(obj, pretty).decode("utf-8")
+
+    def loads(self, data):
+        return _orjson.loads(data)
+
+
+class _UjsonBackend(object):
+    name = "ujson"
+
+    def dumpb(self, obj, pretty=False):
+        return self.dumps(obj, pretty).encode("utf-8")
+
+    def dumps(self, obj, pretty=False):
+        return _ujson.dumps(
+            obj, ensure_ascii=False, indent=2 if pretty else 0, default=str
+        )
+
+    def loads(self, data):
+        return _ujson.loads(data)
+
+
+_BACKENDS = {"json": _StdlibBackend()}
+if _orjson is not None:
+    _BACKENDS["orjson"] = _OrjsonBackend()
+if _ujson is not None:
+    _BACKENDS["ujson"] = _UjsonBackend()
+
+_PREFERENCE = ("orjson", "ujson", "json")
+
+
+def available_backends():
+    return tuple(name for name in _PREFERENCE if name in _BACKENDS)
+
+
+def get_backend(name=None):
+    if name is None:
+        name = os.environ.get("DEBUGGER_JSON_CODEC") or available_backends()[0]
+    try:
+        return _BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            "JSON backend %r is not available (have: %s)"
+            % (name, ", ".join(available_backends()))
+        )
+
+
+_BACKEND = get_backend()
+BACKEND = _BACKEND.name
+_FALLBACK = _BACKENDS["json"]
+
+
+def dumps(obj, pretty=False):
+    try:
+        return _BACKEND.dumps(obj, pretty)
+    except (TypeError, ValueError, OverflowError):
+        if _BACKEND is _FALLBACK:
+            raise
+        return _FALLBACK.dumps(obj, pretty)
+
+
+def dumpb(obj, pretty=False):
+    try:
+        return _BACKEND.dumpb(obj, pretty)
+    except (TypeError, ValueError, OverflowError):
+        if _BACKEND is _FALLBACK:
+            raise
+        return _FALLBACK.dumpb(obj, pretty)
+
+
+def loads(data):
+    try:
+        return _BACKEND.loads(data)
+    except (UnicodeDecodeError, ValueError):
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            raise
+        return _BACKEND.loads(bytes(data).decode("utf-8", errors="replace"))
+
+
+def dump_path(path, obj, pretty=False):
+    with open(str(path), "wb") as f:
+        f.write(dumpb(obj, pretty))
+
+
+def load_path(path):
+    with open(str(path), "rb") as f:
+        return loads(f.read())
@@ -2,29 +2,31 @@
 
 In-process tracers use these helpers to capture every frame WITHOUT applying
 path-based filtering or length truncation. Filtering and truncation happen
-later, on the host, via libs.frames.FramesFilteringPipeline.
+later, on the host, via libs.frames.FramesFilteringPipeline. Setting
+AUTO_DEBUG_VALUE_CUTOFF bounds each rendered value at capture time instead.
 """
 
 from __future__ import annotations
 
-try:
-    import jsonpickle as _jsonpickle
-    _HAS_JSONPICKLE = True
-except ImportError:
-    _jsonpickle = None
-    _HAS_JSONPICKLE = False
+import os
 
+from _renderers import default_registry
 
-_UNSERIALIZABLE = "<unserializable>"
+
+def _value_cutoff():
+    # A malformed value must not take the tracer down with it.
+    try:
+        return int(os.environ.get("AUTO_DEBUG_VALUE_CUTOFF") or 0) or None
+    except ValueError:
+        return None
+
+
+_REGISTRY = default_registry()
+_CUTOFF = _value_cutoff()
 
 
 def serialize_value_raw(value) -> str:
-    try:
-        if _HAS_JSONPICKLE:
-            return str(_jsonpickle.dumps(value, unpicklable=False))
-        return repr(value)
-    except Exception:
-        return _UNSERIALIZABLE
+    return _REGISTRY.render(value, _CUTOFF)
 
 
 def serialize_locals_raw(locals_mapping) -> dict:
@@ -0,0 +1,244 @@
+"""Type-aware rendering of Python values into bounded JSON-like strings.
+
+Shared by the in-container tracers (imported flat as ``_renderers``) and the
+host, which imports it as ``libs.tracing.renderers``. Keep it importable on
+every Python version the SWE-bench images ship: stdlib only, no postponed
+annotations.
+"""
+
+import json
+
+try:
+    import jsonpickle as _jsonpickle
+    _HAS_JSONPICKLE = True
+except ImportError:
+    _jsonpickle = None
+    _HAS_JSONPICKLE = False
+
+
+UNSERIALIZABLE = "<unserializable>"
+ELLIPSIS = "..."
+
+_MAX_DEPTH = 6
+_SUMMARY_HEAD = 5
+
+
+def _fits(budget, length):
+    return budget is None or length < budget
+
+
+def _child_budget(budget, used):
+    if budget is None:
+        return None
+    return max(budget - used, 0)
+
+
+def render_none(value, budget, registry, depth):
+    return "null"
+
+
+def render_bool(value, budget, registry, depth):
+    return "true" if value else "false"
+
+
+def render_int(value, budget, registry, depth):
+    return int.__repr__(value)
+
+
+def render_float(value, budget, registry, depth):
+    return json.dumps(float(value))
+
+
+def render_str(value, budget, registry, depth):
+    if budget is not None and len(value) > budget:
+        value = value[:budget]
+    return json.dumps(str(value))
+
+
+def _render_items(items, budget, registry, depth, open_, close):
+    parts = [open_]
+    used = len(open_)
+    first = True
+    for item in items:
+        if not _fits(budget, used):
+            parts.append(ELLIPSIS)
+            break
+        if not first:
+            parts.append(", ")
+            used += 2
+        first = False
+        text = registry.render_nested(item, _child_budget(budget, used), depth + 1)
+        parts.append(text)
+        used += len(text)
+    parts.append(close)
+    return "".join(parts)
+
+
+def render_sequence(value, budget, registry, depth):
+    return _render_items(value, budget, registry, depth, "[", "]")
+
+
+def render_set(value, budget, registry, depth):
+    return _render_items(iter(value), budget, registry, depth, "[", "]")
+
+
+def _dict_key(key):
+    return json.dumps(key if isinstance(key, str) else str(key))
+
+
+def render_mapping(value, budget, registry, depth):
+    parts = ["{"]
+    used = 1
+    first = True
+    for key, item in value.items():
+        if not _fits(budget, used):
+            parts.append(ELLIPSIS)
+            break
+        if not first:
+            parts.append(", ")
+            used += 2
+        first = False
+        prefix = _dict_key(key) + ": "
+        text = registry.render_nested(
+            item, _child_budget(budget, used + len(prefix)), depth + 1
+        )
+        parts.append(prefix)
+        parts.append(text)
+        used += len(prefix) + len(text)
+    parts.append("}")
+    return "".join(parts)
+
+
+def _summary(kind, fields, head, budget, registry, depth):
+    prefix = "<" + kind + " " + " ".join(fields)
+    text = registry.render_nested(head, _child_budget(budget, len(prefix) + 8), depth + 1)
+    return json.dumps(prefix + " head=" + text + ">")
+
+
+def render_ndarray(value, budget, registry, depth):
+    head = value.ravel()[:_SUMMARY_HEAD].tolist()
+    fields = ["shape=" + str(tuple(value.shape)), "dtype=" + str(value.dtype)]
+    return _summary("ndarray", fields, head, budget, registry, depth)
+
+
+def render_series(value, budget, registry, depth):
+    head = value.head(_SUMMARY_HEAD).tolist()
+    fields = ["shape=" + str(tuple(value.shape)), "dtype=" + str(value.dtype)]
+    if value.name is not None:
+        fields.append("name=" + str(value.name))
+    return _summary("Series", fields, head, budget, registry, depth)
+
+
+def render_dataframe(value, budget, registry, depth):
+    dtypes = ",".join(
+        str(column) + ":" + str(dtype)
+        for column, dtype in list(value.dtypes.items())[:_SUMMARY_HEAD]
+    )
+    head = value.head(_SUMMARY_HEAD).values.tolist()
+    fields = ["shape=" + str(tuple(value.shape)), "dtypes={" + dtypes + "}"]
+    return _summary("DataFrame", fields, head, budget, registry, depth)
+
+
+class ValueRendererRegistry:
+    """Maps value types to renderers ``fn(value, budget, registry, depth) -> str``.
+
+    Types can be registered directly or by dotted ``module.QualName`` so that
+    optional libraries (numpy, pandas) never have to be imported here.
+    Lookup walks the value's MRO and is cached per concrete type.
+    """
+
+    def __init__(self, use_jsonpickle=True):
+        self._use_jsonpickle = use_jsonpickle and _HAS_JSONPICKLE
+        self._by_type = {}
+        self._by_name = {}
+        self._resolved = {}
+
+    def register(self, type_or_name, renderer):
+        if isinstance(type_or_name, str):
+            self._by_name[type_or_name] = renderer
+        else:
+            self._by_type[type_or_name] = renderer
+        self._resolved = {}
+
+    def copy(self, use_jsonpickle=None):
+        if use_jsonpickle is None:
+            use_jsonpickle = self._use_jsonpickle
+        clone = ValueRendererRegistry(use_jsonpickle=use_jsonpickle)
+        clone._by_type = dict(self._by_type)
+        clone._by_name = dict(self._by_name)
+        return clone
+
+    def renderer_for(self, value_type):
+        try:
+            return self._resolved[value_type]
+        except KeyError:
+            pass
+        renderer = None
+        for klass in value_type.__mro__:
+            renderer = self._by_type.get(klass)
+            if renderer is None and self._by_name:
+                name = "%s.%s" % (klass.__module__, klass.__qualname__)
+                renderer = self._by_name.get(name)
+            if renderer is not None:
+                break
+        self._resolved[value_type] = renderer
+        return renderer
+
+    def render(self, value, cutoff=None):
+        try:
+            text = self.render_nested(value, cutoff, 0)
+        except Exception:
+            return UNSERIALIZABLE
+        if cutoff is not None:
+            return text[:cutoff]
+        return text
+
+    def render_nested(self, value, budget, depth):
+        if depth > _MAX_DEPTH:
+            return json.dumps(ELLIPSIS)
+        renderer = self.renderer_for(type(value))
+        if renderer is None:
+            return self.fallback(value)
+        return renderer(value, budget, self, depth)
+
+    def fallback(self, value):
+        try:
+            if self._use_jsonpickle:
+                return str(_jsonpickle.dumps(value, unpicklable=False))
+            return repr(value)
+        except Exception:
+            return json.dumps(UNSERIALIZABLE)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_resolved"] = {}
+        return state
+
+
+def _build_default_registry():
+    registry = ValueRendererRegistry()
+    registry.register(type(None), render_none)
+    registry.register(bool, render_bool)
+    registry.register(int, render_int)
+    registry.register(float, render_float)
+    registry.register(str, render_str)
+    registry.register(list, render_sequence)
+    registry.register(tuple, render_sequence)
+    registry.register(dict, render_mapping)
+    registry.register(set, render_set)
+    registry.register(frozenset, render_set)
+    registry.register("numpy.ndarray", render_ndarray)
+    registry.register("pandas.core.series.Series", render_series)
+    registry.register("pandas.core.frame.DataFrame", render_dataframe)
+    return registry
+
+
+_DEFAULT_REGISTRY = _build_default_registry()
+
+
+def default_registry():
+    return _DEFAULT_REGISTRY
+
+
+def register_renderer(type_or_name, renderer):
+    _DEFAULT_REGISTRY.register(type_or_name, renderer)
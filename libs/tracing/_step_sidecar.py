@@ -0,0 +1,67 @@
+"""Move each trace's step_frames into a sidecar file next to the trace JSON.
+
+Step frames are grouped by function (first-seen order, execution order within
+a group) and each group is written as one JSON array line, so the host can
+seek straight to a single function's frames. The trace keeps only a small
+header in place of the frames:
+
+    "step_frames_ref": {"path": "<sidecar file name>", "count": N,
+                        "index": {func: [offset, length, count], ...}}
+
+``path`` is relative to the trace JSON's directory. AUTO_DEBUG_STEP_SIDECAR=0
+keeps step frames inline; traces without step frames, or whose sidecar cannot
+be written, keep them inline too.
+"""
+
+import os
+
+try:
+    from _codec import dumpb
+except ImportError:  # imported on the host as libs.tracing._step_sidecar
+    from libs.tracing._codec import dumpb
+
+
+STEP_FRAMES_REF = "step_frames_ref"
+
+
+def sidecar_enabled():
+    value = os.environ.get("AUTO_DEBUG_STEP_SIDECAR", "1").strip().lower()
+    return value not in ("0", "false", "no", "off")
+
+
+def _write_sidecar(path, step_frames):
+    groups = {}
+    for frame in step_frames:
+        groups.setdefault(str(frame.get("func", "<unknown>")), []).append(frame)
+    index = {}
+    offset = 0
+    with open(path, "wb") as f:
+        for func, frames in groups.items():
+            chunk = dumpb(frames) + b"\n"
+            f.write(chunk)
+            index[func] = [offset, len(chunk), len(frames)]
+            offset += len(chunk)
+    return index
+
+
+def write_step_sidecars(traces, output_path):
+    if not sidecar_enabled():
+        return
+    output_path = os.path.abspath(str(output_path))
+    directory = os.path.dirname(output_path)
+    stem = os.path.basename(output_path)
+    for position, trace in enumerate(traces):
+        step_frames = trace.get("step_frames")
+        if not step_frames:
+            continue
+        name = "%s.steps.%d.jsonl" % (stem, position)
+        try:
+            index = _write_sidecar(os.path.join(directory, name), step_frames)
+        except (OSError, TypeError, ValueError):
+            continue
+        trace.pop("step_frames", None)
+        trace[STEP_FRAMES_REF] = {
+            "path": name,
+            "count": len(step_frames),
+            "index": index,
+        }
@@ -0,0 +1,78 @@
+"""Track the target tests of a run so it can stop once they have all finished.
+
+The host exports AUTO_DEBUG_TARGETS as a JSON list of test ids in SWE-bench
+form: pytest node ids (``tests/test_x.py::test_y[param]``), bare test names,
+or unittest/django ids (``test_y (module.Class)``). Tracers report every
+finished test; once the last target has finished they flush their traces
+and print DONE_MARKER on its own line, after which the host may kill the
+test process. Targets that never match a test simply mean no early stop.
+"""
+
+import json
+import os
+import re
+
+
+TARGETS_ENV = "AUTO_DEBUG_TARGETS"
+DONE_MARKER = "AUTO_DEBUG_TARGETS_DONE"
+
+_UNITTEST_ID = re.compile(r"^(\S+) \((\S+)\)")
+
+
+def _normalize(test_id):
+    """``test_y (module.Class)`` and its 3.11+ form both become ``module.Class.test_y``."""
+    test_id = test_id.strip()
+    match = None if "::" in test_id else _UNITTEST_ID.match(test_id)
+    if not match:
+        return test_id
+    name, qualifier = match.groups()
+    suffix = "." + name
+    if qualifier.endswith(suffix):
+        qualifier = qualifier[: -len(suffix)]
+    return f"{qualifier}.{name}"
+
+
+def _candidates(test_id):
+    normalized = _normalize(test_id)
+    yield normalized
+    if "::" in normalized:
+        # Bare test names match the last node id component.
+        yield normalized.rsplit("::", 1)[1]
+
+
+class TargetTracker:
+    def __init__(self, raw=None):
+        if raw is None:
+            raw = os.environ.get(TARGETS_ENV, "")
+        try:
+            targets = json.loads(raw) if raw else []
+        except ValueError:
+            targets = []
+        if not isinstance(targets, list):
+            targets = []
+        self._pending = {_normalize(t) for t in targets if isinstance(t, str) and t.strip()}
+        self.enabled = bool(self._pending)
+        self.done = False
+        self.failed = 0
+        self.passed = 0
+
+    def record(self, test_id, failed):
+        """Count a finished test; True exactly once, when the last target finishes."""
+        if not self.enabled or self.done:
+            return False
+        if failed:
+            self.failed += 1
+        else:
+            self.passed += 1
+        for candidate in _candidates(str(test_id)):
+            self._pending.discard(candidate)
+        if self._pending:
+            return False
+        self.done = True
+        return True
+
+    def done_lines(self):
+        return [
+            f"▶ Target tests finished: {self.failed} failed, {self.passed} passed",
+            DONE_MARKER,
+        ]
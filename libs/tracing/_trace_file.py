@@ -0,0 +1,245 @@
+"""Trace file formats: the legacy JSON array and an indexed record layout.
+
+Indexed layout (written when AUTO_DEBUG_FORMAT=indexed):
+
+    magic      b"AUTODEBUG-TRACES\\x01\\n"
+    records    one compact JSON object per line, in failure order
+    index      one JSON line: {"nodeids": [...], "offsets": [...], "lengths": [...]}
+    footer     struct ">QQ8s": index offset, index length, b"ADTINDEX"
+
+Readers mmap the file, decode the footer and index, and decode only the
+records that are asked for. If the footer or index is damaged (a tracer
+killed mid-write), the reader rebuilds the index by scanning the complete
+record lines instead. Legacy JSON files are parsed whole. Both readers
+share one interface; ``open_traces`` picks the right one from the magic.
+Shared by the tracers (imported flat as ``_trace_file``) and the host.
+"""
+
+import abc
+import mmap
+import os
+import struct
+
+try:
+    from _codec import dump_path, dumpb, load_path, loads
+except ImportError:  # imported on the host as libs.tracing._trace_file
+    from libs.tracing._codec import dump_path, dumpb, load_path, loads
+
+
+FORMAT_ENV = "AUTO_DEBUG_FORMAT"
+FORMAT_JSON = "json"
+FORMAT_INDEXED = "indexed"
+
+_MAGIC = b"AUTODEBUG-TRACES\x01\n"
+_FOOTER = struct.Struct(">QQ8s")
+_FOOTER_MAGIC = b"ADTINDEX"
+
+
+def _nodeid(trace):
+    if isinstance(trace, dict):
+        return str(trace.get("nodeid", ""))
+    return ""
+
+
+def _is_index(record):
+    return set(record) == {"nodeids", "offsets", "lengths"}
+
+
+def write_indexed(path, traces):
+    nodeids = []
+    offsets = []
+    lengths = []
+    with open(str(path), "wb") as f:
+        f.write(_MAGIC)
+        offset = len(_MAGIC)
+        for trace in traces:
+            record = dumpb(trace)
+            f.write(record)
+            f.write(b"\n")
+            nodeids.append(_nodeid(trace))
+            offsets.append(offset)
+            lengths.append(len(record))
+            offset += len(record) + 1
+        index = dumpb({"nodeids": nodeids, "offsets": offsets, "lengths": lengths})
+        f.write(index)
+        f.write(b"\n")
+        f.write(_FOOTER.pack(offset, len(index), _FOOTER_MAGIC))
+
+
+def write_traces(path, traces, fmt=None):
+    fmt = fmt or os.environ.get(FORMAT_ENV) or FORMAT_JSON
+    if fmt == FORMAT_INDEXED:
+        write_indexed(path, traces)
+    elif fmt == FORMAT_JSON:
+        dump_path(path, traces)
+    else:
+        raise ValueError("Unknown trace file format: %r" % (fmt,))
+
+
+def is_indexed(path):
+    with open(str(path), "rb") as f:
+        return f.read(len(_MAGIC)) == _MAGIC
+
+
+class _TraceReader(abc.ABC):
+    @abc.abstractmethod
+    def nodeids(self):
+        """Node ids of the records, in file order."""
+
+    @abc.abstractmethod
+    def record(self, position):
+        """Decode the record at ``position``."""
+
+    def get(self, nodeid, default=None):
+        position = self._positions.get(nodeid)
+        if position is None:
+            return default
+        return self.record(position)
+
+    def __contains__(self, nodeid):
+        return nodeid in self._positions
+
+    def __len__(self):
+        return len(self.nodeids())
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self.record(position)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _first_positions(nodeids):
+        positions = {}
+        for position, nodeid in enumerate(nodeids):
+            positions.setdefault(nodeid, position)
+        return positions
+
+
+class IndexedTraceReader(_TraceReader):
+    """Random access to one record of an indexed trace file via mmap."""
+
+    def __init__(self, path):
+        self._path = str(path)
+        self._file = open(self._path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("Empty trace file: %s" % self._path)
+        try:
+            self._load_index()
+        except Exception:
+            self.close()
+            raise
+
+    def _load_index(self):
+        if self._map[: len(_MAGIC)] != _MAGIC:
+            raise ValueError("Not an indexed trace file: %s" % self._path)
+        index = self._read_index()
+        if index is None:
+            index = self._scan_records()
+        self._nodeids, self._offsets, self._lengths = index
+        self._positions = self._first_positions(self._nodeids)
+
+    def _read_index(self):
+        size = len(self._map)
+        if size < len(_MAGIC) + _FOOTER.size:
+            return None
+        offset, length, magic = _FOOTER.unpack(self._map[size - _FOOTER.size :])
+        if (
+            magic != _FOOTER_MAGIC
+            or offset < len(_MAGIC)
+            or offset + length > size - _FOOTER.size
+        ):
+            return None
+        try:
+            index = loads(self._map[offset : offset + length])
+            nodeids = [str(n) for n in index["nodeids"]]
+            offsets = [int(o) for o in index["offsets"]]
+            lengths = [int(n) for n in index["lengths"]]
+        except Exception:
+            return None
+        if not len(nodeids) == len(offsets) == len(lengths):
+            return None
+        if any(o < len(_MAGIC) or o + n > offset for o, n in zip(offsets, lengths)):
+            return None
+        return nodeids, offsets, lengths
+
+    def _scan_records(self):
+        """Rebuild the index from the newline-terminated record lines."""
+        nodeids = []
+        offsets = []
+        lengths = []
+        start = len(_MAGIC)
+        while True:
+            end = self._map.find(b"\n", start)
+            if end < 0:
+                break
+            try:
+                record = loads(self._map[start:end])
+            except Exception:
+                break
+            if not isinstance(record, dict) or _is_index(record):
+                break
+            nodeids.append(_nodeid(record))
+            offsets.append(start)
+            lengths.append(end - start)
+            start = end + 1
+        return nodeids, offsets, lengths
+
+    def nodeids(self):
+        return tuple(self._nodeids)
+
+    def __len__(self):
+        return len(self._nodeids)
+
+    def record(self, position):
+        start = self._offsets[position]
+        return loads(self._map[start : start + self._lengths[position]])
+
+    def close(self):
+        trace_map = getattr(self, "_map", None)
+        if trace_map is not None and not trace_map.closed:
+            trace_map.close()
+        self._file.close()
+
+
+class JsonTraceReader(_TraceReader):
+    """Legacy auto_debug.json (a JSON array); the whole file is parsed up front."""
+
+    def __init__(self, path):
+        data = load_path(path)
+        if not isinstance(data, list):
+            raise ValueError(
+                "Invalid trace format: expected list, got %s" % type(data).__name__
+            )
+        self._records = data
+        self._positions = self._first_positions(_nodeid(t) for t in data)
+
+    def nodeids(self):
+        return tuple(_nodeid(t) for t in self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def record(self, position):
+        return self._records[position]
+
+
+def open_traces(path):
+    if is_indexed(path):
+        return IndexedTraceReader(path)
+    return JsonTraceReader(path)
+
+
+def load_traces(path):
+    with open_traces(path) as reader:
+        return list(reader)
@@ -0,0 +1,23 @@
+"""Host-side name of the tracers' JSON codec (see ``libs.tracing._codec``)."""
+
+from libs.tracing._codec import (
+    BACKEND,
+    available_backends,
+    dump_path,
+    dumpb,
+    dumps,
+    get_backend,
+    load_path,
+    loads,
+)
+
+__all__ = [
+    "BACKEND",
+    "available_backends",
+    "dump_path",
+    "dumpb",
+    "dumps",
+    "get_backend",
+    "load_path",
+    "loads",
+]
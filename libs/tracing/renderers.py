@@ -0,0 +1,17 @@
+"""Host-side name of the tracers' value renderers (see ``libs.tracing._renderers``)."""
+
+from libs.tracing._renderers import (
+    ELLIPSIS,
+    UNSERIALIZABLE,
+    ValueRendererRegistry,
+    default_registry,
+    register_renderer,
+)
+
+__all__ = [
+    "ELLIPSIS",
+    "UNSERIALIZABLE",
+    "ValueRendererRegistry",
+    "default_registry",
+    "register_renderer",
+]
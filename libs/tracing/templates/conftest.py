@@ -1,4 +1,3 @@
-import json
 import os
 import pathlib
 import sys
@@ -6,6 +5,9 @@ import sys
 import pytest
 
 from _raw_frame import frame_to_raw_dict, serialize_locals_raw  # noqa: E402
+from _step_sidecar import write_step_sidecars  # noqa: E402
+from _targets import TargetTracker  # noqa: E402
+from _trace_file import write_traces  # noqa: E402
 
 
 def pytest_addoption(parser):
@@ -45,6 +47,42 @@ class _ExecutionPathTracer:
 
 def pytest_configure(config):
     config._auto_debug_store = []
+    config._auto_debug_targets = TargetTracker()
+
+
+def _output_path(config):
+    return pathlib.Path(
+        os.environ.get("AUTO_DEBUG_JSON") or config.getoption("--auto-debug-json")
+    )
+
+
+def _write_store(config):
+    path = _output_path(config)
+    write_step_sidecars(config._auto_debug_store, path)
+    write_traces(path, config._auto_debug_store)
+    return path
+
+
+def _report_finished(config, nodeid, failed):
+    targets = config._auto_debug_targets
+    if not targets.record(nodeid, failed):
+        return
+    # Runs inside a report hookwrapper: an error here must not abort the
+    # session, so the run just goes on without the early stop.
+    try:
+        _write_store(config)
+        lines = targets.done_lines()
+        tr = config.pluginmanager.get_plugin("terminalreporter")
+        if tr is None:
+            # Output capture may be active; write to the real stdout.
+            sys.__stdout__.write("\n".join(lines) + "\n")
+            sys.__stdout__.flush()
+            return
+        for line in lines:
+            tr.write_line(line, bold=True)
+        sys.stdout.flush()
+    except Exception as e:
+        print(f"\n✖ Failed to report finished targets: {e}", file=sys.stderr)
 
 
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
@@ -66,24 +104,24 @@ def pytest_runtest_makereport(item, call):
     outcome = yield
     rep = outcome.get_result()
 
-    if rep.when != "call" or rep.passed:
-        return
+    if rep.when == "call" and not rep.passed:
+        excinfo = call.excinfo
+        item.config._auto_debug_store.append({
+            "nodeid": item.nodeid,
+            "exc_type": excinfo.type.__name__,
+            "message": str(excinfo.value),
+            "frames": getattr(item, "_executed_frames", []),
+            "exec_path": getattr(item, "_exec_path", []),
+            "step_frames": getattr(item, "_step_frames", []),
+        })
 
-    excinfo = call.excinfo
-    item.config._auto_debug_store.append({
-        "nodeid": item.nodeid,
-        "exc_type": excinfo.type.__name__,
-        "message": str(excinfo.value),
-        "frames": getattr(item, "_executed_frames", []),
-        "exec_path": getattr(item, "_exec_path", []),
-        "step_frames": getattr(item, "_step_frames", []),
-    })
+    # A test has finished once it ran, or once its setup failed or skipped it.
+    if rep.when == "call" or (rep.when == "setup" and not rep.passed):
+        _report_finished(item.config, item.nodeid, rep.failed)
 
 
 def pytest_sessionfinish(session, exitstatus):
-    output = os.environ.get("AUTO_DEBUG_JSON") or session.config.getoption("--auto-debug-json")
-    path = pathlib.Path(output)
-    path.write_text(json.dumps(session.config._auto_debug_store, indent=2))
+    path = _write_store(session.config)
     tr = session.config.pluginmanager.get_plugin("terminalreporter")
     if tr:
         tr.write_line(f"▶ Debug info written to {path}", bold=True)
@@ -1,13 +1,36 @@
-import json
 import os
 import sys
 import unittest
 
 from _raw_frame import frame_to_raw_dict
+from _step_sidecar import write_step_sidecars
+from _targets import TargetTracker
+from _trace_file import write_traces
 
 
 _trace_store = []
 _current_exec_tracer = None
+_targets = TargetTracker()
+
+
+def _write_store():
+    output_path = os.getenv("AUTO_DEBUG_JSON", "auto_debug.json")
+    write_step_sidecars(_trace_store, output_path)
+    write_traces(output_path, _trace_store)
+    return output_path
+
+
+def _report_finished(result, test):
+    problems = len(result.failures) + len(result.errors)
+    failed = problems > getattr(result, "_auto_debug_problems", problems)
+    if not _targets.record(test, failed):
+        return
+    try:
+        _write_store()
+    except Exception as e:
+        print(f"\n✖ Failed to write debug info: {e}", file=sys.stderr)
+        return
+    print("\n" + "\n".join(_targets.done_lines()), file=sys.stderr, flush=True)
 
 
 class _ExecutionPathTracer:
@@ -60,6 +83,7 @@ def inject_unittest_tracer():
     def wrapped_startTest(self, test):
         global _current_exec_tracer
         original_startTest(self, test)
+        self._auto_debug_problems = len(self.failures) + len(self.errors)
         _current_exec_tracer = _ExecutionPathTracer()
         sys.settrace(_current_exec_tracer)
 
@@ -68,6 +92,7 @@ def inject_unittest_tracer():
         sys.settrace(None)
         _current_exec_tracer = None
         original_stopTest(self, test)
+        _report_finished(self, test)
 
     def wrapped_addError(self, test, err):
         if err and err[2] is not None:
@@ -95,10 +120,8 @@ def inject_unittest_tracer():
 
     def wrapped_stopTestRun(self):
         original_stopTestRun(self)
-        output_path = os.getenv("AUTO_DEBUG_JSON", "auto_debug.json")
         try:
-            with open(output_path, "w") as f:
-                json.dump(_trace_store, f, indent=2)
+            output_path = _write_store()
             if _trace_store:
                 print(
                     f"\n▶ Debug info written to {output_path} ({len(_trace_store)} test failures)",
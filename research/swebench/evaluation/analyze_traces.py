@@ -3,14 +3,14 @@
 Quick analysis of collected traces.
 """
 
-import json
 from pathlib import Path
 from collections import defaultdict
 
+from libs.tracing._trace_file import load_traces
+
 def analyze_traces(trace_file):
     """Analyze a trace file and print statistics."""
-    with open(trace_file) as f:
-        data = json.load(f)
+    data = load_traces(trace_file)
 
     print(f"\n{'='*70}")
     print(f"Trace Analysis: {trace_file.name}")
@@ -6,12 +6,12 @@ Calculate SWE-bench Lite benchmark metrics from dataset-level index records.
 from __future__ import annotations
 
 import argparse
-import json
 from collections import Counter
 from pathlib import Path
 from typing import Any, Dict, List
 
 from libs.harness import Status, Variant
+from libs.tracing import json_codec
 
 
 def parse_args() -> argparse.Namespace:
@@ -31,8 +31,7 @@ def parse_args() -> argparse.Namespace:
 
 
 def load_index(path: Path) -> Dict[str, Any]:
-    content = path.read_text(encoding="utf-8")
-    data = json.loads(content)
+    data = json_codec.load_path(path)
     if not isinstance(data, dict):
         raise ValueError("Index file must contain a JSON object")
     return data
@@ -142,10 +141,7 @@ def main() -> int:
     if args.output_json:
         output_path = Path(args.output_json).resolve()
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_path.write_text(
-            json.dumps(metrics, indent=2, ensure_ascii=False),
-            encoding="utf-8",
-        )
+        json_codec.dump_path(output_path, metrics, pretty=True)
         print(f"Wrote metrics JSON: {output_path}")
 
     return 0
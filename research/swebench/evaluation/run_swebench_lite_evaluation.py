@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import argparse
+import itertools
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
@@ -11,25 +12,45 @@ from typing import Any, Dict, List, Tuple
 import docker
 
 REPO_ROOT = Path(__file__).resolve().parents[3]
+FRAMEWORK_CACHE_PATH = REPO_ROOT / "research" / "swebench" / "config" / "framework_cache.json"
 
 from libs.harness import (
     ComparisonConfig,
     FrameworkDetector,
+    ImageBuildPlanner,
+    InstanceCheckpoint,
     InstanceComparison,
+    ProjectMirrorCache,
+    SourceReader,
     Variant,
+    trace_post_processor,
 )
 from libs.llm.connector import LLMConnector
 from libs.log import create_logger
+from libs.tracing import json_codec
 
 from research.swebench.harness.benchmark_index import (
-    append_record,
+    RunIndexWriter,
     build_instance_index_record,
-    finalize_run_index,
     init_run_index,
-    write_run_index,
+    load_run_index,
+    recorded_instance_ids,
+)
+from research.swebench.harness.scheduler import (
+    InstanceScheduler,
+    add_scheduler_arguments,
+    history_from_args,
+    limits_from_args,
+)
+from research.swebench.harness.result_cache import (
+    add_result_cache_arguments,
+    result_cache_from_args,
+)
+from research.swebench.harness.snapshots import (
+    add_snapshot_arguments,
+    snapshots_from_args,
 )
 from swebench.harness.constants import KEY_INSTANCE_ID
-from swebench.harness.docker_build import build_env_images
 from swebench.harness.test_spec.test_spec import make_test_spec
 from swebench.harness.utils import get_predictions_from_file, load_swebench_dataset
 
@@ -52,15 +73,46 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--predictions_path", type=str, default="gold")
     parser.add_argument("--output_dir", type=str, default="./output/benchmark-runs")
     parser.add_argument("--run_id", type=str, default=None)
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        type=str,
+        default=None,
+        help="Continue an interrupted run: skip finished instances and "
+        "reuse completed phases from its artifacts",
+    )
     parser.add_argument("--provider", type=str, default="deepseek")
     parser.add_argument("--model", type=str, default="deepseek-chat")
     parser.add_argument("--max_tokens", type=int, default=2500)
     parser.add_argument("--context_lines", type=int, default=8)
     parser.add_argument("--test_context_lines", type=int, default=25)
     parser.add_argument("--max_context_files", type=int, default=4)
+    parser.add_argument(
+        "--frames_token_budget",
+        type=int,
+        default=None,
+        help="Token budget for runtime frames in prompts (unbounded if unset)",
+    )
+    parser.add_argument(
+        "--pretty_json",
+        action="store_true",
+        help="Indent report and index JSON (compact by default)",
+    )
     parser.add_argument("--timeout", type=int, default=None)
     parser.add_argument("--force_rebuild", action="store_true")
     parser.add_argument("--nocache", action="store_true")
+    parser.add_argument(
+        "--mirror_cache_dir",
+        type=str,
+        default="./output/cache/mirrors",
+        help="Host cache of project mirrors, shared across runs",
+    )
+    parser.add_argument(
+        "--source_cache_dir",
+        type=str,
+        default="./output/cache/sources",
+        help="Host cache of source files read from instance images",
+    )
     parser.add_argument("--verbose", action="store_true")
     parser.add_argument(
         "--exclude_repos",
@@ -69,7 +121,13 @@ def parse_args() -> argparse.Namespace:
         default=[],
         help="Repository prefixes to exclude (e.g. django/django)",
     )
-    return parser.parse_args()
+    add_scheduler_arguments(parser)
+    add_snapshot_arguments(parser)
+    add_result_cache_arguments(parser)
+    args = parser.parse_args()
+    if args.resume and args.run_id and args.run_id != args.resume:
+        parser.error("--run_id and --resume name different runs")
+    return args
 
 
 def select_instances(
@@ -106,6 +164,39 @@ def build_test_specs(
     return items
 
 
+def skip_finished_instances(
+    test_specs: List[Tuple[Any, Dict[str, Any]]],
+    index: Dict[str, Any],
+    index_writer: RunIndexWriter,
+    run_root: Path,
+    logger,
+) -> List[Tuple[Any, Dict[str, Any]]]:
+    """Drop instances a resumed run already finished; return the rest."""
+    recorded = recorded_instance_ids(index)
+    pending: List[Tuple[Any, Dict[str, Any]]] = []
+    for item in test_specs:
+        instance_id = item[0].instance_id
+        if instance_id in recorded:
+            continue
+        artifacts_dir = run_root / "artifacts" / instance_id
+        report_path = artifacts_dir / "comparison_report.json"
+        if InstanceCheckpoint(artifacts_dir).is_complete and report_path.exists():
+            # Finished after the last index write; record it without re-running.
+            report = json_codec.load_path(report_path)
+            index_writer.append(
+                build_instance_index_record(report, report_path=report_path)
+            )
+            recorded.add(instance_id)
+            continue
+        pending.append(item)
+    logger.info(
+        "Resuming: %d instance(s) finished, %d to run",
+        len(test_specs) - len(pending),
+        len(pending),
+    )
+    return pending
+
+
 def build_config(args: argparse.Namespace) -> ComparisonConfig:
     return ComparisonConfig(
         model_name=args.model,
@@ -113,15 +204,18 @@ def build_config(args: argparse.Namespace) -> ComparisonConfig:
         context_lines=args.context_lines,
         test_context_lines=args.test_context_lines,
         max_context_files=args.max_context_files,
+        frames_token_budget=args.frames_token_budget,
+        pretty_json=args.pretty_json,
         timeout=args.timeout,
-        force_rebuild=args.force_rebuild,
+        # The image build planner has already honoured --force_rebuild.
+        force_rebuild=False,
         nocache=args.nocache,
     )
 
 
 def main() -> int:
     args = parse_args()
-    run_id = resolve_run_id(args.run_id)
+    run_id = args.resume or resolve_run_id(args.run_id)
 
     run_root = Path(args.output_dir).resolve() / run_id
     log_path = run_root / "logs" / "run.log"
@@ -159,17 +253,6 @@ def main() -> int:
     logger.info("Connecting to Docker")
     client = docker.from_env()
 
-    logger.info("Building/checking environment images")
-    build_env_images(
-        client,
-        selected_instances,
-        force_rebuild=args.force_rebuild,
-        max_workers=1,
-        namespace=None,
-        instance_image_tag="latest",
-        env_image_tag="latest",
-    )
-
     trace_collector_dir = REPO_ROOT / "libs" / "tracing"
     if not trace_collector_dir.exists():
         logger.error("Trace collector directory not found: %s", trace_collector_dir)
@@ -177,24 +260,66 @@ def main() -> int:
 
     config = build_config(args)
     llm = LLMConnector(provider=args.provider, model=args.model)
-    framework_detector = FrameworkDetector()
+    framework_detector = FrameworkDetector(cache_path=FRAMEWORK_CACHE_PATH)
+    frameworks = framework_detector.precompute(spec for spec, _ in test_specs)
+    logger.info("Detected frameworks for %d instance(s)", len(frameworks))
 
-    index = init_run_index(
-        run_id=run_id,
-        dataset=args.dataset,
-        split=args.split,
-        model=args.model,
-        predictions_path=args.predictions_path,
-        log_path=log_path,
-        total_instances=len(test_specs),
-    )
     index_path = run_root / "index" / "instance_status_index.json"
-    write_run_index(index_path, index)
+    if args.resume:
+        index = load_run_index(index_path)
+        if index is None:
+            logger.error("Cannot resume %s: no run index at %s", run_id, index_path)
+            return 1
+        index["completed_at"] = None
+        index["build_failures"] = []
+    else:
+        index = init_run_index(
+            run_id=run_id,
+            dataset=args.dataset,
+            split=args.split,
+            model=args.model,
+            predictions_path=args.predictions_path,
+            log_path=log_path,
+            total_instances=len(test_specs),
+        )
+    index_writer = RunIndexWriter(index_path, index, pretty=args.pretty_json)
+    index_writer.write()
+    if args.resume:
+        test_specs = skip_finished_instances(
+            test_specs, index, index_writer, run_root, logger
+        )
 
-    total = len(test_specs)
-    for idx, (test_spec, reference_pred) in enumerate(test_specs, start=1):
+    limits = limits_from_args(args)
+    logger.info("Workers: %d, %s", args.workers, limits)
+    snapshots = snapshots_from_args(
+        args,
+        client=client,
+        tracer_dir=trace_collector_dir,
+        logger=logger,
+        limits=limits,
+    )
+    mirrors = ProjectMirrorCache(Path(args.mirror_cache_dir), logger=logger)
+    result_cache = result_cache_from_args(
+        args, tracer_dir=trace_collector_dir, logger=logger
+    )
+    source_reader = SourceReader(
+        client, cache_root=Path(args.source_cache_dir), logger=logger
+    )
+
+    history = history_from_args(args)
+    if history is not None:
+        test_specs = history.longest_first(
+            test_specs, key=lambda item: item[0].instance_id
+        )
+    # Builds finish out of order; the scheduler restores this order among
+    # instances waiting for a worker.
+    position = {item[0].instance_id: index for index, item in enumerate(test_specs)}
+    post_processor = trace_post_processor()
+
+    def compare(item, instance_logger):
+        test_spec, reference_pred = item
         instance_id = test_spec.instance_id
-        logger.info("[%d/%d] Starting %s", idx, total, instance_id)
+        instance_logger.info("Starting")
 
         comparison = InstanceComparison(
             test_spec=test_spec,
@@ -205,35 +330,89 @@ def main() -> int:
             output_dir=run_root,
             run_id=run_id,
             config=config,
-            logger=logger,
+            logger=instance_logger,
             framework_detector=framework_detector,
+            limits=limits,
+            snapshots=snapshots,
+            mirrors=mirrors,
+            source_reader=source_reader,
+            history=history,
+            result_cache=result_cache,
+            post_processor=post_processor,
         )
         report = comparison.run()
         if report is None:
-            logger.error("[%d/%d] Skipped %s due to fatal error", idx, total, instance_id)
-            continue
-        report_dict = report.to_dict()
-
+            return None
         report_path = run_root / "artifacts" / instance_id / "comparison_report.json"
-        record = build_instance_index_record(report_dict, report_path=report_path)
-        append_record(index, record)
-        write_run_index(index_path, index)
-
-        without_status = record["variants"][Variant.WITHOUT_RUNTIME.value]["status"]
-        with_status = record["variants"][Variant.WITH_RUNTIME.value]["status"]
-        logger.info(
-            "[%d/%d] Finished %s (%s=%s, %s=%s)",
-            idx,
-            total,
-            instance_id,
-            Variant.WITHOUT_RUNTIME.value,
-            without_status,
-            Variant.WITH_RUNTIME.value,
-            with_status,
-        )
+        record = build_instance_index_record(report.to_dict(), report_path=report_path)
+        index_writer.append(record)
+        return record
+
+    # Instances reach the scheduler as soon as their images are built.
+    planner = ImageBuildPlanner(
+        client,
+        logger=logger,
+        max_workers=args.max_builds,
+        force_rebuild=args.force_rebuild,
+        nocache=args.nocache,
+        limits=limits,
+    )
 
-    finalize_run_index(index)
-    write_run_index(index_path, index)
+    total = len(test_specs)
+    # Build failures finish on the scheduler's feeder thread, instances on
+    # the calling thread; next() on a count is atomic.
+    finished = itertools.count(1)
+
+    def buildable(build_outcomes):
+        # An instance whose base, env or instance image failed is recorded
+        # here and never reaches the scheduler.
+        for build in build_outcomes:
+            if build.ok:
+                yield build.item
+                continue
+            instance_id = build.item[0].instance_id
+            logger.error(
+                "[%d/%d] Skipped %s: image build failed: %s",
+                next(finished),
+                total,
+                instance_id,
+                build.error,
+            )
+            index_writer.append_build_failure(instance_id, build.error)
+
+    ready = buildable(planner.start(test_specs, spec_of=lambda item: item[0]))
+
+    with post_processor:
+        scheduler = InstanceScheduler(args.workers, logger=logger)
+        outcomes = scheduler.run(
+            ready,
+            compare,
+            name=lambda item: item[0].instance_id,
+            priority=lambda item: position[item[0].instance_id],
+        )
+        for outcome in outcomes:
+            done = next(finished)
+            record = outcome.result
+            if record is None:
+                logger.error(
+                    "[%d/%d] Skipped %s due to fatal error", done, total, outcome.name
+                )
+                continue
+
+            without_status = record["variants"][Variant.WITHOUT_RUNTIME.value]["status"]
+            with_status = record["variants"][Variant.WITH_RUNTIME.value]["status"]
+            logger.info(
+                "[%d/%d] Finished %s (%s=%s, %s=%s)",
+                done,
+                total,
+                outcome.name,
+                Variant.WITHOUT_RUNTIME.value,
+                without_status,
+                Variant.WITH_RUNTIME.value,
+                with_status,
+            )
+
+    index_writer.finalize()
     logger.info("Dataset run complete")
     logger.info("Index file: %s", index_path)
     return 0
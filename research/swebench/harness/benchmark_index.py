@@ -4,12 +4,14 @@ Helpers for dataset-level SWE-bench benchmarking run index records.
 
 from __future__ import annotations
 
-import json
+import os
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Set
 
 from libs.harness import Status, Variant
+from libs.tracing import json_codec
 
 
 def now_utc_iso() -> str:
@@ -51,6 +53,16 @@ def classify_failure_reason(
     return "unknown"
 
 
+def _run_metrics(run_result: Dict[str, Any]) -> Dict[str, Any]:
+    phases = run_result.get("phases")
+    return {
+        "runtime": run_result.get("runtime"),
+        "cached": bool(run_result.get("cached", False)),
+        "phases": phases if isinstance(phases, dict) else {},
+        "resources": run_result.get("resources"),
+    }
+
+
 def normalize_variant_record(variant_report: Dict[str, Any]) -> Dict[str, Any]:
     outcome = variant_report.get("outcome", {})
     if not isinstance(outcome, dict):
@@ -75,6 +87,7 @@ def normalize_variant_record(variant_report: Dict[str, Any]) -> Dict[str, Any]:
         "response_path": variant_report.get("response_path"),
         "patch_path": variant_report.get("patch_path"),
         "test_output_path": variant_report.get("test_output_path"),
+        **_run_metrics(run_result),
     }
 
 
@@ -100,6 +113,7 @@ def normalize_baseline_record(baseline_report: Dict[str, Any]) -> Dict[str, Any]
         "raw_error_excerpt": _excerpt(run_error or summary_line or run_result.get("traceback", "")),
         "trace_path": baseline_report.get("trace_path"),
         "test_output_path": baseline_report.get("test_output_path"),
+        **_run_metrics(run_result),
     }
 
 
@@ -152,6 +166,27 @@ def init_run_index(
         "log_path": str(log_path),
         "total_instances": total_instances,
         "records": [],
+        # Instances whose images failed to build; retried on resume.
+        "build_failures": [],
+    }
+
+
+def load_run_index(index_path: Path) -> Optional[Dict[str, Any]]:
+    """Load the index of an earlier run, or ``None`` if there is none."""
+    if not index_path.exists():
+        return None
+    index = json_codec.load_path(index_path)
+    return index if isinstance(index, dict) else None
+
+
+def recorded_instance_ids(index: Dict[str, Any]) -> Set[str]:
+    records = index.get("records")
+    if not isinstance(records, list):
+        return set()
+    return {
+        str(record["instance_id"])
+        for record in records
+        if isinstance(record, dict) and record.get("instance_id")
     }
 
 
@@ -161,13 +196,68 @@ def append_record(index: Dict[str, Any], record: Dict[str, Any]) -> None:
         records.append(record)
 
 
+def append_build_failure(
+    index: Dict[str, Any], instance_id: str, error: BaseException
+) -> None:
+    failures = index.setdefault("build_failures", [])
+    if isinstance(failures, list):
+        failures.append(
+            {
+                "instance_id": instance_id,
+                "error_type": type(error).__name__,
+                "raw_error_excerpt": _excerpt(str(error)),
+                "recorded_at": now_utc_iso(),
+            }
+        )
+
+
 def finalize_run_index(index: Dict[str, Any]) -> None:
     index["completed_at"] = now_utc_iso()
 
 
-def write_run_index(index_path: Path, index: Dict[str, Any]) -> None:
+def write_run_index(
+    index_path: Path, index: Dict[str, Any], *, pretty: bool = False
+) -> None:
     index_path.parent.mkdir(parents=True, exist_ok=True)
-    index_path.write_text(
-        json.dumps(index, indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
+    tmp_path = index_path.with_name(f".{index_path.name}.tmp")
+    json_codec.dump_path(tmp_path, index, pretty=pretty)
+    os.replace(tmp_path, index_path)
+
+
+class RunIndexWriter:
+    """Serialises run-index updates from concurrent workers.
+
+    Every mutation and the rewrite that follows it happen under one lock, so
+    records from parallel instances never interleave or get lost.
+    """
+
+    def __init__(
+        self, index_path: Path, index: Dict[str, Any], *, pretty: bool = False
+    ):
+        self._index_path = index_path
+        self._index = index
+        self._pretty = pretty
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return self._index_path
+
+    def write(self) -> None:
+        with self._lock:
+            write_run_index(self._index_path, self._index, pretty=self._pretty)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            append_record(self._index, record)
+            write_run_index(self._index_path, self._index, pretty=self._pretty)
+
+    def append_build_failure(self, instance_id: str, error: BaseException) -> None:
+        with self._lock:
+            append_build_failure(self._index, instance_id, error)
+            write_run_index(self._index_path, self._index, pretty=self._pretty)
+
+    def finalize(self) -> None:
+        with self._lock:
+            finalize_run_index(self._index)
+            write_run_index(self._index_path, self._index, pretty=self._pretty)
@@ -0,0 +1,51 @@
+"""
+Command-line wiring for the cache of finished test runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from pathlib import Path
+from typing import Optional
+
+from libs.harness import RunResultCache
+
+
+def add_result_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--result_cache_dir",
+        type=str,
+        default="./output/cache/results",
+        help="Host cache of finished test runs, keyed by image, patch, eval "
+        "script and tracer sources",
+    )
+    parser.add_argument(
+        "--result_cache_max_gb",
+        type=float,
+        default=RunResultCache.DEFAULT_MAX_BYTES / 1024**3,
+        help="Evict the least recently used cached runs beyond this size",
+    )
+    parser.add_argument(
+        "--no_result_cache",
+        action="store_true",
+        help="Run every test execution instead of reusing cached results",
+    )
+
+
+def result_cache_from_args(
+    args: argparse.Namespace,
+    *,
+    tracer_dir: Path,
+    logger: logging.Logger,
+) -> Optional[RunResultCache]:
+    if args.no_result_cache:
+        return None
+    cache = RunResultCache(
+        Path(args.result_cache_dir),
+        tracer_dir=tracer_dir,
+        logger=logger,
+        max_bytes=int(args.result_cache_max_gb * 1024**3),
+    )
+    cache.prune()
+    return cache
@@ -0,0 +1,232 @@
+"""
+Run per-instance work on a pool of worker threads.
+
+Instance work is dominated by Docker and LLM round-trips, so threads are
+enough; the expensive resources themselves are capped separately through
+libs.harness.ConcurrencyLimits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import itertools
+import logging
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from libs.harness import ConcurrencyLimits, RuntimeHistory
+from libs.log import with_prefix
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_ITEM = "item"
+_DONE = "done"
+_FAILED = "failed"
+_END = "end"
+
+
+@dataclass(frozen=True)
+class TaskOutcome(Generic[T, R]):
+    item: T
+    name: str
+    result: Optional[R] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def add_scheduler_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of instances processed concurrently",
+    )
+    parser.add_argument(
+        "--max_containers",
+        type=int,
+        default=None,
+        help="Cap on concurrently running containers (defaults to --workers)",
+    )
+    parser.add_argument(
+        "--max_builds",
+        type=int,
+        default=2,
+        help="Cap on concurrent Docker image builds",
+    )
+    parser.add_argument(
+        "--max_llm_calls",
+        type=int,
+        default=None,
+        help="Cap on concurrent LLM sessions (defaults to --workers)",
+    )
+    parser.add_argument(
+        "--history_path",
+        type=str,
+        default="./output/cache/runtime_history.json",
+        help="Per-instance runtime history used to order instances longest-first "
+        "and to derive per-instance timeouts",
+    )
+    parser.add_argument(
+        "--timeout_factor",
+        type=float,
+        default=RuntimeHistory.DEFAULT_TIMEOUT_FACTOR,
+        help="Per-instance timeout as a multiple of the slowest recorded test run; "
+        "--timeout applies to instances without history and caps the rest",
+    )
+    parser.add_argument(
+        "--no_history",
+        action="store_true",
+        help="Keep dataset order and the global --timeout",
+    )
+
+
+def limits_from_args(args: argparse.Namespace) -> ConcurrencyLimits:
+    workers = max(1, args.workers)
+    return ConcurrencyLimits(
+        containers=args.max_containers or workers,
+        builds=args.max_builds,
+        llm=args.max_llm_calls or workers,
+    )
+
+
+def history_from_args(args: argparse.Namespace) -> Optional[RuntimeHistory]:
+    if args.no_history:
+        return None
+    return RuntimeHistory(Path(args.history_path), timeout_factor=args.timeout_factor)
+
+
+class InstanceScheduler:
+    """Apply ``fn(item, logger)`` to every item with up to ``workers`` in flight.
+
+    Each call gets a logger adapter that prefixes messages with the item's
+    name. Outcomes are yielded in completion order; exceptions are captured
+    in the outcome rather than raised. With one worker everything runs
+    inline on the calling thread, in input order.
+
+    With more workers, ``items`` is drained on a feeder thread, so a slow
+    source (such as an ``ImageBuildPlanner`` waiting on a build) never holds
+    back outcomes that have already finished. Items that arrive while every
+    worker is busy wait their turn; with ``priority`` the lowest value among
+    them starts next, otherwise they start in arrival order.
+    """
+
+    def __init__(self, workers: int, *, logger: logging.Logger):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self._workers = workers
+        self._logger = logger
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    def run(
+        self,
+        items: Iterable[T],
+        fn: Callable[[T, logging.LoggerAdapter], R],
+        *,
+        name: Callable[[T], str],
+        priority: Optional[Callable[[T], Any]] = None,
+    ) -> Iterator[TaskOutcome[T, R]]:
+        if self._workers == 1:
+            for item in items:
+                yield self._call(item, fn, name(item))
+            return
+
+        # Source items and finished futures arrive on one queue.
+        events: queue.Queue = queue.Queue()
+        stop = threading.Event()
+        feeder = threading.Thread(
+            target=self._feed,
+            args=(items, events, stop),
+            name="instance-feeder",
+            daemon=True,
+        )
+        feeder.start()
+
+        # Heap of (priority, arrival, item); arrival breaks ties.
+        ready: List[Tuple[Any, int, T]] = []
+        arrivals = itertools.count()
+        pending: Dict[Future, None] = {}
+        exhausted = False
+        with ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="instance"
+        ) as executor:
+            try:
+                while not exhausted or ready or pending:
+                    finished: List[Future] = []
+                    event = events.get()
+                    while True:
+                        kind, value = event
+                        if kind == _ITEM:
+                            rank = priority(value) if priority is not None else 0
+                            heapq.heappush(ready, (rank, next(arrivals), value))
+                        elif kind == _DONE:
+                            finished.append(value)
+                        elif kind == _FAILED:
+                            raise value
+                        else:
+                            exhausted = True
+                        try:
+                            event = events.get_nowait()
+                        except queue.Empty:
+                            break
+
+                    for future in finished:
+                        del pending[future]
+                    while ready and len(pending) < self._workers:
+                        _, _, item = heapq.heappop(ready)
+                        future = executor.submit(self._call, item, fn, name(item))
+                        pending[future] = None
+                        future.add_done_callback(
+                            lambda done: events.put((_DONE, done))
+                        )
+                    for future in finished:
+                        yield future.result()
+            except BaseException:
+                stop.set()
+                for future in pending:
+                    future.cancel()
+                raise
+
+    @staticmethod
+    def _feed(items: Iterable[T], events: queue.Queue, stop: threading.Event) -> None:
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                events.put((_ITEM, item))
+        except BaseException as exc:
+            events.put((_FAILED, exc))
+        else:
+            events.put((_END, None))
+
+    def _call(
+        self, item: T, fn: Callable[[T, logging.LoggerAdapter], R], item_name: str
+    ) -> TaskOutcome[T, R]:
+        logger = with_prefix(self._logger, item_name)
+        try:
+            return TaskOutcome(item=item, name=item_name, result=fn(item, logger))
+        except Exception as exc:
+            logger.exception("Unhandled error: %s", exc)
+            return TaskOutcome(item=item, name=item_name, error=exc)
@@ -0,0 +1,58 @@
+"""
+Command-line wiring for post-setup snapshot images.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional
+
+import docker
+
+from libs.harness import ConcurrencyLimits, SnapshotStore
+
+
+def add_snapshot_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--no_snapshots",
+        action="store_true",
+        help="Run the full eval setup in every container instead of starting "
+        "from post-setup snapshot images",
+    )
+    parser.add_argument(
+        "--snapshot_max_images",
+        type=int,
+        default=SnapshotStore.DEFAULT_MAX_IMAGES,
+        help="Keep at most this many snapshot images on the local Docker host",
+    )
+    parser.add_argument(
+        "--snapshot_max_age_days",
+        type=float,
+        default=SnapshotStore.DEFAULT_MAX_AGE.days,
+        help="Remove snapshot images older than this many days",
+    )
+
+
+def snapshots_from_args(
+    args: argparse.Namespace,
+    *,
+    client: docker.DockerClient,
+    tracer_dir: Path,
+    logger: logging.Logger,
+    limits: ConcurrencyLimits,
+) -> Optional[SnapshotStore]:
+    if args.no_snapshots:
+        return None
+    store = SnapshotStore(
+        client,
+        tracer_dir=tracer_dir,
+        logger=logger,
+        limits=limits,
+        max_images=args.snapshot_max_images,
+        max_age=timedelta(days=args.snapshot_max_age_days),
+    )
+    store.prune()
+    return store
@@ -4,23 +4,41 @@
 from __future__ import annotations
 
 import argparse
-import json
 import sys
 from pathlib import Path
 
 import docker
 
 REPO_ROOT = Path(__file__).resolve().parents[3]
+FRAMEWORK_CACHE_PATH = REPO_ROOT / "research" / "swebench" / "config" / "framework_cache.json"
 
 from libs.harness import (
     FrameworkDetector,
+    ImageBuildPlanner,
+    ProjectMirrorCache,
     TraceOutputManager,
     TracedInstanceRunner,
+    trace_post_processor,
 )
 from libs.log import create_logger
+from libs.tracing import json_codec
+
+from research.swebench.harness.scheduler import (
+    InstanceScheduler,
+    add_scheduler_arguments,
+    history_from_args,
+    limits_from_args,
+)
+from research.swebench.harness.result_cache import (
+    add_result_cache_arguments,
+    result_cache_from_args,
+)
+from research.swebench.harness.snapshots import (
+    add_snapshot_arguments,
+    snapshots_from_args,
+)
 
 from swebench.harness.constants import KEY_INSTANCE_ID
-from swebench.harness.docker_build import build_env_images
 from swebench.harness.test_spec.test_spec import make_test_spec
 from swebench.harness.utils import (
     get_predictions_from_file,
@@ -39,11 +57,26 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--predictions_path", type=str, default="gold")
     parser.add_argument("--output_dir", type=str, default="output/traces/swebench")
     parser.add_argument("--timeout", type=int, default=None)
+    parser.add_argument(
+        "--no_early_stop",
+        action="store_true",
+        help="Run the full test selection instead of stopping once the "
+        "FAIL_TO_PASS tests have been traced",
+    )
     parser.add_argument("--force_rebuild", action="store_true")
     parser.add_argument("--nocache", action="store_true")
+    parser.add_argument(
+        "--mirror_cache_dir",
+        type=str,
+        default="./output/cache/mirrors",
+        help="Host cache of project mirrors, shared across runs",
+    )
     parser.add_argument("--run_id", type=str, default="trace_collection")
     parser.add_argument("--verbose", action="store_true")
     parser.add_argument("--skip-patch", dest="skip_patch", action="store_true")
+    add_scheduler_arguments(parser)
+    add_snapshot_arguments(parser)
+    add_result_cache_arguments(parser)
     return parser.parse_args()
 
 
@@ -113,33 +146,38 @@ def main() -> int:
         logger.error("Failed to connect to Docker: %s", exc)
         return 1
 
-    if not args.force_rebuild:
-        logger.info("Building/checking environment images...")
-        try:
-            build_env_images(
-                client,
-                dataset,
-                force_rebuild=args.force_rebuild,
-                max_workers=1,
-                namespace=None,
-                instance_image_tag="latest",
-                env_image_tag="latest",
-            )
-        except Exception as exc:
-            logger.error("Failed to build environment images: %s", exc)
-            return 1
-
     output_manager = TraceOutputManager(output_dir)
-    framework_detector = FrameworkDetector()
+    framework_detector = FrameworkDetector(cache_path=FRAMEWORK_CACHE_PATH)
+    frameworks = framework_detector.precompute(test_specs)
+    logger.info("Detected frameworks for %d instance(s)", len(frameworks))
 
     logger.info("\n" + "=" * 70)
     logger.info("Starting trace collection")
     logger.info("=" * 70)
 
-    results = []
-    for test_spec in test_specs:
-        instance_id = test_spec.instance_id
-        pred = predictions[instance_id]
+    limits = limits_from_args(args)
+    logger.info("Workers: %d, %s", args.workers, limits)
+    snapshots = snapshots_from_args(
+        args,
+        client=client,
+        tracer_dir=trace_collector_dir,
+        logger=logger,
+        limits=limits,
+    )
+    mirrors = ProjectMirrorCache(Path(args.mirror_cache_dir), logger=logger)
+    result_cache = result_cache_from_args(
+        args, tracer_dir=trace_collector_dir, logger=logger
+    )
+
+    history = history_from_args(args)
+    if history is not None:
+        test_specs = history.longest_first(test_specs, key=lambda spec: spec.instance_id)
+    # Builds finish out of order; the scheduler restores this order among
+    # instances waiting for a worker.
+    position = {spec.instance_id: index for index, spec in enumerate(test_specs)}
+    post_processor = trace_post_processor()
+
+    def collect(test_spec, instance_logger):
         runner = TracedInstanceRunner(
             client=client,
             test_spec=test_spec,
@@ -147,13 +185,72 @@ def main() -> int:
             trace_collector_dir=trace_collector_dir,
             output_manager=output_manager,
             framework_detector=framework_detector,
-            logger=logger,
+            logger=instance_logger,
             timeout=args.timeout,
-            force_rebuild=args.force_rebuild,
+            # The image build planner has already honoured --force_rebuild.
+            force_rebuild=False,
             nocache=args.nocache,
+            limits=limits,
+            snapshots=snapshots,
+            mirrors=mirrors,
+            history=history,
+            result_cache=result_cache,
+            stop_after_targets=not args.no_early_stop,
+            post_processor=post_processor,
+        )
+        pred = predictions[test_spec.instance_id]
+        return runner.run(pred, skip_patch=args.skip_patch).to_dict()
+
+    # Instances reach the scheduler as soon as their images are built.
+    planner = ImageBuildPlanner(
+        client,
+        logger=logger,
+        max_workers=args.max_builds,
+        force_rebuild=args.force_rebuild,
+        nocache=args.nocache,
+        limits=limits,
+    )
+
+    results = []
+
+    def buildable(build_outcomes):
+        # An instance whose base, env or instance image failed is recorded
+        # here and never reaches the scheduler.
+        for build in build_outcomes:
+            if build.ok:
+                yield build.item
+                continue
+            logger.error(
+                "Skipped %s: image build failed: %s", build.item.instance_id, build.error
+            )
+            results.append(
+                {
+                    "success": False,
+                    "instance_id": build.item.instance_id,
+                    "error": f"Image build failed: {build.error}",
+                }
+            )
+
+    ready = buildable(planner.start(test_specs))
+    with post_processor:
+        scheduler = InstanceScheduler(args.workers, logger=logger)
+        outcomes = scheduler.run(
+            ready,
+            collect,
+            name=lambda spec: spec.instance_id,
+            priority=lambda spec: position[spec.instance_id],
         )
-        result = runner.run(pred, skip_patch=args.skip_patch)
-        results.append(result.to_dict())
+        for outcome in outcomes:
+            if outcome.ok:
+                results.append(outcome.result)
+            else:
+                results.append(
+                    {
+                        "success": False,
+                        "instance_id": outcome.name,
+                        "error": str(outcome.error),
+                    }
+                )
 
     logger.info("\n" + "=" * 70)
     logger.info("Trace Collection Summary")
@@ -179,7 +276,7 @@ def main() -> int:
             logger.info("  %s: %s", r["instance_id"], r.get("error", "Unknown error"))
 
     summary_file = output_dir / f"summary_{args.run_id}.json"
-    summary_file.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    json_codec.dump_path(summary_file, results, pretty=True)
     logger.info("\nResults summary saved to: %s", summary_file)
 
     if failed:
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark trace JSON encode/decode across the available codec backends.
+
+Usage: python scripts/dev/bench_json_codec.py [auto_debug.json] [--repeat N]
+Without a trace file a synthetic one is generated.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from libs.tracing import json_codec  # noqa: E402
+
+
+def synthetic_traces(n_traces: int = 20, n_frames: int = 2000) -> List[Dict[str, Any]]:
+    def frame(i: int) -> Dict[str, Any]:
+        return {
+            "file": f"/testbed/pkg/module_{i % 40}.py",
+            "func": f"func_{i % 200}",
+            "line": i % 500 + 1,
+            "locals": {
+                "i": str(i),
+                "items": json.dumps(list(range(i % 20))),
+                "name": f"'value-{i}'",
+                "config": json.dumps({"key": i, "flag": bool(i % 2)}),
+            },
+        }
+
+    return [
+        {
+            "nodeid": f"tests/test_mod.py::test_case_{t}",
+            "exc_type": "AssertionError",
+            "message": "assert 1 == 2",
+            "frames": [frame(i) for i in range(30)],
+            "exec_path": [frame(i) for i in range(n_frames // 4)],
+            "step_frames": [frame(i) for i in range(n_frames)],
+        }
+        for t in range(n_traces)
+    ]
+
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("trace_file", nargs="?", help="auto_debug.json to benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.trace_file:
+        data = json_codec.load_path(args.trace_file)
+    else:
+        data = synthetic_traces()
+
+    print(f"{'backend':<8} {'pretty':<6} {'size MB':>8} {'dump ms':>9} {'load ms':>9}")
+    for name in json_codec.available_backends():
+        backend = json_codec.get_backend(name)
+        for pretty in (False, True):
+            encoded = backend.dumpb(data, pretty)
+            dump_s = best_of(args.repeat, lambda: backend.dumpb(data, pretty))
+            load_s = best_of(args.repeat, lambda: backend.loads(encoded))
+            print(
+                f"{name:<8} {str(pretty):<6} {len(encoded) / 1e6:>8.2f} "
+                f"{dump_s * 1e3:>9.1f} {load_s * 1e3:>9.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
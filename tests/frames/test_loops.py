@@ -0,0 +1,76 @@
+import pytest
+
+from libs.frames.frame import Frame
+from libs.frames.loops import LoopSummary, StepFrameCompressor
+
+
+FILE = "/testbed/pkg/core.py"
+
+
+def _frame(line, func="accumulate", **local_values):
+    return Frame(file=FILE, line=line, func=func, locals=local_values)
+
+
+def _iteration(i, total):
+    return [
+        _frame(4, items="[1, 2, 3]", i=str(i)),
+        _frame(5, items="[1, 2, 3]", i=str(i), total=str(total)),
+        _frame(6, items="[1, 2, 3]", i=str(i), total=str(total + i)),
+    ]
+
+
+def _loop_frames(iterations):
+    frames = []
+    total = 0
+    for i in range(iterations):
+        frames.extend(_iteration(i, total))
+        total += i
+    return frames
+
+
+def test_repeated_body_collapses_into_one_summary():
+    body = _loop_frames(6)
+    (summary,) = StepFrameCompressor().compress(body)
+
+    assert isinstance(summary, LoopSummary)
+    assert (summary.file, summary.func) == (FILE, "accumulate")
+    assert summary.lines == (4, 5, 6)
+    assert summary.iterations == 6
+    assert summary.first_iteration == tuple(body[:3])
+    assert summary.last_iteration == tuple(body[-3:])
+
+    varied = {v.name: v for v in summary.varied_locals}
+    assert set(varied) == {"i", "total"}
+    assert (varied["i"].minimum, varied["i"].maximum) == (0, 5)
+    assert (varied["total"].minimum, varied["total"].maximum) == (0, 15)
+    assert varied["i"].samples == ("0", "1", "2", "3", "4")
+
+
+def test_frames_around_the_loop_pass_through_unchanged():
+    before = [
+        _frame(1, "setup", config="{}"),
+        _frame(2, items="[1, 2, 3]"),
+        _frame(3, items="[1, 2, 3]", total="0"),
+    ]
+    # The last iteration breaks out after its second line.
+    partial = _iteration(4, 10)[:2]
+    after = [_frame(8, items="[1, 2, 3]", total="10"), _frame(12, "report", ok="True")]
+    out = list(StepFrameCompressor().compress(before + _loop_frames(4) + partial + after))
+
+    assert out[:3] == before
+    assert isinstance(out[3], LoopSummary)
+    assert out[3].iterations == 4
+    assert out[4:] == partial + after
+
+
+@pytest.mark.parametrize(
+    "frames, compressor",
+    [
+        ([_frame(line) for line in range(1, 10)], StepFrameCompressor()),
+        (_loop_frames(2), StepFrameCompressor(min_iterations=3)),
+        (_loop_frames(3), StepFrameCompressor(max_period=2)),
+    ],
+    ids=["no-repeats", "too-few-iterations", "period-too-long"],
+)
+def test_streams_without_a_loop_are_unchanged(frames, compressor):
+    assert list(compressor.compress(frames)) == frames
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from libs.frames import filters
+from libs.frames.pipeline import FramesFilteringPipeline
+from libs.frames.postprocess import TracePostProcessor
+from libs.frames.serializer import LocalsSerializer
+
+
+CHUNK_SIZE = 4
+
+_FILES = (
+    "/testbed/pkg/core.py",
+    "/testbed/pkg/util.py",
+    "/testbed/tests/conftest.py",
+    "/usr/lib/python3.11/json/decoder.py",
+)
+
+
+def _pipeline(*frame_filters):
+    return FramesFilteringPipeline(frame_filters, LocalsSerializer(cutoff=20))
+
+
+def _stateful_pipeline():
+    return _pipeline(
+        filters.TestbedOnlyFrameFilter(),
+        filters.ConftestFrameFilter(),
+        filters.DedupFrameFilter(by=("file", "func")),
+        filters.MaxEntriesFrameFilter(n=7),
+    )
+
+
+def _stateless_pipeline():
+    return _pipeline(filters.TestbedOnlyFrameFilter(), filters.ConftestFrameFilter())
+
+
+def _frames(rng, count):
+    return [
+        {
+            "file": rng.choice(_FILES),
+            "func": f"f{rng.randrange(6)}",
+            "line": rng.randrange(1, 200),
+            "locals": {"i": index, "text": "x" * rng.randrange(40), "items": [index] * 3},
+        }
+        for index in range(count)
+    ]
+
+
+def _traces(rng, lengths):
+    return [
+        {
+            "nodeid": f"tests/test_mod.py::test_{index}",
+            "exc_type": "AssertionError",
+            "frames": _frames(rng, length),
+            "exec_path": _frames(rng, length),
+            "step_frames": _frames(rng, length),
+        }
+        for index, length in enumerate(lengths)
+    ]
+
+
+def _processor(pipeline, **kwargs):
+    return TracePostProcessor(pipeline, pipeline, pipeline, **kwargs)
+
+
+@pytest.fixture(
+    scope="module",
+    params=[_stateful_pipeline, _stateless_pipeline],
+    ids=["stateful-suffix", "no-suffix"],
+)
+def processors(request):
+    pipeline = request.param()
+    with _processor(
+        pipeline, max_workers=2, min_parallel_frames=0, chunk_size=CHUNK_SIZE
+    ) as parallel:
+        yield parallel, _processor(pipeline, max_workers=1)
+
+
+def _assert_matches_sequential(processors, traces):
+    parallel, sequential = processors
+    expected = [sequential.process_one(trace) for trace in traces]
+
+    assert parallel._should_parallelize(traces)
+    assert parallel.process(traces) == expected
+    assert sequential.process(traces) == expected
+
+
+def test_parallel_matches_process_one(processors):
+    rng = random.Random(1234)
+    _assert_matches_sequential(processors, _traces(rng, [40, 17, 63]))
+
+
+@pytest.mark.parametrize(
+    "length",
+    [0, 1, CHUNK_SIZE - 1, CHUNK_SIZE, CHUNK_SIZE + 1, 2 * CHUNK_SIZE, 2 * CHUNK_SIZE + 1],
+)
+def test_parallel_matches_around_chunk_boundary(processors, length):
+    rng = random.Random(length)
+    _assert_matches_sequential(processors, _traces(rng, [length, length]))
+
+
+def test_missing_sections_stay_empty(processors):
+    traces = [{"nodeid": "t", "frames": None}, {"nodeid": "u"}]
+    parallel, sequential = processors
+
+    assert parallel.process(traces) == [sequential.process_one(t) for t in traces]
@@ -0,0 +1,256 @@
+import random
+import re
+from typing import Optional
+
+import pytest
+
+from libs.harness.outcome import Outcome, OutcomeParser, Status, parse_test_output
+
+
+def _legacy_parse(text: str) -> Outcome:
+    """The whole-buffer parser that ``OutcomeParser`` replaced."""
+    status = Status.UNKNOWN
+    if re.search(r"^FAILED\b", text, flags=re.MULTILINE) or re.search(
+        r"\b\d+\s+failed\b", text
+    ):
+        status = Status.FAILED
+    elif re.search(r"^OK\b", text, flags=re.MULTILINE) or re.search(
+        r"\b0\s+failed\b", text
+    ):
+        status = Status.PASSED
+
+    failure_count: Optional[int] = None
+    for match in re.finditer(r"(?:failures|errors)=(\d+)", text):
+        if failure_count is None:
+            failure_count = 0
+        failure_count += int(match.group(1))
+    failed_match = re.search(r"(\d+)\s+failed\b", text)
+    if failed_match:
+        failed_count = int(failed_match.group(1))
+        failure_count = (
+            failed_count
+            if failure_count is None
+            else max(failure_count, failed_count)
+        )
+    if status is Status.PASSED:
+        failure_count = 0
+
+    ran_match = re.search(r"Ran\s+(\d+)\s+tests", text)
+    ran_tests = int(ran_match.group(1)) if ran_match else None
+
+    summary_line = ""
+    for pattern in (r"^FAILED.*$", r"^OK.*$", r"^=+.*(?:failed|passed).*$"):
+        summary_match = re.search(pattern, text, flags=re.MULTILINE)
+        if summary_match:
+            summary_line = summary_match.group(0).strip()
+            break
+
+    return Outcome(
+        status=status,
+        failure_count=failure_count,
+        ran_tests=ran_tests,
+        summary_line=summary_line,
+    )
+
+
+PYTEST_FAILED = """\
++ pytest -rA tests/test_core.py
+============================= test session starts ==============================
+platform linux -- Python 3.9.19, pytest-7.4.0, pluggy-1.0.0
+collected 4 items
+
+tests/test_core.py::test_parse PASSED                                    [ 25%]
+tests/test_core.py::test_render FAILED                                   [ 50%]
+tests/test_core.py::test_load ERROR                                      [ 75%]
+tests/test_core.py::test_dump PASSED                                     [100%]
+
+=================================== FAILURES ===================================
+_________________________________ test_render __________________________________
+
+    def test_render():
+>       assert render("x") == "y"
+E       AssertionError: assert 'x' == 'y'
+
+tests/test_core.py:12: AssertionError
+=========================== short test summary info ============================
+PASSED tests/test_core.py::test_parse
+PASSED tests/test_core.py::test_dump
+FAILED tests/test_core.py::test_render - AssertionError: assert 'x' == 'y'
+ERROR tests/test_core.py::test_load - FileNotFoundError: data.json
+=============== 1 failed, 2 passed, 1 error in 0.31s ===============
+"""
+
+PYTEST_PASSED = """\
+============================= test session starts ==============================
+collected 2 items
+
+tests/test_core.py ..                                                    [100%]
+
+============================== 2 passed in 0.05s ===============================
+"""
+
+UNITTEST_FAILED = """\
+test_add (tests.test_math.MathTest) ... ok
+test_div (tests.test_math.MathTest) ... ERROR
+test_sub (tests.test_math.MathTest) ... FAIL
+
+======================================================================
+ERROR: test_div (tests.test_math.MathTest)
+----------------------------------------------------------------------
+Traceback (most recent call last):
+  File "/testbed/tests/test_math.py", line 9, in test_div
+    self.assertEqual(div(1, 0), 0)
+ZeroDivisionError: division by zero
+
+======================================================================
+FAIL: test_sub (tests.test_math.MathTest)
+----------------------------------------------------------------------
+AssertionError: 2 != 3
+
+----------------------------------------------------------------------
+Ran 3 tests in 0.002s
+
+FAILED (failures=1, errors=1)
+"""
+
+UNITTEST_PASSED = """\
+...
+----------------------------------------------------------------------
+Ran 3 tests in 0.001s
+
+OK
+"""
+
+DJANGO_FAILED = """\
+Testing against Django installed in '/testbed/django'
+Creating test database for alias 'default'...
+System check identified no issues (0 silenced).
+test_create (model_fields.tests.ModelTests) ... ok
+test_update (model_fields.tests.ModelTests) ... FAIL
+test_delete (model_fields.tests.ModelTests) ... ERROR
+test_skip (model_fields.tests.ModelTests) ... skipped 'no db'
+
+======================================================================
+ERROR: test_delete (model_fields.tests.ModelTests)
+----------------------------------------------------------------------
+django.db.utils.IntegrityError: FOREIGN KEY constraint failed
+
+======================================================================
+FAIL: test_update (model_fields.tests.ModelTests)
+----------------------------------------------------------------------
+AssertionError: 1 != 2
+
+----------------------------------------------------------------------
+Ran 4 tests in 0.120s
+
+FAILED (failures=1, errors=1, skipped=1)
+Destroying test database for alias 'default'...
+"""
+
+DJANGO_PASSED = """\
+Creating test database for alias 'default'...
+test_create (model_fields.tests.ModelTests) ... ok
+test_update (model_fields.tests.ModelTests) ... ok
+
+----------------------------------------------------------------------
+Ran 2 tests in 0.031s
+
+OK (skipped=1)
+Destroying test database for alias 'default'...
+"""
+
+NO_SUMMARY = """\
++ python -m pytest tests/test_core.py
+ImportError while loading conftest '/testbed/conftest.py'.
+"""
+
+FIXTURES = {
+    "pytest-failed": (PYTEST_FAILED, "tests/test_core.py::test_render"),
+    "pytest-passed": (PYTEST_PASSED, None),
+    "unittest-failed": (UNITTEST_FAILED, "test_div (tests.test_math.MathTest)"),
+    "unittest-passed": (UNITTEST_PASSED, None),
+    "django-failed": (DJANGO_FAILED, "test_update (model_fields.tests.ModelTests)"),
+    "django-passed": (DJANGO_PASSED, None),
+    "no-summary": (NO_SUMMARY, None),
+}
+
+
+def _random_chunks(text, rng):
+    cuts = sorted(rng.sample(range(len(text) + 1), k=min(len(text), rng.randrange(1, 40))))
+    bounds = [0, *cuts, len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize("name", sorted(FIXTURES))
+def test_matches_legacy_parser(name):
+    text, _ = FIXTURES[name]
+
+    assert parse_test_output(text) == _legacy_parse(text)
+
+
+@pytest.mark.parametrize("name", sorted(FIXTURES))
+@pytest.mark.parametrize("seed", range(20))
+def test_chunked_feed_matches_legacy_parser(name, seed):
+    text, first_failure = FIXTURES[name]
+    seen = []
+    parser = OutcomeParser(on_failure=seen.append)
+    for chunk in _random_chunks(text, random.Random(seed)):
+        parser.feed(chunk)
+
+    assert parser.close() == _legacy_parse(text)
+    assert parser.first_failure == first_failure
+    assert seen == ([first_failure] if first_failure else [])
+
+
+def test_outcome_fields():
+    outcome = parse_test_output(DJANGO_FAILED)
+
+    assert outcome.status is Status.FAILED
+    assert outcome.failure_count == 2
+    assert outcome.ran_tests == 4
+    assert outcome.summary_line == "FAILED (failures=1, errors=1, skipped=1)"
+
+
+@pytest.mark.parametrize(
+    "line, test_id",
+    [
+        ("FAIL: test_a (pkg.tests.Case)", "test_a (pkg.tests.Case)"),
+        ("ERROR: test_a (pkg.tests.Case)", "test_a (pkg.tests.Case)"),
+        ("test_a (pkg.tests.Case) ... FAIL", "test_a (pkg.tests.Case)"),
+        ("test_a (pkg.tests.Case) ... ERROR", "test_a (pkg.tests.Case)"),
+        ("tests/test_a.py::test_b[1-2] FAILED    [ 50%]", "tests/test_a.py::test_b[1-2]"),
+        ("tests/test_a.py::test_b ERROR", "tests/test_a.py::test_b"),
+        ("FAILED tests/test_a.py::Test::test_b - assert 1 == 2", "tests/test_a.py::Test::test_b"),
+        ("ERROR tests/test_a.py::test_b - ImportError", "tests/test_a.py::test_b"),
+    ],
+)
+def test_first_failure_forms(line, test_id):
+    seen = []
+    parser = OutcomeParser(on_failure=seen.append)
+    parser.feed("collected 2 items\n" + line)
+
+    # The callback waits for the line to complete.
+    assert seen == []
+    parser.feed("\nFAIL: test_later (pkg.tests.Case)\n")
+
+    assert parser.first_failure == test_id
+    assert seen == [test_id]
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "test_a (pkg.tests.Case) ... ok",
+        "tests/test_a.py::test_b PASSED",
+        "FAILED (failures=1)",
+        "ERROR: something went wrong",
+        "  FAIL: test_a (pkg.tests.Case)",
+    ],
+)
+def test_lines_that_name_no_failing_test(line):
+    seen = []
+    parser = OutcomeParser(on_failure=seen.append)
+    parser.feed(line + "\n")
+
+    assert parser.first_failure is None
+    assert seen == []
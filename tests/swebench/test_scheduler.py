@@ -0,0 +1,85 @@
+import logging
+import threading
+
+import pytest
+
+from research.swebench.harness.scheduler import InstanceScheduler
+
+
+LOGGER = logging.getLogger("test-scheduler")
+
+
+def _double(item, logger):
+    if item == "boom":
+        raise RuntimeError("boom")
+    return item * 2
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_runs_every_item_and_captures_errors(workers):
+    scheduler = InstanceScheduler(workers, logger=LOGGER)
+    outcomes = list(scheduler.run([1, 2, "boom", 4, 5], _double, name=str))
+
+    assert sorted(o.result for o in outcomes if o.ok) == [2, 4, 8, 10]
+    (failed,) = [o for o in outcomes if not o.ok]
+    assert failed.name == "boom" and isinstance(failed.error, RuntimeError)
+
+
+def test_blocked_source_does_not_hold_finished_outcomes():
+    release = threading.Event()
+    timed_out = []
+
+    def source():
+        yield 1
+        yield 2
+        # Stands in for an image build that only finishes once both
+        # earlier outcomes have been consumed.
+        if not release.wait(5):
+            timed_out.append(True)
+        yield 3
+
+    scheduler = InstanceScheduler(2, logger=LOGGER)
+    outcomes = scheduler.run(source(), _double, name=str)
+
+    first = {next(outcomes).result, next(outcomes).result}
+    assert first == {2, 4}
+    release.set()
+    assert [o.result for o in outcomes] == [6]
+    assert not timed_out
+
+
+def test_source_errors_propagate():
+    def source():
+        yield 1
+        raise ValueError("bad source")
+
+    scheduler = InstanceScheduler(2, logger=LOGGER)
+    with pytest.raises(ValueError, match="bad source"):
+        list(scheduler.run(source(), _double, name=str))
+
+
+def test_waiting_items_start_by_priority():
+    gate = threading.Event()
+    rank = {"a": 0, "b": 1, "c": 4, "d": 2, "e": 3}
+    submitted = []
+
+    def source():
+        yield from "abcde"
+        # Everything is queued; let the first two finish.
+        gate.set()
+
+    def work(item, logger):
+        if item in "ab":
+            gate.wait(5)
+        return item
+
+    def name(item):
+        submitted.append(item)
+        return item
+
+    scheduler = InstanceScheduler(2, logger=LOGGER)
+    outcomes = list(scheduler.run(source(), work, name=name, priority=rank.get))
+
+    assert sorted(o.result for o in outcomes) == list("abcde")
+    assert submitted[:2] == ["a", "b"]
+    assert submitted[2:] == ["d", "e", "c"]
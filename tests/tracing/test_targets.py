@@ -0,0 +1,55 @@
+import json
+
+from libs.tracing._targets import DONE_MARKER, TargetTracker
+
+
+def _tracker(*targets):
+    return TargetTracker(json.dumps(list(targets)))
+
+
+def test_unittest_ids_are_normalized():
+    tracker = _tracker("test_y (pkg.tests.Case)")
+
+    # Python 3.11+ repeats the test name in the qualifier.
+    assert tracker.record("test_y (pkg.tests.Case.test_y)", failed=True)
+
+
+def test_legacy_and_dotted_forms_match_each_other():
+    tracker = _tracker("test_y (pkg.tests.Case.test_y)", "test_z (pkg.tests.Case)")
+
+    assert not tracker.record("test_y (pkg.tests.Case)", failed=False)
+    assert tracker.record("test_z (pkg.tests.Case.test_z)", failed=False)
+
+
+def test_done_only_after_every_target_finished():
+    tracker = _tracker(
+        "tests/test_a.py::test_one",
+        "test_two",
+        "test_three (pkg.tests.Case)",
+    )
+
+    assert not tracker.record("tests/test_a.py::test_one", failed=True)
+    assert not tracker.record("tests/test_other.py::test_unrelated", failed=False)
+    assert not tracker.done
+    # Bare names match the last node id component.
+    assert not tracker.record("tests/test_b.py::test_two", failed=False)
+    assert tracker.record("test_three (pkg.tests.Case.test_three)", failed=True)
+    assert tracker.done
+
+    lines = tracker.done_lines()
+    assert lines[-1] == DONE_MARKER
+    assert "2 failed, 2 passed" in lines[0]
+
+
+def test_fires_once():
+    tracker = _tracker("tests/test_a.py::test_one")
+
+    assert tracker.record("tests/test_a.py::test_one", failed=False)
+    assert not tracker.record("tests/test_a.py::test_one", failed=False)
+
+
+def test_no_targets_disables_early_stop():
+    for raw in ("", "not json", json.dumps({"a": 1}), json.dumps(["", "  "])):
+        tracker = TargetTracker(raw)
+        assert not tracker.enabled
+        assert not tracker.record("tests/test_a.py::test_one", failed=True)
@@ -0,0 +1,111 @@
+import pytest
+
+from libs.tracing import _trace_file
+from libs.tracing._trace_file import (
+    FORMAT_INDEXED,
+    FORMAT_JSON,
+    IndexedTraceReader,
+    JsonTraceReader,
+    load_traces,
+    open_traces,
+    write_traces,
+)
+
+
+TRACES = [
+    {"nodeid": "tests/test_a.py::test_one", "exc_type": "AssertionError", "frames": []},
+    {"nodeid": "tests/test_a.py::test_two", "message": "multi\nline é", "frames": [{"line": 3}]},
+    {"nodeid": "tests/test_a.py::test_one", "exc_type": "ValueError", "frames": []},
+    {"exc_type": "KeyError"},
+]
+
+
+@pytest.fixture
+def indexed_path(tmp_path):
+    path = tmp_path / "auto_debug.json"
+    write_traces(path, TRACES, fmt=FORMAT_INDEXED)
+    return path
+
+
+@pytest.fixture
+def json_path(tmp_path):
+    path = tmp_path / "legacy.json"
+    write_traces(path, TRACES, fmt=FORMAT_JSON)
+    return path
+
+
+def _contents(reader):
+    nodeids = {trace.get("nodeid", "") for trace in TRACES} | {"missing"}
+    return {
+        "records": list(reader),
+        "nodeids": reader.nodeids(),
+        "len": len(reader),
+        "get": {nodeid: reader.get(nodeid) for nodeid in nodeids},
+        "contains": {nodeid: nodeid in reader for nodeid in nodeids},
+    }
+
+
+def test_trace_reader_is_abstract():
+    with pytest.raises(TypeError):
+        _trace_file._TraceReader()
+
+
+def test_indexed_round_trip_matches_json_reader(indexed_path, json_path):
+    with open_traces(indexed_path) as indexed, open_traces(json_path) as legacy:
+        assert isinstance(indexed, IndexedTraceReader)
+        assert isinstance(legacy, JsonTraceReader)
+        assert _contents(indexed) == _contents(legacy)
+        assert list(indexed) == TRACES
+        # Duplicate node ids resolve to the first record.
+        assert indexed.get("tests/test_a.py::test_one")["exc_type"] == "AssertionError"
+
+    assert load_traces(indexed_path) == load_traces(json_path) == TRACES
+
+
+def test_empty_indexed_file(tmp_path):
+    path = tmp_path / "auto_debug.json"
+    write_traces(path, [], fmt=FORMAT_INDEXED)
+
+    assert load_traces(path) == []
+
+
+@pytest.mark.parametrize("cut", [1, 8, _trace_file._FOOTER.size])
+def test_truncated_footer_falls_back_to_scan(indexed_path, cut):
+    data = indexed_path.read_bytes()
+    indexed_path.write_bytes(data[:-cut])
+
+    with IndexedTraceReader(indexed_path) as reader:
+        assert list(reader) == TRACES
+        assert reader.get("tests/test_a.py::test_two") == TRACES[1]
+
+
+def test_bad_footer_magic_falls_back_to_scan(indexed_path):
+    data = indexed_path.read_bytes()
+    indexed_path.write_bytes(data[:-8] + b"XXXXXXXX")
+
+    assert load_traces(indexed_path) == TRACES
+
+
+def test_corrupt_index_offsets_fall_back_to_scan(indexed_path):
+    data = bytearray(indexed_path.read_bytes())
+    footer = _trace_file._FOOTER
+    offset, length, magic = footer.unpack(bytes(data[-footer.size :]))
+    data[-footer.size :] = footer.pack(offset, length + 10_000, magic)
+    indexed_path.write_bytes(bytes(data))
+
+    assert load_traces(indexed_path) == TRACES
+
+
+def test_killed_mid_record_keeps_complete_records(indexed_path):
+    with IndexedTraceReader(indexed_path) as reader:
+        second = reader._offsets[1]
+    indexed_path.write_bytes(indexed_path.read_bytes()[: second + 10])
+
+    assert load_traces(indexed_path) == TRACES[:1]
+
+
+def test_bad_magic_is_read_as_json(json_path):
+    # open_traces only picks the mmap reader for files with the indexed magic.
+    assert load_traces(json_path) == TRACES
+    with pytest.raises(ValueError):
+        IndexedTraceReader(json_path)